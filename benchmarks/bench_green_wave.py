@@ -0,0 +1,30 @@
+# benchmarks/bench_green_wave.py
+"""
+Timing of optimize_green_wave on random arterials (flow ratios 0.2-0.45
+arterial / 0.1-0.35 cross, links of 15-60 s), cycles 60-120 s in 5 s steps.
+
+    python -m benchmarks.bench_green_wave    # from the repo root
+
+Long corridors of random links may show no inbound band: there no two-way
+band beats the best one-way one at inbound_weight=1. Fails if a corridor
+takes longer than BUDGET_MS_PER_JUNCTION per junction, so rerunning the
+optimization every cycle stays affordable.
+"""
+import time
+import numpy as np
+from smart_signal.control.coordination import CorridorJunction, optimize_green_wave
+
+BUDGET_MS_PER_JUNCTION = 15.0
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    print(f"{'junctions':>9} {'ms':>7} {'cycle':>6} {'band out':>9} {'band in':>8}")
+    for n in (5, 10, 20, 30, 40):
+        junctions = [CorridorJunction(f"J{i}", rng.uniform(0.2, 0.45), rng.uniform(0.1, 0.35)) for i in range(n)]
+        travel = rng.uniform(15, 60, n - 1)
+        t0 = time.perf_counter()
+        gw = optimize_green_wave(junctions, travel)
+        ms = (time.perf_counter() - t0) * 1e3
+        print(f"{n:>9} {ms:>7.1f} {gw.cycle_s:>6.0f} {gw.bandwidth_out_s:>9.0f} {gw.bandwidth_in_s:>8.0f}")
+        assert ms <= BUDGET_MS_PER_JUNCTION * n, f"{n} junctions took {ms:.0f} ms, budget {BUDGET_MS_PER_JUNCTION * n:.0f} ms"
@@ -0,0 +1,80 @@
+# benchmarks/bench_iou_tracker.py
+"""
+Benchmark: IOUTracker with the grid candidate index vs. the old
+compare-everything loop, 500 simultaneous tracks over four approaches.
+Checks that both produce identical associations every frame.
+
+    python -m benchmarks.bench_iou_tracker    # from the repo root
+"""
+import time
+import numpy as np
+from smart_signal.types import Detection, Track
+from smart_signal.utils.geometry import iou
+from smart_signal.perception.tracker import IOUTracker
+
+CLASSES = ["car", "bus", "truck", "motorcycle"]
+APPROACHES = ["N", "E", "S", "W"]
+
+class LegacyIOUTracker:
+    def __init__(self, iou_thresh=0.3, max_age=10):
+        self.iou_thresh = iou_thresh
+        self.max_age = max_age
+        self.tracks = []
+        self.next_id = 1
+
+    def update(self, detections, frame_id):
+        updated_tracks = []
+        for det in detections:
+            best_iou = 0
+            best_track = None
+            for track in self.tracks:
+                if track.cls != det.cls or track.approach_id != det.approach_id:
+                    continue
+                s = iou(track.bbox, det.bbox)
+                if s > best_iou:
+                    best_iou, best_track = s, track
+            if best_iou >= self.iou_thresh and best_track:
+                best_track.bbox = det.bbox
+                best_track.last_seen_frame = frame_id
+                updated_tracks.append(best_track)
+            else:
+                updated_tracks.append(Track(track_id=self.next_id, bbox=det.bbox, cls=det.cls,
+                                            approach_id=det.approach_id, last_seen_frame=frame_id))
+                self.next_id += 1
+        self.tracks = [t for t in updated_tracks if frame_id - t.last_seen_frame <= self.max_age]
+        return self.tracks
+
+def make_frames(n_objects, n_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(0, 1900, size=(n_objects, 2))
+    vel = rng.normal(0, 3, size=(n_objects, 2))
+    size = rng.uniform(30, 90, size=(n_objects, 2))
+    cls = rng.choice(CLASSES, n_objects)
+    app = rng.choice(APPROACHES, n_objects)
+    frames = []
+    for f in range(n_frames):
+        pos += vel
+        seen = rng.random(n_objects) > 0.05
+        boxes = np.hstack([pos, pos + size]).astype(np.float32)  # batches store float32 boxes
+        frames.append([
+            Detection(bbox=tuple(boxes[k].tolist()), score=0.9, cls=str(cls[k]),
+                      frame_id=f, approach_id=str(app[k]))
+            for k in np.flatnonzero(seen)
+        ])
+    return frames
+
+def run(tracker, frames):
+    out = []
+    t0 = time.perf_counter()
+    for f, dets in enumerate(frames):
+        tracks = tracker.update(dets, f)
+        out.append([(t.track_id, t.bbox) for t in tracks])
+    return (time.perf_counter() - t0) / len(frames) * 1e3, out
+
+if __name__ == "__main__":
+    frames = make_frames(500, 60)
+    t_old, a = run(LegacyIOUTracker(), frames)
+    t_new, b = run(IOUTracker(), frames)
+    assert a == b, "association output differs"
+    print(f"500 tracks / 4 approaches: legacy {t_old:.2f} ms/frame, grid {t_new:.2f} ms/frame, "
+          f"speedup {t_old / t_new:.1f}x (outputs identical)")
@@ -0,0 +1,55 @@
+# benchmarks/bench_split_planner.py
+"""
+Latency on the phase-switch path for 16 lanes: planning the next cycle
+there (forecast + forecast_lane_stats + compute_splits) vs. reading the
+splits a SplitPlanner already published from its background thread.
+
+    python -m benchmarks.bench_split_planner    # from the repo root
+"""
+import time
+import numpy as np
+from smart_signal.types import LaneStat
+from smart_signal.control.optimizer import SignalOptimizer
+from smart_signal.control.forecast import ArrivalForecaster, SplitPlanner, forecast_lane_stats
+
+HORIZON_S = 30.0
+
+
+def timeit(fn, n=2000):
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return np.percentile(samples, 50) * 1e6, np.percentile(samples, 99) * 1e6
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    lanes = [LaneStat(approach_id=a, lane_id=f"{a}{i}", movement="through", queue_len=int(rng.integers(0, 20)),
+                      arrival_rate_vph=float(rng.uniform(100, 900)), occupancy=0.0, spillback=False)
+             for a in "NESW" for i in range(4)]
+    opt = SignalOptimizer()
+    fc = ArrivalForecaster(len(lanes))
+    rates = np.array([ls.arrival_rate_vph for ls in lanes])
+    t = time.time()
+    for i in range(600):
+        fc.observe(t - 600 + i, rates)
+
+    def plan():
+        now = time.time()
+        fc.observe(now, rates)
+        return opt.compute_splits(forecast_lane_stats(lanes, fc.forecast(now, HORIZON_S), HORIZON_S))
+
+    planner = SplitPlanner(plan, interval_s=0.05)
+    planner.start()
+    while planner.latest is None:
+        time.sleep(0.01)
+    try:
+        inline = timeit(plan)
+        ready = timeit(lambda: planner.latest)
+    finally:
+        planner.stop()
+    print(f"{'switch path':>22} {'p50 us':>8} {'p99 us':>8}")
+    print(f"{'plan inline':>22} {inline[0]:>8.1f} {inline[1]:>8.1f}")
+    print(f"{'read planned splits':>22} {ready[0]:>8.1f} {ready[1]:>8.1f}")
@@ -0,0 +1,51 @@
+# benchmarks/bench_webster.py
+"""
+Microbenchmark: Webster timings for a network of 4-phase intersections,
+one WebsterNetwork.compute over every lane vs. webster_splits per
+intersection.
+
+    python -m benchmarks.bench_webster    # from the repo root
+"""
+import time
+import numpy as np
+import yaml
+from smart_signal.types import LaneStat
+from smart_signal.control.phases import PhaseGraph
+from smart_signal.utils.timing import WebsterNetwork, webster_splits
+
+LANES = [(f"{a}{i}", a, m) for a in "NESW" for i, m in enumerate(("through", "through", "left", "right"))]
+
+
+def timeit(fn, repeat=50):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+if __name__ == "__main__":
+    with open("config/config.yaml") as f:
+        graph = PhaseGraph.from_config(yaml.safe_load(f)["control"]["phases"])
+    rng = np.random.default_rng(0)
+    print(f"{'junctions':>9} {'per-junction ms':>16} {'network ms':>11} {'speedup':>8}")
+    for n in (10, 100, 1000):
+        flows = rng.uniform(50, 600, size=(n, len(LANES)))
+        stats = [[LaneStat(approach_id=a, lane_id=lid, movement=m, queue_len=0, arrival_rate_vph=0.0, occupancy=0.0,
+                           spillback=False, arrival_pcu_vph=float(v)) for (lid, a, m), v in zip(LANES, row)]
+                 for row in flows]
+        net = WebsterNetwork([graph] * n, [LANES] * n)
+
+        def separate():
+            return [webster_splits(ls, 4.0, 7.0, 60.0, phases=graph) for ls in stats]
+
+        def network():
+            return net.compute(flows.ravel())
+
+        cycle, greens, _ = network()
+        ref = separate()
+        assert np.allclose(cycle, [s.cycle_s for s in ref])
+        assert np.allclose(greens, [g for s in ref for g in s.greens_s.values()])
+        t_sep, t_net = timeit(separate, 5), timeit(network)
+        print(f"{n:>9} {t_sep:>16.2f} {t_net:>11.3f} {t_sep / t_net:>7.0f}x")
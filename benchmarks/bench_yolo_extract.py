@@ -0,0 +1,101 @@
+# benchmarks/bench_yolo_extract.py
+"""
+Microbenchmark: turning one YOLO result into detections, per-box Python
+loop (int(box.cls), box.xyxy[0].tolist(), float(box.conf) per box) vs. the
+vectorized column extraction + class LUT in YOLODetector._to_batch.
+
+Results are mocked with numpy-backed stand-ins for ultralytics' Boxes, so no
+model is needed; real torch tensors make each per-box conversion dearer, so
+the speedup here is a lower bound.
+
+    python -m benchmarks.bench_yolo_extract    # from the repo root
+"""
+import time
+import warnings
+import numpy as np
+from smart_signal.types import DetectionBatch, CLASS_CODE, approach_code
+from smart_signal.perception.detector import YOLODetector, build_class_lut
+
+CLASS_MAP = {0: "person", 1: "bicycle", 2: "car", 3: "motorcycle", 5: "bus", 7: "truck"}
+
+
+class FakeBoxes:
+    """
+    Same access pattern as ultralytics.engine.results.Boxes: columns of an
+    (N,6) [x1,y1,x2,y2,conf,cls] array, and iteration yields 1-row Boxes.
+    """
+    def __init__(self, data):
+        self.data = data if data.ndim == 2 else data[None, :]
+
+    @property
+    def xyxy(self):
+        return self.data[:, :4]
+
+    @property
+    def conf(self):
+        return self.data[:, 4]
+
+    @property
+    def cls(self):
+        return self.data[:, 5]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return (FakeBoxes(self.data[i]) for i in range(len(self.data)))
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.boxes = FakeBoxes(data)
+
+
+def legacy(class_map, r, frame_id, approach_id):
+    boxes, scores, codes = [], [], []
+    for box in r.boxes:
+        cls_id = int(box.cls)
+        if cls_id not in class_map:
+            continue
+        label = class_map[cls_id]
+        if label == "person":
+            label = "pedestrian"
+        boxes.append(box.xyxy[0].tolist())
+        scores.append(float(box.conf))
+        codes.append(CLASS_CODE[label])
+    return DetectionBatch.from_arrays(boxes, scores, codes, approach_code(approach_id), frame_id)
+
+
+def make_result(n, rng):
+    xy = rng.uniform(0, 1800, size=(n, 2))
+    wh = rng.uniform(20, 200, size=(n, 2))
+    conf = rng.uniform(0.3, 1.0, size=(n, 1))
+    cls = rng.integers(0, 10, size=(n, 1))   # COCO ids, some unmapped
+    return FakeResult(np.hstack([xy, xy + wh, conf, cls]).astype(np.float32))
+
+
+def timeit(fn, *args, repeat=200):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e6
+
+
+if __name__ == "__main__":
+    # int()/float() of a 1-element array is how the legacy loop reads torch tensors
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    det = YOLODetector.__new__(YOLODetector)   # skip model loading
+    det.class_map = CLASS_MAP
+    det.class_lut = build_class_lut(CLASS_MAP)
+
+    rng = np.random.default_rng(0)
+    print(f"{'boxes':>6} {'loop us':>9} {'vector us':>10} {'speedup':>8}")
+    for n in (10, 50, 100, 200, 400):
+        r = make_result(n, rng)
+        a, b = legacy(CLASS_MAP, r, 1, "N"), det._to_batch(r, 1, "N")
+        assert np.array_equal(a.data, b.data), "extraction output differs"
+        t_old = timeit(legacy, CLASS_MAP, r, 1, "N")
+        t_new = timeit(det._to_batch, r, 1, "N")
+        print(f"{n:>6} {t_old:>9.1f} {t_new:>10.1f} {t_old / t_new:>7.1f}x")
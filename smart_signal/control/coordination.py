@@ -0,0 +1,231 @@
+# smart_signal/control/coordination.py
+"""
+Green-wave coordination for a chain of junctions along an arterial.
+
+Every junction runs a common cycle with a two-phase view: the arterial
+through phase and everything else. For a candidate cycle, greens follow the
+junctions' critical flow ratios and offsets are searched to maximize the
+two-way bandwidth: the longest window a platoon can leave the first
+(outbound) or last (inbound) junction and meet green everywhere, travelling
+at the link travel times.
+
+Time is discretized into ``resolution_s`` bins. Seen from the corridor
+start, a junction's green is a window shifted by its offset minus the
+travel time to it. The search is coordinate descent: each pass re-places
+one junction at a time against the others, scoring all of its offsets at
+once from run lengths and prefix sums of the others' common green. A
+single descent stalls in local optima, so it is restarted from the
+outbound and inbound progressions and a two-way seed (greens centred
+between the two platoons' arrivals), keeping the best. To stay cheap
+enough to rerun every cycle, a descent stops after the first pass that
+does not widen the bands, the restarts stop once both bands are as wide
+as the narrowest green, and cycles that could not beat the best one even
+then are skipped.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from smart_signal.types import Splits
+from smart_signal.utils.timing import webster_cycle
+
+
+@dataclass
+class CorridorJunction:
+    id: str
+    arterial_y: float          # critical flow ratio (v/s) of the arterial through phase
+    cross_y: float             # sum of critical flow ratios of the other phases
+    lost_time_s: float = 4.0
+    min_green_s: float = 7.0
+
+
+@dataclass
+class GreenWave:
+    cycle_s: float
+    greens_s: np.ndarray       # arterial green per junction
+    offsets_s: np.ndarray      # start of arterial green, relative to the first junction
+    bandwidth_out_s: float
+    bandwidth_in_s: float
+    junction_ids: List[str]
+
+    def splits(self, lost_time_s: Sequence[float]) -> List[Splits]:
+        """
+        Per-junction Splits with "arterial" and "cross" greens.
+        """
+        return [Splits(cycle_s=self.cycle_s, greens_s={"arterial": float(g), "cross": float(self.cycle_s - g - lt)})
+                for g, lt in zip(self.greens_s, lost_time_s)]
+
+
+def longest_run(mask: np.ndarray) -> np.ndarray:
+    """
+    Longest circular run of True along the last axis of a (..., R) boolean array.
+    """
+    r = mask.shape[-1]
+    m = np.concatenate([mask, mask], axis=-1)
+    idx = np.arange(2 * r)
+    last_false = np.maximum.accumulate(np.where(m, -1, idx), axis=-1)
+    return np.minimum((idx - last_false).max(axis=-1), r)
+
+
+def arterial_greens(junctions: Sequence[CorridorJunction], cycle_s: float) -> np.ndarray:
+    """
+    Arterial green per junction: effective green shared by flow ratio,
+    keeping min_green_s for both the arterial and the cross phases.
+    """
+    ya = np.array([j.arterial_y for j in junctions], dtype=float)
+    yc = np.array([j.cross_y for j in junctions], dtype=float)
+    lost = np.array([j.lost_time_s for j in junctions], dtype=float)
+    gmin = np.array([j.min_green_s for j in junctions], dtype=float)
+    eff = cycle_s - lost
+    share = np.divide(ya, ya + yc, out=np.full_like(ya, 0.5), where=(ya + yc) > 0)
+    return np.clip(eff * share, gmin, np.maximum(eff - gmin, gmin))
+
+
+def _window_scores(full: np.ndarray, others: np.ndarray, g: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For a green of ``g`` bins starting at every bin s of the cycle: the
+    longest run inside it where ``full`` (all other junctions green) holds,
+    and the sum of ``others`` (how many other junctions are green) over it.
+    """
+    r = len(full)
+    f2 = np.concatenate([full, full])
+    idx = np.arange(2 * r)
+    run = idx - np.maximum.accumulate(np.where(f2, -1, idx))     # run of True ending at each bin
+    j = np.arange(g)
+    band = np.minimum(run[np.arange(r)[:, None] + j[None, :]], j + 1).max(axis=1) if g else np.zeros(r, np.int64)
+    cs = np.concatenate([[0], np.cumsum(np.concatenate([others, others]))])
+    s = np.arange(r)
+    return band, cs[s + g] - cs[s]
+
+
+def _descend(offsets: np.ndarray, greens_bins: np.ndarray, t_out: np.ndarray, t_in: np.ndarray, r: int,
+             inbound_weight: float, passes: int) -> Tuple[np.ndarray, int, int]:
+    """
+    Coordinate descent over offsets (bins) from ``offsets``. A junction
+    with offset k and shift T (travel time from the platoon's origin) is
+    green, in corridor time, on the window starting at (k - T) mod r;
+    counts of green junctions per corridor bin are kept for both
+    directions so each move only rescans the moved junction's candidates.
+    The first junction moves too (the same as shifting all the others at
+    once); offsets are returned relative to it.
+    """
+    n = len(greens_bins)
+    bins = np.arange(r)
+
+    def window(k, shift, g):
+        return (bins - k + shift) % r < g
+
+    out_cnt = sum(window(offsets[i], t_out[i], greens_bins[i]).astype(np.int64) for i in range(n))
+    in_cnt = sum(window(offsets[i], t_in[i], greens_bins[i]).astype(np.int64) for i in range(n))
+    # secondary score (how many junctions each candidate's green overlaps)
+    # keeps the search moving when no full band exists yet
+    tie = 1.0 / (2.0 * n * r * (1.0 + inbound_weight) + 1.0)
+
+    total = -1.0
+    for _ in range(passes):
+        moved = False
+        for i in range(n):
+            g = greens_bins[i]
+            out_others = out_cnt - window(offsets[i], t_out[i], g)
+            in_others = in_cnt - window(offsets[i], t_in[i], g)
+            b_out, o_sum = _window_scores(out_others == n - 1, out_others, g)
+            b_in, i_sum = _window_scores(in_others == n - 1, in_others, g)
+            # window start s <-> offset k = s + shift
+            score = (b_out + tie * o_sum)[(bins - t_out[i]) % r] + inbound_weight * (b_in + tie * i_sum)[(bins - t_in[i]) % r]
+            best = int(np.argmax(score))
+            if score[best] > score[offsets[i]]:
+                offsets[i] = best
+                moved = True
+            out_cnt = out_others + window(offsets[i], t_out[i], g)
+            in_cnt = in_others + window(offsets[i], t_in[i], g)
+        # stop once a full pass no longer widens the bands (or nothing moved)
+        prev, total = total, longest_run(out_cnt == n) + inbound_weight * longest_run(in_cnt == n)
+        if not moved or total <= prev:
+            break
+    return (offsets - offsets[0]) % r, int(longest_run(out_cnt == n)), int(longest_run(in_cnt == n))
+
+
+def _seeds(greens_bins: np.ndarray, t_out: np.ndarray, t_in: np.ndarray, r: int, count: int) -> List[np.ndarray]:
+    """
+    Up to ``count`` starting offsets for the descent: the perfect outbound
+    and inbound progressions, then, for evenly spaced delays c of the
+    inbound platoon behind the outbound one, every green centred between
+    the two arrivals.
+    """
+    seeds = [t_out % r, (t_in - t_in[0]) % r][:count]
+    shifts = count - len(seeds)
+    for c in range(0, r, -(-r // shifts)) if shifts > 0 else ():
+        gap = (t_in + c - t_out) % r
+        gap = np.where(gap > r // 2, gap - r, gap)          # the shorter way round
+        k = t_out + gap // 2 - greens_bins // 2
+        seeds.append((k - k[0]) % r)
+    return seeds
+
+
+def _search(greens_bins: np.ndarray, t_out: np.ndarray, t_in: np.ndarray, r: int, inbound_weight: float,
+            passes: int, max_seeds: int = 3) -> Tuple[np.ndarray, int, int]:
+    """
+    Best of the coordinate descents from the ``_seeds``, by outbound +
+    inbound_weight * inbound bandwidth (earlier seeds win ties). Stops as
+    soon as both bands are as wide as the narrowest green.
+    """
+    bound = (1.0 + inbound_weight) * int(greens_bins.min())
+    best = None
+    for seed in _seeds(greens_bins, t_out, t_in, r, max_seeds):
+        offsets, b_out, b_in = _descend(seed, greens_bins, t_out, t_in, r, inbound_weight, passes)
+        if best is None or b_out + inbound_weight * b_in > best[1] + inbound_weight * best[2]:
+            best = (offsets, b_out, b_in)
+        if best[1] + inbound_weight * best[2] >= bound:
+            break
+    return best
+
+
+def optimize_green_wave(junctions: Sequence[CorridorJunction], travel_out_s: Sequence[float],
+                        travel_in_s: Optional[Sequence[float]] = None, cycle_range=(60.0, 120.0),
+                        cycle_step_s: float = 5.0, resolution_s: float = 1.0, inbound_weight: float = 1.0,
+                        passes: int = 4, max_seeds: int = 3) -> GreenWave:
+    """
+    Common cycle, arterial greens and offsets for a chain of junctions.
+
+    :param travel_out_s: travel time from junction i to i+1 (N-1 values)
+    :param travel_in_s: travel time from junction i+1 back to i (defaults to travel_out_s)
+    :param cycle_range: candidate cycles (s); the lower end is raised to the
+        longest isolated Webster cycle so the critical junction is not starved
+    :param inbound_weight: weight of the inbound band relative to the outbound one
+    :param max_seeds: descents per candidate cycle (see ``_seeds``)
+    :return: the candidate with the best bandwidth per second of cycle
+    """
+    n = len(junctions)
+    if n == 0:
+        raise ValueError("need at least one junction")
+    travel_out = np.asarray(travel_out_s, dtype=float)
+    travel_in = travel_out if travel_in_s is None else np.asarray(travel_in_s, dtype=float)
+    if len(travel_out) != n - 1 or len(travel_in) != n - 1:
+        raise ValueError(f"need {n - 1} link travel times for {n} junctions")
+
+    c_web = max(webster_cycle(j.arterial_y + j.cross_y, j.lost_time_s) for j in junctions)
+    lo = min(max(cycle_range[0], c_web), cycle_range[1])
+    cycles = np.arange(lo, cycle_range[1] + 1e-9, cycle_step_s) if lo < cycle_range[1] else np.array([lo])
+
+    # arrival time at junction i for a platoon leaving the first (outbound)
+    # or the last (inbound) junction
+    arr_out = np.concatenate([[0.0], np.cumsum(travel_out)])
+    arr_in = np.concatenate([np.cumsum(travel_in[::-1])[::-1], [0.0]])
+
+    best = None
+    for cycle in cycles:
+        r = max(int(round(cycle / resolution_s)), 1)
+        greens = arterial_greens(junctions, cycle)
+        g_bins = np.minimum(np.round(greens / resolution_s).astype(np.int64), r)
+        if best is not None and (1.0 + inbound_weight) * g_bins.min() / r <= best[0] + 1e-12:
+            continue        # even bands as wide as the narrowest green would not beat the best
+        t_out = np.round(arr_out / resolution_s).astype(np.int64) % r
+        t_in = np.round(arr_in / resolution_s).astype(np.int64) % r
+        offsets, b_out, b_in = _search(g_bins, t_out, t_in, r, inbound_weight, passes, max_seeds)
+        score = (b_out + inbound_weight * b_in) / r
+        if best is None or score > best[0] + 1e-12:
+            best = (score, GreenWave(cycle_s=float(cycle), greens_s=greens, offsets_s=offsets * resolution_s,
+                                     bandwidth_out_s=b_out * resolution_s, bandwidth_in_s=b_in * resolution_s,
+                                     junction_ids=[j.id for j in junctions]))
+    return best[1]
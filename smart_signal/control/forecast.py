@@ -0,0 +1,228 @@
+# smart_signal/control/forecast.py
+"""
+Short-horizon arrival forecasting per lane, and a background planner that
+keeps the next cycle's splits ready before the phase changes.
+
+ArrivalForecaster is additive Holt-Winters on the live arrival_rate_vph:
+Holt (level + trend) smoothing of the rate minus its seasonal value, where
+the season is a day-of-week x time-of-day profile. The profile is a
+ring buffer of the last ``history_weeks`` weeks of per-bin mean rates,
+float32 (weeks, 7 * bins_per_day, lanes), so four weeks of 15-minute bins
+for 16 lanes is under 200 kB. Everything is vectorized over lanes.
+"""
+import math
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from smart_signal.types import LaneStat, Splits
+from smart_signal.runtime.slot import LatestSlot
+
+DAY_S = 86400
+
+
+class ArrivalForecaster:
+    def __init__(self, n_lanes: int, level_tau_s: float = 300.0, trend_tau_s: float = 1800.0,
+                 bin_s: int = 900, history_weeks: int = 4, profile_weight: float = 1.0,
+                 utc_offset_s: Optional[int] = None):
+        """
+        :param level_tau_s: time constant of the level EWMA
+        :param trend_tau_s: time constant of the trend EWMA
+        :param bin_s: profile bin width (must divide a day)
+        :param profile_weight: 0 = Holt only, 1 = full seasonal correction
+        :param utc_offset_s: local time offset for day/time-of-day bins (default: system local time)
+        """
+        if DAY_S % bin_s:
+            raise ValueError(f"bin_s must divide a day, got {bin_s}")
+        self.n_lanes = n_lanes
+        self.level_tau_s = level_tau_s
+        self.trend_tau_s = trend_tau_s
+        self.bin_s = bin_s
+        self.profile_weight = profile_weight
+        self.utc_offset_s = -time.timezone if utc_offset_s is None else utc_offset_s
+        self.bins_per_week = 7 * DAY_S // bin_s
+
+        self.level = np.zeros(n_lanes)
+        self.trend = np.zeros(n_lanes)            # vph per second
+        self._ts: Optional[float] = None
+        # ring buffer of per-bin means; NaN = no data for that week/bin
+        self.history = np.full((history_weeks, self.bins_per_week, n_lanes), np.nan, dtype=np.float32)
+        self._bin: Optional[int] = None          # absolute bin index being accumulated
+        self._sum = np.zeros(n_lanes)
+        self._count = 0
+        self._profiles = {}                      # weekly slot -> profile, until the next flush
+
+    def _abs_bin(self, ts: float) -> int:
+        # bins since the epoch in local time; the epoch is a Thursday, so
+        # shift by 3 days to make week slot 0 start on Monday
+        return int((ts + self.utc_offset_s + 3 * DAY_S) // self.bin_s)
+
+    def observe(self, ts: float, rates_vph: np.ndarray):
+        """
+        Feed one sample of per-lane arrival rates at wall-clock time ``ts``.
+        """
+        x = np.asarray(rates_vph, dtype=float)
+        ds = x - self.season(ts)
+        if self._ts is None:
+            self.level[:] = ds
+        elif ts > self._ts:
+            dt = ts - self._ts
+            pred = self.level + self.trend * dt
+            a = 1.0 - math.exp(-dt / self.level_tau_s)
+            new_level = pred + a * (ds - pred)
+            b = 1.0 - math.exp(-dt / self.trend_tau_s)
+            self.trend += b * ((new_level - self.level) / dt - self.trend)
+            self.level = new_level
+        self._ts = ts
+
+        b = self._abs_bin(ts)
+        if self._bin is not None and b != self._bin:
+            self._flush()
+        self._bin = b
+        self._sum += x
+        self._count += 1
+
+    def _flush(self):
+        if self._count:
+            week, slot = divmod(self._bin, self.bins_per_week)
+            self.history[week % len(self.history), slot] = self._sum / self._count
+            self._profiles.clear()
+        self._sum[:] = 0.0
+        self._count = 0
+
+    def profile(self, ts: float) -> np.ndarray:
+        """
+        (L,) profile rate at ``ts``: per-bin means over the stored weeks,
+        interpolated linearly between bin centres. Bins without data fall
+        back to the same time of day on any day, then NaN.
+        """
+        pos = (ts + self.utc_offset_s + 3 * DAY_S) / self.bin_s - 0.5
+        k = math.floor(pos)
+        f = pos - k
+        lo, hi = self._slot_profile(k % self.bins_per_week), self._slot_profile((k + 1) % self.bins_per_week)
+        out = (1.0 - f) * lo + f * hi
+        return np.where(np.isnan(lo), hi, np.where(np.isnan(hi), lo, out))
+
+    def _slot_profile(self, slot: int) -> np.ndarray:
+        out = self._profiles.get(slot)
+        if out is None:
+            out = self._profiles[slot] = self._profile(slot)
+        return out
+
+    def _profile(self, slot: int) -> np.ndarray:
+        h = self.history[:, slot]
+        seen = ~np.isnan(h)
+        out = np.full(self.n_lanes, np.nan)
+        n = seen.sum(axis=0)
+        np.divide(np.where(seen, h, 0.0).sum(axis=0), n, out=out, where=n > 0)
+        if (n == 0).any():
+            per_day = self.bins_per_week // 7
+            day = self.history[:, slot % per_day::per_day].reshape(-1, self.n_lanes)
+            d_seen = ~np.isnan(day)
+            d_n = d_seen.sum(axis=0)
+            fill = (n == 0) & (d_n > 0)
+            out[fill] = np.where(d_seen, day, 0.0).sum(axis=0)[fill] / d_n[fill]
+        return out
+
+    def season(self, ts: float) -> np.ndarray:
+        """
+        (L,) seasonal component at ``ts`` (0 where the profile has no data yet).
+        """
+        return self.profile_weight * np.nan_to_num(self.profile(ts))
+
+    def forecast(self, ts: float, horizon_s: float) -> np.ndarray:
+        """
+        (L,) expected arrival rate (vph) at ``ts + horizon_s``: level +
+        trend * horizon + the season then. Lanes whose profile has no data
+        for the target time keep the current season.
+        """
+        p = self.profile(ts + horizon_s)
+        season = np.where(np.isnan(p), self.season(ts), self.profile_weight * np.nan_to_num(p))
+        return np.maximum(self.level + self.trend * horizon_s + season, 0.0)
+
+    def save(self, path: str):
+        """
+        Persist the history, the Holt state and the bin still being
+        accumulated, so a restart within that bin keeps its samples.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(path, history=self.history, level=self.level, trend=self.trend,
+                            ts=np.nan if self._ts is None else self._ts,
+                            bin=-1 if self._bin is None else self._bin, sum=self._sum, count=self._count)
+
+    def load(self, path: str):
+        """
+        Restore a saved history (e.g. after a restart); the lane count must match.
+        The partial bin is flushed by the first observation outside it.
+        """
+        with np.load(path) as z:
+            if z["history"].shape[1:] != self.history.shape[1:]:
+                raise ValueError(f"history shape {z['history'].shape} does not match {self.history.shape}")
+            w = min(len(self.history), len(z["history"]))
+            self.history[:w] = z["history"][:w]
+            self.level[:] = z["level"]
+            self.trend[:] = z["trend"]
+            self._ts = None if np.isnan(z["ts"]) else float(z["ts"])
+            self._bin = None if z["bin"] < 0 else int(z["bin"])
+            self._sum[:] = z["sum"]
+            self._count = int(z["count"])
+            self._profiles.clear()
+
+
+def forecast_lane_stats(lane_stats: List[LaneStat], rates_vph: np.ndarray, horizon_s: float) -> List[LaneStat]:
+    """
+    LaneStats as expected ``horizon_s`` ahead: forecast arrival rates, and
+    queues grown by the forecast arrivals (departures are not modelled, so
+    this is the queue the next green starts with if the lane stays red).
+    """
+    out = []
+    for ls, r in zip(lane_stats, np.asarray(rates_vph, dtype=float).tolist()):
+        q = ls.queue_len + int(round(r * horizon_s / 3600.0))
+        out.append(ls.model_copy(update={"arrival_rate_vph": r, "queue_len": q}))
+    return out
+
+
+class SplitPlanner:
+    """
+    Background thread that recomputes the next cycle's splits every
+    ``interval_s`` with ``plan_fn()`` and publishes them to ``slot``. The
+    switch path then only reads ``latest``: no planning on it.
+    """
+    def __init__(self, plan_fn: Callable[[], Optional[Splits]], interval_s: float = 1.0):
+        self.plan_fn = plan_fn
+        self.interval_s = interval_s
+        self.slot = LatestSlot()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def latest(self) -> Optional[Splits]:
+        return self.slot.value
+
+    def plan_now(self) -> Optional[Splits]:
+        splits = self.plan_fn()
+        if splits is not None:
+            self.slot.publish(splits)
+        return splits
+
+    def _loop(self):
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            self.plan_now()
+            deadline = max(deadline + self.interval_s, time.monotonic())
+            self._stop.wait(deadline - time.monotonic())
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="split-planner", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
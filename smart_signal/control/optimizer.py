@@ -1,4 +1,5 @@
 from typing import List
+import numpy as np
 from smart_signal.types import LaneStat, Splits, EmergencyEvent
 
 class SignalOptimizer:
@@ -39,4 +40,21 @@ class SignalOptimizer:
                 splits.greens_s[lane_id] = self.max_green_s
             else:
                 splits.greens_s[lane_id] = self.min_green_s
-        return splits
\ No newline at end of file
+        return splits
+
+
+def proportional_greens(queue_len: np.ndarray, junction: np.ndarray, n_junctions: int,
+                        min_green_s, max_green_s, cycle_s: float = 60) -> np.ndarray:
+    """
+    SignalOptimizer.compute_splits for the lanes of many junctions at once:
+    ``junction`` (L,) is each lane's junction index, ``min_green_s`` and
+    ``max_green_s`` are scalars or (J,) arrays. Returns the (L,) greens.
+    """
+    q = np.asarray(queue_len, dtype=float)
+    lo = np.broadcast_to(np.asarray(min_green_s, dtype=float), (n_junctions,))[junction]
+    hi = np.broadcast_to(np.asarray(max_green_s, dtype=float), (n_junctions,))[junction]
+    total = np.bincount(junction, weights=q, minlength=n_junctions)[junction]
+    share = np.divide(q, total, out=np.zeros_like(q), where=total > 0)
+    greens = np.maximum(lo, np.minimum(hi, share * cycle_s))
+    # no traffic at a junction: equal split
+    return np.where(total > 0, greens, np.maximum(lo, (hi + lo) / 2))
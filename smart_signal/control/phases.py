@@ -0,0 +1,318 @@
+# smart_signal/control/phases.py
+"""
+Max-pressure signal control over a phase/movement graph.
+
+A movement is an (approach_id, movement) pair, e.g. ("N", "left"). Each
+Phase serves a set of movements; PhaseGraph turns that into a (P, M)
+incidence matrix so the pressure of every phase is one matrix-vector
+product over per-movement queues:
+
+    pressure = incidence @ (upstream - downstream)
+
+MaxPressureController runs the green / yellow / all-red cycle on top of it:
+after min_green_s it moves to the highest-pressure phase if that beats the
+current one strictly, gives up the green at max_green_s if anything else is
+waiting, and forces a phase that has been passed over fairness_max_skip
+times in a row.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from smart_signal.types import Phase, LaneStat, ControllerAction
+
+GREEN, YELLOW, ALL_RED = 0, 1, 2
+
+
+class PhaseGraph:
+    def __init__(self, phases: Sequence[Phase]):
+        if not phases:
+            raise ValueError("need at least one phase")
+        self.phases = list(phases)
+        self.phase_ids = [p.id for p in self.phases]
+        self.movements: List[Tuple[str, str]] = []
+        self.movement_index: Dict[Tuple[str, str], int] = {}
+        for p in self.phases:
+            for mv in p.movements:
+                mv = tuple(mv)
+                if mv not in self.movement_index:
+                    self.movement_index[mv] = len(self.movements)
+                    self.movements.append(mv)
+        self.incidence = np.zeros((len(self.phases), len(self.movements)))
+        for i, p in enumerate(self.phases):
+            for mv in p.movements:
+                self.incidence[i, self.movement_index[tuple(mv)]] = 1.0
+
+    @classmethod
+    def from_config(cls, phases_cfg: Sequence[dict]) -> "PhaseGraph":
+        """
+        From a control.phases block: [{id: "NS", movements: [[N, through], ...]}, ...].
+        """
+        return cls([Phase(id=p["id"], movements=[tuple(mv) for mv in p["movements"]],
+                          protected=p.get("protected", True)) for p in phases_cfg])
+
+    def lane_index(self, approaches: Sequence[str], movements: Sequence[str]) -> np.ndarray:
+        """
+        Movement column of each lane (-1 for lanes no phase serves).
+        Compute once per lane layout and reuse with ``movement_queues``.
+        """
+        return np.array([self.movement_index.get((a, m), -1) for a, m in zip(approaches, movements)],
+                        dtype=np.int64)
+
+    def movement_queues(self, lane_index: np.ndarray, queues: np.ndarray) -> np.ndarray:
+        """
+        Per-movement totals (M,) of per-lane ``queues`` laid out like ``lane_index``.
+        """
+        ok = lane_index >= 0
+        return np.bincount(lane_index[ok], weights=np.asarray(queues, dtype=float)[ok],
+                           minlength=len(self.movements))
+
+    def pressure(self, upstream: np.ndarray, downstream: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        (P,) pressure of every phase from (M,) upstream and downstream
+        queues. Without downstream information the exits count as empty.
+        """
+        w = upstream if downstream is None else upstream - downstream
+        return self.incidence @ w
+
+
+class MaxPressureController:
+    def __init__(self, graph: PhaseGraph, min_green_s: float = 7, max_green_s: float = 60,
+                 yellow_s: float = 3, all_red_s: float = 1, fairness_max_skip: int = 3):
+        self.graph = graph
+        self.min_green_s = min_green_s
+        self.max_green_s = max_green_s
+        self.yellow_s = yellow_s
+        self.all_red_s = all_red_s
+        self.fairness_max_skip = fairness_max_skip
+
+        self.current = 0                 # phase holding (or clearing) the right of way
+        self.pending = 0                 # phase that gets green after the clearance
+        self.interval = GREEN
+        self.since: Optional[float] = None
+        # consecutive switches that went to another phase while this one had demand
+        self.skips = np.zeros(len(graph.phases), dtype=np.int64)
+        self._lane_index: Dict[tuple, np.ndarray] = {}
+
+    def _choose(self, pressure: np.ndarray, allow_current: bool) -> int:
+        waiting = pressure > 0
+        if self.fairness_max_skip > 0:
+            starved = waiting & (self.skips >= self.fairness_max_skip)
+            if starved.any():
+                return int(np.argmax(np.where(starved, self.skips, -1)))
+        if not allow_current:
+            pressure = pressure.copy()
+            pressure[self.current] = -np.inf
+            return int(np.argmax(pressure))
+        # only a strictly higher pressure takes the green away: on a tie
+        # (no demand at all, say) a switch would just cost yellow + all-red
+        best = int(np.argmax(pressure))
+        return best if pressure[best] > pressure[self.current] else self.current
+
+    def tick(self, t: float, pressure: np.ndarray) -> int:
+        """
+        Advance the controller to time ``t`` given the (P,) phase pressures.
+        Returns the phase index that has (or is about to get) the green.
+        """
+        if self.since is None:
+            self.since = t
+        elapsed = t - self.since
+
+        if self.interval == YELLOW:
+            if elapsed >= self.yellow_s:
+                self.interval, self.since, elapsed = ALL_RED, self.since + self.yellow_s, elapsed - self.yellow_s
+            else:
+                return self.pending
+        if self.interval == ALL_RED:
+            if elapsed >= self.all_red_s:
+                self.current, self.interval, self.since = self.pending, GREEN, self.since + self.all_red_s
+            return self.pending
+
+        if elapsed < self.min_green_s:
+            return self.current
+
+        nxt = self._choose(pressure, allow_current=True)
+        if nxt == self.current and elapsed >= self.max_green_s:
+            other = self._choose(pressure, allow_current=False)
+            if pressure[other] > 0:
+                nxt = other
+        if nxt == self.current:
+            return self.current
+
+        # switch: every other phase with demand was passed over once more
+        passed = pressure > 0
+        passed[nxt] = False
+        self.skips[passed] += 1
+        self.skips[nxt] = 0
+        self.pending, self.interval, self.since = nxt, YELLOW, t
+        return nxt
+
+    def action(self, t: float) -> ControllerAction:
+        """
+        Current state as a ControllerAction: ``hold`` with the green left
+        before max_green_s, or ``next`` with the clearance time left.
+        """
+        elapsed = 0.0 if self.since is None else t - self.since
+        if self.interval == GREEN:
+            return ControllerAction(phase_id=self.graph.phase_ids[self.current], action="hold",
+                                    duration_s=max(self.max_green_s - elapsed, 0.0))
+        left = self.all_red_s - elapsed if self.interval == ALL_RED else self.yellow_s + self.all_red_s - elapsed
+        return ControllerAction(phase_id=self.graph.phase_ids[self.pending], action="next",
+                                duration_s=max(left, 0.0))
+
+    def signal_state(self, approach_ids: Sequence[str]) -> str:
+        """
+        Indication ("green" | "yellow" | "red") shown to ``approach_ids``:
+        green or yellow while the phase holding the right of way serves any
+        of their movements, red otherwise (and during all-red).
+        """
+        if self.interval == ALL_RED:
+            return "red"
+        served = {a for a, _ in self.graph.phases[self.current].movements}
+        if served.isdisjoint(approach_ids):
+            return "red"
+        return "green" if self.interval == GREEN else "yellow"
+
+    def step(self, t: float, lane_stats: List[LaneStat],
+             downstream: Optional[np.ndarray] = None) -> ControllerAction:
+        """
+        One control tick from LaneStats (upstream queue = queue_len per
+        movement). ``downstream`` is an optional (M,) array of exit queues.
+        """
+        key = tuple((ls.approach_id, ls.movement) for ls in lane_stats)
+        idx = self._lane_index.get(key)
+        if idx is None:
+            idx = self._lane_index[key] = self.graph.lane_index([k[0] for k in key], [k[1] for k in key])
+        up = self.graph.movement_queues(idx, [ls.queue_len for ls in lane_stats])
+        self.tick(t, self.graph.pressure(up, downstream))
+        return self.action(t)
+
+
+class BatchedMaxPressure:
+    """
+    MaxPressureController for many junctions at once. Phases of all
+    junctions live in one padded (J, P) table and the per-junction state
+    (current/pending phase, interval, start time, skip counters) in arrays,
+    so a control tick is a handful of numpy operations regardless of J.
+    Decisions are identical to running one MaxPressureController per
+    junction with the same timings.
+    """
+    def __init__(self, graphs: Sequence[PhaseGraph], min_green_s, max_green_s, yellow_s, all_red_s,
+                 fairness_max_skip):
+        self.graphs = list(graphs)
+        j = len(self.graphs)
+        self.n_phases = np.array([len(g.phases) for g in self.graphs], dtype=np.int64)
+        p = int(self.n_phases.max()) if j else 0
+        self.shape = (j, p)
+        self.phase_ids = [g.phase_ids for g in self.graphs]
+
+        # movements of all junctions stacked; incidence as (cell, movement) pairs
+        self.movement_offset = np.concatenate([[0], np.cumsum([len(g.movements) for g in self.graphs])])
+        cells, cols = [], []
+        for ji, g in enumerate(self.graphs):
+            pi, mi = np.nonzero(g.incidence)
+            cells.append(ji * p + pi)
+            cols.append(self.movement_offset[ji] + mi)
+        self._cell = np.concatenate(cells).astype(np.int64) if cells else np.zeros(0, np.int64)
+        self._col = np.concatenate(cols).astype(np.int64) if cols else np.zeros(0, np.int64)
+        self._pad = np.arange(p)[None, :] >= self.n_phases[:, None]
+
+        def per_junction(v, dtype=float):
+            return np.broadcast_to(np.asarray(v, dtype=dtype), (j,)).copy()
+        self.min_green_s = per_junction(min_green_s)
+        self.max_green_s = per_junction(max_green_s)
+        self.yellow_s = per_junction(yellow_s)
+        self.all_red_s = per_junction(all_red_s)
+        self.fairness_max_skip = per_junction(fairness_max_skip, np.int64)
+
+        self.current = np.zeros(j, dtype=np.int64)
+        self.pending = np.zeros(j, dtype=np.int64)
+        self.interval = np.full(j, GREEN, dtype=np.int8)
+        self.since = np.full(j, np.nan)
+        self.skips = np.zeros((j, p), dtype=np.int64)
+
+    @property
+    def n_movements(self) -> int:
+        return int(self.movement_offset[-1])
+
+    def pressure(self, upstream: np.ndarray, downstream: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        (J, P) phase pressures from stacked (M,) movement queues; padding
+        cells are -inf.
+        """
+        w = upstream if downstream is None else upstream - downstream
+        j, p = self.shape
+        out = np.bincount(self._cell, weights=w[self._col], minlength=j * p).reshape(j, p)
+        out[self._pad] = -np.inf
+        return out
+
+    def tick(self, t: float, pressure: np.ndarray) -> np.ndarray:
+        """
+        Advance every junction to time ``t``; returns the (J,) phase index
+        each one has (or is about to get) the green for.
+        """
+        rows = np.arange(self.shape[0])
+        self.since[np.isnan(self.since)] = t
+        elapsed = t - self.since
+
+        m = (self.interval == YELLOW) & (elapsed >= self.yellow_s)
+        self.interval[m] = ALL_RED
+        self.since[m] += self.yellow_s[m]
+        elapsed[m] -= self.yellow_s[m]
+        m = (self.interval == ALL_RED) & (elapsed >= self.all_red_s)
+        self.current[m] = self.pending[m]
+        self.interval[m] = GREEN
+        self.since[m] += self.all_red_s[m]
+
+        decide = (self.interval == GREEN) & ~m & (elapsed >= self.min_green_s)
+        if decide.any():
+            waiting = pressure > 0
+            starved = waiting & (self.skips >= self.fairness_max_skip[:, None]) & (self.fairness_max_skip[:, None] > 0)
+            # same rule as MaxPressureController._choose: ties keep the current green
+            best = np.argmax(pressure, axis=1)
+            best = np.where(pressure[rows, best] > pressure[rows, self.current], best, self.current)
+            nxt = np.where(starved.any(axis=1), np.argmax(np.where(starved, self.skips, -1), axis=1), best)
+            others = pressure.copy()
+            others[rows, self.current] = -np.inf
+            other = np.argmax(others, axis=1)
+            force = (nxt == self.current) & (elapsed >= self.max_green_s) & (others[rows, other] > 0)
+            nxt = np.where(force, other, nxt)
+
+            switch = decide & (nxt != self.current)
+            if switch.any():
+                s = np.flatnonzero(switch)
+                passed = waiting[s]
+                passed[np.arange(len(s)), nxt[s]] = False
+                self.skips[s] += passed
+                self.skips[s, nxt[s]] = 0
+                self.pending[s] = nxt[s]
+                self.interval[s] = YELLOW
+                self.since[s] = t
+        return np.where(self.interval == GREEN, self.current, self.pending)
+
+    def action(self, j: int, t: float) -> ControllerAction:
+        """
+        ControllerAction of junction ``j`` (same meaning as MaxPressureController.action).
+        """
+        elapsed = 0.0 if np.isnan(self.since[j]) else t - self.since[j]
+        ids = self.phase_ids[j]
+        if self.interval[j] == GREEN:
+            return ControllerAction(phase_id=ids[self.current[j]], action="hold",
+                                    duration_s=max(float(self.max_green_s[j] - elapsed), 0.0))
+        left = self.all_red_s[j] - elapsed
+        if self.interval[j] == YELLOW:
+            left += self.yellow_s[j]
+        return ControllerAction(phase_id=ids[self.pending[j]], action="next", duration_s=max(float(left), 0.0))
+
+    def actions(self, t: float) -> List[ControllerAction]:
+        """
+        ControllerAction of every junction, computed in one pass.
+        """
+        elapsed = np.where(np.isnan(self.since), 0.0, t - self.since)
+        green = self.interval == GREEN
+        left = np.where(green, self.max_green_s - elapsed,
+                        self.all_red_s - elapsed + np.where(self.interval == YELLOW, self.yellow_s, 0.0))
+        phase = np.where(green, self.current, self.pending)
+        return [ControllerAction(phase_id=ids[p], action="hold" if g else "next", duration_s=d)
+                for ids, p, g, d in zip(self.phase_ids, phase.tolist(), green.tolist(),
+                                        np.maximum(left, 0.0).tolist())]
@@ -0,0 +1,49 @@
+# smart_signal/perception/assignment.py
+from typing import List, Tuple
+import numpy as np
+
+def greedy_assign(iou: np.ndarray, iou_thresh: float) -> List[Tuple[int, int]]:
+    """
+    Greedy matching on an (N,M) IoU matrix: take pairs in order of best IoU,
+    skipping rows/cols already used. Ties resolve by (row, col) like the old
+    sorted-list version.
+    """
+    if iou.size == 0:
+        return []
+    cost = 1.0 - iou.ravel()
+    order = np.argsort(cost, kind="stable")
+    order = order[cost[order] <= 1.0 - iou_thresh]
+    rows, cols = np.divmod(order, iou.shape[1])
+
+    used_r = np.zeros(iou.shape[0], dtype=bool)
+    used_c = np.zeros(iou.shape[1], dtype=bool)
+    limit = min(iou.shape)
+    pairs = []
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        if used_r[i] or used_c[j]:
+            continue
+        used_r[i] = used_c[j] = True
+        pairs.append((i, j))
+        if len(pairs) == limit:
+            break
+    return pairs
+
+def hungarian_assign(iou: np.ndarray, iou_thresh: float) -> List[Tuple[int, int]]:
+    """
+    Globally optimal matching (max total IoU) via scipy's linear_sum_assignment.
+    Pairs below the threshold are dropped afterwards.
+    """
+    if iou.size == 0:
+        return []
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError as e:
+        raise RuntimeError("Hungarian assignment requires scipy (pip install scipy)") from e
+    rows, cols = linear_sum_assignment(1.0 - iou)
+    keep = iou[rows, cols] >= iou_thresh
+    return list(zip(rows[keep].tolist(), cols[keep].tolist()))
+
+ASSIGNERS = {
+    "greedy": greedy_assign,
+    "hungarian": hungarian_assign,
+}
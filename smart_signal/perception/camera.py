@@ -1,24 +1,59 @@
 import cv2
-from typing import Generator, Optional
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Generator, Optional
+import threading
 import time
 
+@dataclass
+class StreamStats:
+    frames_decoded: int = 0
+    frames_delivered: int = 0
+    frames_dropped: int = 0
+    decode_ms_last: float = 0.0
+    decode_ms_avg: float = 0.0  # EWMA
+
 class CameraStream:
     """
     Handles video capture from file or RTSP/USB camera.
     Yields frames with timestamps and frame IDs.
+
+    With ``threaded=True`` frames are decoded on a background thread into a
+    bounded ring buffer, so the consumer always gets the freshest frames
+    instead of a growing backlog. ``drop_policy`` decides what goes when the
+    buffer is full: "oldest" (keep the newest frames) or "newest" (keep what
+    is queued, discard the incoming frame).
     """
 
-    def __init__(self, source: str, fps: Optional[int] = None, warmup_time: float = 1.0):
+    DROP_POLICIES = ("oldest", "newest")
+
+    def __init__(self, source: str, fps: Optional[int] = None, warmup_time: float = 1.0,
+                 threaded: bool = False, buffer_size: int = 1, drop_policy: str = "oldest"):
         """
         :param source: Path to video file or RTSP/USB camera index (e.g., 0, 1)
         :param fps: Target FPS (None = use source FPS)
         :param warmup_time: Seconds to wait before starting capture
+        :param threaded: Decode on a background thread into a ring buffer
+        :param buffer_size: Ring buffer capacity in frames (threaded mode)
+        :param drop_policy: "oldest" or "newest" (threaded mode)
         """
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"drop_policy must be one of {self.DROP_POLICIES}, got {drop_policy!r}")
         self.source = source
         self.fps = fps
         self.cap = None
         self.frame_id = 0
         self.warmup_time = warmup_time
+        self.threaded = threaded
+        self.buffer_size = max(1, int(buffer_size))
+        self.drop_policy = drop_policy
+        self.stats = StreamStats()
+
+        self._buf: Deque[tuple] = deque(maxlen=self.buffer_size)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._eof = False
 
     def open(self):
         self.cap = cv2.VideoCapture(self.source)
@@ -28,26 +63,119 @@ class CameraStream:
             self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 15
         time.sleep(self.warmup_time)
 
+    def _read(self, cap):
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        dt_ms = (time.perf_counter() - t0) * 1e3
+        if ret:
+            self.frame_id += 1
+            s = self.stats
+            s.frames_decoded += 1
+            s.decode_ms_last = dt_ms
+            s.decode_ms_avg = dt_ms if s.frames_decoded == 1 else 0.9 * s.decode_ms_avg + 0.1 * dt_ms
+        return ret, frame
+
+    def _pace(self, deadline: float) -> float:
+        """
+        Sleep until ``deadline`` and return the next one. If we are already
+        more than a period late, re-anchor instead of bursting to catch up.
+        """
+        period = 1.0 / self.fps
+        now = time.monotonic()
+        if deadline > now:
+            time.sleep(deadline - now)
+            return deadline + period
+        return max(deadline + period, now)
+
     def frames(self) -> Generator[tuple, None, None]:
         """
         Generator yielding (frame_id, timestamp, frame_bgr)
         """
         if self.cap is None:
             self.open()
+        if self.threaded:
+            yield from self._threaded_frames()
+            return
 
+        deadline = time.monotonic()
         while True:
-            ret, frame = self.cap.read()
+            ret, frame = self._read(self.cap)
             if not ret:
                 break
             ts = time.time()
-            self.frame_id += 1
+            self.stats.frames_delivered += 1
             yield self.frame_id, ts, frame
 
             # Optional: throttle to target FPS
             if self.fps:
-                time.sleep(1.0 / self.fps)
+                deadline = self._pace(deadline)
+
+    # ---------- threaded capture ----------
+    def start(self):
+        if self._thread is not None:
+            return
+        if self.cap is None:
+            self.open()
+        self._stop.clear()
+        self._eof = False
+        self._thread = threading.Thread(target=self._capture_loop, name=f"capture-{self.source}", daemon=True)
+        self._thread.start()
+
+    def _capture_loop(self):
+        # The capture belongs to this thread while it runs and is released
+        # here, so release() never frees it under a cap.read() in flight
+        cap = self.cap
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            ret, frame = self._read(cap)
+            if not ret:
+                break
+            item = (self.frame_id, time.time(), frame)
+            with self._cond:
+                if len(self._buf) == self.buffer_size:
+                    self.stats.frames_dropped += 1
+                    if self.drop_policy == "newest":
+                        item = None
+                if item is not None:
+                    self._buf.append(item)  # deque(maxlen) evicts the oldest
+                self._cond.notify()
+            if self.fps:
+                deadline = self._pace(deadline)
+        with self._cond:
+            self._eof = True
+            self._cond.notify_all()
+        cap.release()
+
+    def read(self, timeout: Optional[float] = None) -> Optional[tuple]:
+        """
+        Pop the oldest buffered (frame_id, timestamp, frame), waiting up to
+        ``timeout``. None on timeout or end of stream.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._buf or self._eof, timeout)
+            if not self._buf:
+                return None
+            self.stats.frames_delivered += 1
+            return self._buf.popleft()
+
+    def _threaded_frames(self) -> Generator[tuple, None, None]:
+        self.start()
+        while True:
+            item = self.read()
+            if item is None:
+                break
+            yield item
 
     def release(self):
-        if self.cap:
+        """
+        Stop capturing and free the source. With a capture thread the thread
+        releases it on exit, which may be after the 2 s join here if it is
+        blocked in a read (e.g. a stalled RTSP stream).
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        elif self.cap:
             self.cap.release()
-            self.cap = None
\ No newline at end of file
+        self.cap = None
@@ -1,7 +1,30 @@
 import random
-from typing import List
-from smart_signal.types import Detection
-from ultralytics import YOLO
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from smart_signal.types import Detection, DetectionBatch, CLASS_CODE, approach_code
+import cv2
+from shapely.ops import unary_union
+from smart_signal.utils.geometry import nms
+try:
+    from ultralytics import YOLO
+except ImportError:  # only YOLODetector needs it
+    YOLO = None
+try:
+    import onnxruntime as ort
+except ImportError:  # only ONNXDetector needs it
+    ort = None
+
+# COCO class id -> label, for the classes we care about
+COCO_CLASS_MAP = {
+    0: "person",
+    1: "bicycle",
+    2: "car",
+    3: "motorcycle",
+    5: "bus",
+    7: "truck"
+}
 
 class StubDetector:
     """
@@ -12,10 +35,10 @@ class StubDetector:
         self.classes = classes or ["car", "bus", "truck", "motorcycle"]
         self.conf_thresh = conf_thresh
 
-    def infer(self, frame, frame_id: int, approach_id: str) -> List[Detection]:
+    def detect(self, frame, frame_id: int, approach_id: str) -> DetectionBatch:
         h, w, _ = frame.shape
-        detections = []
         num_vehicles = random.randint(0, 5)
+        boxes, scores, codes = [], [], []
         for _ in range(num_vehicles):
             x1 = random.randint(0, w // 2)
             y1 = random.randint(0, h // 2)
@@ -23,16 +46,19 @@ class StubDetector:
             y2 = y1 + random.randint(30, 100)
             cls = random.choice(self.classes)
             score = round(random.uniform(self.conf_thresh, 1.0), 2)
-            detections.append(
-                Detection(
-                    bbox=(x1, y1, x2, y2),
-                    score=score,
-                    cls=cls,
-                    frame_id=frame_id,
-                    approach_id=approach_id
-                )
-            )
-        return detections
+            boxes.append((x1, y1, x2, y2))
+            scores.append(score)
+            codes.append(CLASS_CODE[cls])
+        return DetectionBatch.from_arrays(boxes, scores, codes, approach_code(approach_id), frame_id)
+
+    def infer(self, frame, frame_id: int, approach_id: str) -> List[Detection]:
+        return self.detect(frame, frame_id, approach_id).to_models()
+
+    def detect_batch(self, frames, frame_ids: Sequence[int], approach_ids: Sequence[str]) -> List[DetectionBatch]:
+        return [self.detect(f, fid, aid) for f, fid, aid in zip(frames, frame_ids, approach_ids)]
+
+    def infer_batch(self, frames, frame_ids: Sequence[int], approach_ids: Sequence[str]) -> List[List[Detection]]:
+        return [b.to_models() for b in self.detect_batch(frames, frame_ids, approach_ids)]
 
 
 class YOLODetector:
@@ -40,41 +66,345 @@ class YOLODetector:
     Real YOLOv8 detector for actual vehicle detection.
     """
     def __init__(self, model_path="yolov8n.pt", conf_thresh=0.3):
+        if YOLO is None:
+            raise RuntimeError("ultralytics is required for YOLODetector; use StubDetector without it")
         self.model = YOLO(model_path)
         self.conf_thresh = conf_thresh
-        self.class_map = {
-            0: "person",
-            1: "bicycle",
-            2: "car",
-            3: "motorcycle",
-            5: "bus",
-            7: "truck"
-        }
+        self.class_map = dict(COCO_CLASS_MAP)
+        self.class_lut = build_class_lut(self.class_map)
 
-    def infer(self, frame, frame_id: int, approach_id: str) -> List[Detection]:
+    def detect(self, frame, frame_id: int, approach_id: str) -> DetectionBatch:
         results = self.model.predict(frame, conf=self.conf_thresh, verbose=False)
-        detections = []
-        for r in results:
-            for box in r.boxes:
-                cls_id = int(box.cls)
-                if cls_id not in self.class_map:
-                    continue
-
-                # Map YOLO label to our allowed types
-                label = self.class_map[cls_id]
-                if label == "person":
-                    label = "pedestrian"
-
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                score = float(box.conf)
-
-                detections.append(
-                    Detection(
-                        bbox=(x1, y1, x2, y2),
-                        score=score,
-                        cls=label,
-                        frame_id=frame_id,
-                        approach_id=approach_id
-                    )
-                )
-        return detections
\ No newline at end of file
+        return DetectionBatch.concat(self._to_batch(r, frame_id, approach_id) for r in results)
+
+    def infer(self, frame, frame_id: int, approach_id: str) -> List[Detection]:
+        return self.detect(frame, frame_id, approach_id).to_models()
+
+    def detect_batch(self, frames, frame_ids: Sequence[int], approach_ids: Sequence[str]) -> List[DetectionBatch]:
+        """
+        One forward pass over several frames; results come back in input order.
+        """
+        if not frames:
+            return []
+        results = self.model.predict(list(frames), conf=self.conf_thresh, verbose=False)
+        return [self._to_batch(r, fid, aid) for r, fid, aid in zip(results, frame_ids, approach_ids)]
+
+    def infer_batch(self, frames, frame_ids: Sequence[int], approach_ids: Sequence[str]) -> List[List[Detection]]:
+        return [b.to_models() for b in self.detect_batch(frames, frame_ids, approach_ids)]
+
+    def _to_batch(self, r, frame_id: int, approach_id: str) -> DetectionBatch:
+        # One device->host copy per column, then filter/remap with the LUT
+        boxes = r.boxes
+        xyxy = _to_numpy(boxes.xyxy).reshape(-1, 4)
+        conf = _to_numpy(boxes.conf).reshape(-1)
+        cls_ids = _to_numpy(boxes.cls).reshape(-1).astype(np.int64)
+        codes = self.class_lut[np.clip(cls_ids, 0, len(self.class_lut) - 1)]
+        codes[(cls_ids < 0) | (cls_ids >= len(self.class_lut))] = -1
+        keep = codes >= 0
+        return DetectionBatch.from_arrays(xyxy[keep], conf[keep], codes[keep], approach_code(approach_id), frame_id)
+
+
+class ONNXDetector:
+    """
+    YOLOv8 exported to ONNX, run through ONNX Runtime on CPU. No torch or
+    ultralytics at runtime: letterboxing, decoding and class-aware NMS are
+    done here with numpy, matching YOLODetector's output.
+
+    Frames are processed in fixed-size batches (short batches are padded)
+    so static-shape exports work. ``providers`` can put e.g. the OpenVINO
+    execution provider in front of the CPU one.
+    """
+    def __init__(self, model_path="yolov8n.onnx", conf_thresh=0.3, iou_thresh=0.45, input_size=640,
+                 batch_size=1, intra_op_threads=0, inter_op_threads=0, providers=None, max_det=300):
+        if ort is None:
+            raise RuntimeError("onnxruntime is required for ONNXDetector; pip install onnxruntime")
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.intra_op_num_threads = intra_op_threads      # 0 = let ORT decide
+        opts.inter_op_num_threads = inter_op_threads
+        if inter_op_threads > 1:
+            opts.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        self.session = ort.InferenceSession(model_path, sess_options=opts,
+                                            providers=providers or ["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        # A static batch dimension in the export wins over the configured one
+        self.batch_size = inp.shape[0] if isinstance(inp.shape[0], int) else batch_size
+        # ... and so does a static input size; letterboxing is square only
+        h, w = inp.shape[2:4]
+        if isinstance(h, int) and isinstance(w, int):
+            if h != w:
+                raise ValueError(f"ONNX input must be square for letterboxing, got {h}x{w}")
+            input_size = h
+        self.input_size = input_size
+        self.conf_thresh = conf_thresh
+        self.iou_thresh = iou_thresh
+        self.max_det = max_det
+        self.class_map = dict(COCO_CLASS_MAP)
+        self.class_lut = build_class_lut(self.class_map)
+
+    def _preprocess(self, frames):
+        n = len(frames)
+        blob = np.full((self.batch_size, 3, self.input_size, self.input_size), 114 / 255.0, dtype=np.float32)
+        metas = []
+        for i, f in enumerate(frames):
+            img, scale, pad = letterbox(f, self.input_size)
+            blob[i] = img[:, :, ::-1].transpose(2, 0, 1) * np.float32(1 / 255.0)   # BGR->RGB, HWC->CHW
+            metas.append((scale, pad, f.shape[:2]))
+        return blob, metas[:n]
+
+    def _postprocess(self, pred, meta, frame_id, approach_id) -> DetectionBatch:
+        # pred: (4 + num_classes, anchors) of [cx, cy, w, h, class scores...]
+        p = pred.T
+        cls_ids = p[:, 4:].argmax(axis=1)
+        conf = p[np.arange(len(p)), 4 + cls_ids]
+        m = conf >= self.conf_thresh
+        p, cls_ids, conf = p[m], cls_ids[m], conf[m]
+        xyxy = np.empty((len(p), 4), dtype=np.float32)
+        xyxy[:, :2] = p[:, :2] - p[:, 2:4] / 2
+        xyxy[:, 2:] = p[:, :2] + p[:, 2:4] / 2
+        keep = nms(xyxy, conf, self.iou_thresh, classes=cls_ids, max_det=self.max_det)
+        xyxy, conf, cls_ids = xyxy[keep], conf[keep], cls_ids[keep]
+
+        codes = self.class_lut[np.minimum(cls_ids, len(self.class_lut) - 1)]
+        m = codes >= 0
+        (scale, (pad_x, pad_y), (h, w)) = meta
+        xyxy = (xyxy[m] - [pad_x, pad_y, pad_x, pad_y]) / scale
+        np.clip(xyxy, 0, [w, h, w, h], out=xyxy)
+        return DetectionBatch.from_arrays(xyxy, conf[m], codes[m], approach_code(approach_id), frame_id)
+
+    def detect_batch(self, frames, frame_ids: Sequence[int], approach_ids: Sequence[str]) -> List[DetectionBatch]:
+        out = []
+        for k in range(0, len(frames), self.batch_size):
+            chunk = frames[k:k + self.batch_size]
+            blob, metas = self._preprocess(chunk)
+            preds = self.session.run(None, {self.input_name: blob})[0]
+            out.extend(self._postprocess(preds[i], metas[i], frame_ids[k + i], approach_ids[k + i])
+                       for i in range(len(chunk)))
+        return out
+
+    def detect(self, frame, frame_id: int, approach_id: str) -> DetectionBatch:
+        return self.detect_batch([frame], [frame_id], [approach_id])[0]
+
+    def infer(self, frame, frame_id: int, approach_id: str) -> List[Detection]:
+        return self.detect(frame, frame_id, approach_id).to_models()
+
+    def infer_batch(self, frames, frame_ids: Sequence[int], approach_ids: Sequence[str]) -> List[List[Detection]]:
+        return [b.to_models() for b in self.detect_batch(frames, frame_ids, approach_ids)]
+
+
+def letterbox(frame, size: int, color: int = 114):
+    """
+    Resize keeping aspect ratio and pad to (size, size). Returns
+    (image, scale, (pad_x, pad_y)); original = (letterboxed - pad) / scale.
+    """
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    nw, nh = int(round(w * scale)), int(round(h * scale))
+    pad_x, pad_y = (size - nw) // 2, (size - nh) // 2
+    out = np.full((size, size, 3), color, dtype=np.uint8)
+    out[pad_y:pad_y + nh, pad_x:pad_x + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return out, scale, (pad_x, pad_y)
+
+
+def build_class_lut(class_map: Dict[int, str], size: int = 256) -> np.ndarray:
+    """
+    Model class id -> our class code (-1 = ignored). "person" maps to
+    "pedestrian".
+    """
+    lut = np.full(max(size, max(class_map, default=0) + 1), -1, dtype=np.int16)
+    for cls_id, label in class_map.items():
+        lut[cls_id] = CLASS_CODE["pedestrian" if label == "person" else label]
+    return lut
+
+
+def _to_numpy(t) -> np.ndarray:
+    # torch tensors (possibly on GPU) or anything array-like
+    if hasattr(t, "cpu"):
+        t = t.cpu()
+    if hasattr(t, "numpy"):
+        return t.numpy()
+    return np.asarray(t)
+
+
+class RoiDetector:
+    """
+    Runs a detector only on the region covered by the lane polygons.
+
+    The frame is cropped (a view, no copy) to the bounding box of the lanes
+    plus ``margin_px``; the wrapped detector letterboxes the crop as usual
+    and boxes are shifted back to full-frame coordinates. With ``tiles`` > 1
+    the crop is cut into that many vertically overlapping strips, batched
+    through the detector and merged with class-aware NMS, which keeps far
+    (small) vehicles on tall approach lanes at a usable scale. ``tiles=0``
+    picks the count from the crop's aspect ratio.
+    """
+    def __init__(self, detector, roi: Tuple[int, int, int, int], tiles: int = 1,
+                 tile_overlap: float = 0.15, iou_thresh: float = 0.5):
+        self.detector = detector
+        self.roi = tuple(int(v) for v in roi)
+        self.tiles = tiles
+        self.tile_overlap = tile_overlap
+        self.iou_thresh = iou_thresh
+        self.pixel_fraction = 1.0   # ROI pixels / frame pixels, updated per frame
+
+    @classmethod
+    def from_lanes(cls, detector, lane_polygons, margin_px: int = 16, **kwargs) -> "RoiDetector":
+        x0, y0, x1, y1 = unary_union(list(lane_polygons)).bounds
+        return cls(detector, (int(np.floor(x0)) - margin_px, int(np.floor(y0)) - margin_px,
+                              int(np.ceil(x1)) + margin_px, int(np.ceil(y1)) + margin_px), **kwargs)
+
+    def _windows(self, shape) -> List[Tuple[int, int, int, int]]:
+        h, w = shape[:2]
+        x0, y0, x1, y1 = self.roi
+        x0, y0, x1, y1 = max(x0, 0), max(y0, 0), min(x1, w), min(y1, h)
+        if x1 <= x0 or y1 <= y0:
+            return []
+        self.pixel_fraction = (x1 - x0) * (y1 - y0) / float(w * h)
+        n = self.tiles if self.tiles > 0 else max(1, int(round((y1 - y0) / (x1 - x0))))
+        if n == 1:
+            return [(x0, y0, x1, y1)]
+        th = (y1 - y0) / (n - (n - 1) * self.tile_overlap)   # tile height so n tiles with overlap span the ROI
+        step = th * (1 - self.tile_overlap)
+        return [(x0, int(y0 + i * step), x1, min(int(np.ceil(y0 + i * step + th)), y1)) for i in range(n)]
+
+    def detect_batch(self, frames, frame_ids: Sequence[int], approach_ids: Sequence[str]) -> List[DetectionBatch]:
+        crops, owner, offsets = [], [], []
+        for k, f in enumerate(frames):
+            for (x0, y0, x1, y1) in self._windows(f.shape):
+                crops.append(f[y0:y1, x0:x1])
+                owner.append(k)
+                offsets.append((x0, y0, x0, y0))
+        dets = self.detector.detect_batch(crops, [frame_ids[k] for k in owner], [approach_ids[k] for k in owner])
+
+        parts: List[List[DetectionBatch]] = [[] for _ in frames]
+        for k, off, b in zip(owner, offsets, dets):
+            b.bbox[:] += np.asarray(off, dtype=np.float32)
+            parts[k].append(b)
+        out = []
+        for k in range(len(frames)):
+            b = DetectionBatch.concat(parts[k])
+            if len(parts[k]) > 1:
+                b = b[np.sort(nms(b.bbox, b.score, self.iou_thresh, classes=b.cls, max_det=len(b)))]
+            out.append(b)
+        return out
+
+    def detect(self, frame, frame_id: int, approach_id: str) -> DetectionBatch:
+        return self.detect_batch([frame], [frame_id], [approach_id])[0]
+
+    def infer(self, frame, frame_id: int, approach_id: str) -> List[Detection]:
+        return self.detect(frame, frame_id, approach_id).to_models()
+
+    def infer_batch(self, frames, frame_ids: Sequence[int], approach_ids: Sequence[str]) -> List[List[Detection]]:
+        return [b.to_models() for b in self.detect_batch(frames, frame_ids, approach_ids)]
+
+
+class BatchedDetector:
+    """
+    Multi-camera front end: keeps the latest frame per approach and runs one
+    batched forward pass over all of them.
+
+    Frames arrive through submit() (or attach(), which feeds a CameraStream
+    from a daemon thread). infer_latest() blocks until at least one approach
+    has a fresh frame, then waits at most ``max_wait_s`` for the others so a
+    slow camera can't stall the rest.
+    """
+    def __init__(self, detector, approaches: Sequence[str], max_wait_s: float = 0.05):
+        self.detector = detector
+        self.approaches = list(approaches)
+        self.max_wait_s = max_wait_s
+        self._known = set(self.approaches)
+        self._cond = threading.Condition()
+        self._latest: Dict[str, Tuple[int, float, object]] = {}  # approach -> (frame_id, ts, frame), unconsumed only
+        self._threads: List[threading.Thread] = []
+        self._running = True
+
+    def submit(self, approach_id: str, frame_id: int, frame, ts: Optional[float] = None):
+        if approach_id not in self._known:
+            # it would count towards a full batch, end the wait early and then be dropped
+            raise ValueError(f"unknown approach '{approach_id}', expected one of {self.approaches}")
+        item = (frame_id, time.time() if ts is None else ts, frame)
+        with self._cond:
+            self._latest[approach_id] = item  # older unconsumed frame is dropped
+            self._cond.notify_all()
+
+    def attach(self, approach_id: str, stream) -> threading.Thread:
+        if approach_id not in self._known:
+            raise ValueError(f"unknown approach '{approach_id}', expected one of {self.approaches}")
+
+        def feed():
+            for fid, ts, frame in stream.frames():
+                if not self._running:
+                    break
+                self.submit(approach_id, fid, frame, ts)
+        th = threading.Thread(target=feed, name=f"feed-{approach_id}", daemon=True)
+        th.start()
+        self._threads.append(th)
+        return th
+
+    @property
+    def feeding(self) -> bool:
+        """
+        Whether any attached stream is still delivering frames.
+        """
+        return any(th.is_alive() for th in self._threads)
+
+    def collect(self, timeout: Optional[float] = None) -> Dict[str, Tuple[int, float, object]]:
+        """
+        Take the fresh frames, {approach_id: (frame_id, ts, frame)}. Empty if
+        nothing arrived within ``timeout``.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._latest or not self._running, timeout):
+                return {}
+            deadline = time.monotonic() + self.max_wait_s
+            while self._running and len(self._latest) < len(self.approaches):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._latest = self._latest, {}
+        return batch
+
+    def detect(self, batch: Dict[str, Tuple[int, float, object]]) -> Dict[str, DetectionBatch]:
+        """
+        One batched forward pass over collected frames.
+        """
+        if not batch:
+            return {}
+        aids = [a for a in self.approaches if a in batch]
+        dets = self.detector.detect_batch([batch[a][2] for a in aids], [batch[a][0] for a in aids], aids)
+        return dict(zip(aids, dets))
+
+    def detect_latest(self, timeout: Optional[float] = None) -> Dict[str, DetectionBatch]:
+        return self.detect(self.collect(timeout))
+
+    def infer_latest(self, timeout: Optional[float] = None) -> Dict[str, List[Detection]]:
+        return {a: b.to_models() for a, b in self.detect_latest(timeout).items()}
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+
+DETECTORS = ("stub", "yolov8", "onnx")
+
+
+def make_detector(cfg: dict):
+    """
+    Build a detector from a perception.detector config block: ``name``
+    picks the backend, ``conf_thresh``/``classes``/``model_path`` are shared
+    and a sub-block named after the backend (e.g. ``onnx:``) holds the rest.
+    """
+    name = cfg.get("name", "stub")
+    opts = dict(cfg.get(name) or {})
+    conf = cfg.get("conf_thresh", 0.3)
+    if name == "stub":
+        return StubDetector(classes=cfg.get("classes"), conf_thresh=conf)
+    if name == "yolov8":
+        return YOLODetector(model_path=opts.get("model_path", cfg.get("model_path", "yolov8n.pt")), conf_thresh=conf)
+    if name == "onnx":
+        opts.setdefault("model_path", cfg.get("model_path", "yolov8n.onnx"))
+        return ONNXDetector(conf_thresh=conf, **opts)
+    raise ValueError(f"Unknown detector '{name}', expected one of {DETECTORS}")
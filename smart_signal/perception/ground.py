@@ -0,0 +1,170 @@
+# smart_signal/perception/ground.py
+import hashlib
+import json
+import os
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from smart_signal.types import TrackBatch
+
+
+@dataclass
+class GroundCalibration:
+    """
+    Per-camera image->ground calibration. ``image_points`` (pixels) and
+    ``ground_points`` (metres) are at least four corresponding points on the
+    road plane. ``stopline`` is two ground points on the stop line and
+    ``upstream_point`` any ground point on the approach side of it, which
+    fixes the sign of distances (positive = before the stop line).
+    """
+    camera_id: str
+    frame_size: Tuple[int, int]  # (width, height)
+    image_points: List[Tuple[float, float]]
+    ground_points: List[Tuple[float, float]]
+    stopline: List[Tuple[float, float]]
+    upstream_point: Tuple[float, float]
+
+    @classmethod
+    def load(cls, path: str) -> "GroundCalibration":
+        with open(path) as f:
+            d = json.load(f)
+        d["frame_size"] = tuple(d["frame_size"])
+        d["upstream_point"] = tuple(d["upstream_point"])
+        return cls(**d)
+
+    def fingerprint(self) -> str:
+        blob = json.dumps(asdict(self), sort_keys=True).encode()
+        return hashlib.sha1(blob).hexdigest()[:16]
+
+    def homography(self) -> np.ndarray:
+        src = np.asarray(self.image_points, dtype=np.float64)
+        dst = np.asarray(self.ground_points, dtype=np.float64)
+        if len(src) < 4 or len(src) != len(dst):
+            raise ValueError(f"{self.camera_id}: need >= 4 matching image/ground points")
+        H, _ = cv2.findHomography(src, dst, 0)
+        if H is None:
+            raise ValueError(f"{self.camera_id}: degenerate calibration points")
+        return H
+
+
+class GroundGrid:
+    """
+    Dense float32 lookup of ground position and distance-to-stop-line for
+    every pixel of one camera, shape (height, width, 3) = (x_m, y_m, dist_m).
+
+    The grid is baked from the calibration homography once, cached on disk
+    as a memory-mapped .npy keyed by the calibration fingerprint, and only
+    rebuilt when the calibration changes. Converting track positions to
+    metres is then one gather per frame.
+    """
+    def __init__(self, calib: GroundCalibration, grid: np.ndarray):
+        self.calib = calib
+        self.grid = grid
+
+    @classmethod
+    def load_or_build(cls, calib: GroundCalibration, cache_dir: str = "data/calibration/cache") -> "GroundGrid":
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, f"{calib.camera_id}-{calib.fingerprint()}.npy")
+        if not os.path.exists(path):
+            tmp = path + ".tmp"
+            w, h = calib.frame_size
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(h, w, 3))
+            cls._bake(calib, out)
+            out.flush()
+            del out
+            os.replace(tmp, path)
+        return cls(calib, np.load(path, mmap_mode="r"))
+
+    @staticmethod
+    def _bake(calib: GroundCalibration, out: np.ndarray, rows_per_chunk: int = 256):
+        H = calib.homography()
+        (ax, ay), (bx, by) = calib.stopline
+        nx, ny = by - ay, ax - bx                     # stop-line normal
+        norm = np.hypot(nx, ny)
+        if norm == 0:
+            raise ValueError(f"{calib.camera_id}: stop line points coincide")
+        ux, uy = calib.upstream_point
+        if (ux - ax) * nx + (uy - ay) * ny < 0:       # point the normal upstream
+            nx, ny = -nx, -ny
+        nx, ny = nx / norm, ny / norm
+
+        h, w = out.shape[:2]
+        u = np.arange(w, dtype=np.float64) + 0.5
+        for r0 in range(0, h, rows_per_chunk):
+            r1 = min(r0 + rows_per_chunk, h)
+            uu, vv = np.meshgrid(u, np.arange(r0, r1, dtype=np.float64) + 0.5)
+            den = H[2, 0] * uu + H[2, 1] * vv + H[2, 2]
+            gx = (H[0, 0] * uu + H[0, 1] * vv + H[0, 2]) / den
+            gy = (H[1, 0] * uu + H[1, 1] * vv + H[1, 2]) / den
+            out[r0:r1, :, 0] = gx
+            out[r0:r1, :, 1] = gy
+            out[r0:r1, :, 2] = (gx - ax) * nx + (gy - ay) * ny
+
+    def _gather(self, us, vs) -> np.ndarray:
+        h, w = self.grid.shape[:2]
+        cols = np.clip(np.floor(np.asarray(us, dtype=float)).astype(np.int64), 0, w - 1)
+        rows = np.clip(np.floor(np.asarray(vs, dtype=float)).astype(np.int64), 0, h - 1)
+        return self.grid[rows, cols]
+
+    def bottom_centers(self, bboxes) -> np.ndarray:
+        """
+        (N,3) ground x, y and stop-line distance (metres) for the
+        bottom-centre of each (N,4) xyxy box, i.e. where it meets the road.
+        """
+        b = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+        return self._gather((b[:, 0] + b[:, 2]) / 2, b[:, 3])
+
+    def distance_to_stopline(self, bboxes) -> np.ndarray:
+        return self.bottom_centers(bboxes)[:, 2]
+
+
+def queue_length_m(distances: np.ndarray, stopline_gap_m: float = 3.0, max_spacing_m: float = 12.0) -> float:
+    """
+    Metric queue length on one lane: the queue starts with a vehicle within
+    ``stopline_gap_m`` of the stop line and continues while consecutive
+    vehicles are at most ``max_spacing_m`` apart. 0.0 if nobody is waiting
+    at the line.
+    """
+    d = np.sort(np.asarray(distances, dtype=float))
+    d = d[d >= -stopline_gap_m]             # ignore vehicles already well past the line
+    if d.size == 0 or d[0] > stopline_gap_m:
+        return 0.0
+    breaks = np.flatnonzero(np.diff(d) > max_spacing_m)
+    last = breaks[0] if breaks.size else d.size - 1
+    return float(max(d[last], 0.0))
+
+
+class GroundKinematics:
+    """
+    Per-track metric state for one camera: distance to the stop line and
+    ground speed from consecutive bottom-centre positions.
+    """
+    def __init__(self, grid: GroundGrid, stopline_gap_m: float = 3.0):
+        self.grid = grid
+        self.stopline_gap_m = stopline_gap_m
+        self._last: Dict[int, Tuple[float, float, float]] = {}  # track_id -> (ts, x, y)
+
+    def measure(self, tracks, ts: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (distance_m, speed_mps) arrays aligned with ``tracks``
+        (TrackBatch or List[Track]). Speed is NaN for a track's first sighting.
+        """
+        tracks = TrackBatch.from_models(tracks)
+        n = len(tracks)
+        if n == 0:
+            self._last.clear()
+            return np.zeros(0), np.zeros(0)
+        g = self.grid.bottom_centers(tracks.bbox).astype(np.float64)
+        speed = np.full(n, np.nan)
+        last = {}
+        for i, tid in enumerate(tracks.track_id.tolist()):
+            x, y = g[i, 0], g[i, 1]
+            prev = self._last.get(tid)
+            if prev is not None and ts > prev[0]:
+                speed[i] = np.hypot(x - prev[1], y - prev[2]) / (ts - prev[0])
+            last[tid] = (ts, x, y)
+        self._last = last
+        return g[:, 2], speed
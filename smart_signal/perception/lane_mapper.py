@@ -1,8 +1,13 @@
 # smart_signal/perception/lane_mapper.py
 
-from typing import List, Dict, Tuple
-from smart_signal.control.config import LANE_ROIS
+import json
+from typing import List, Dict, Optional, Tuple
 import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from smart_signal.control.config import LANE_ROIS
+from smart_signal.types import LaneStat, TrackBatch
+from smart_signal.perception.ground import GroundKinematics, queue_length_m
 
 def bbox_centroid(bbox: Tuple[float, float, float, float]) -> Tuple[int, int]:
     x1, y1, x2, y2 = bbox
@@ -22,4 +27,155 @@ def count_by_lane(tracks: List) -> Dict[str, int]:
             if point_in_rect(cx, cy, roi.x1, roi.y1, roi.x2, roi.y2):
                 counts[roi.approach] += 1
                 break
-    return counts
\ No newline at end of file
+    return counts
+
+class LaneMapper:
+    """
+    Lane polygons from a GeoJSON FeatureCollection (features with
+    properties.type == "lane"), compiled once into a lane-ID lookup image.
+
+    Mapping points to lanes is a single array gather: no per-point Shapely
+    objects. Where polygons overlap, the earlier feature wins. Points outside
+    every lane map to -1 / "unknown".
+    """
+    UNKNOWN = "unknown"
+
+    def __init__(self, geojson_path: str, frame_size: Optional[Tuple[int, int]] = None):
+        """
+        :param geojson_path: Lane GeoJSON (pixel coordinates)
+        :param frame_size: (width, height) of the camera frame; defaults to the lane bounds
+        """
+        with open(geojson_path) as f:
+            fc = json.load(f)
+
+        self.lane_ids: List[str] = []
+        self.lane_approach: List[str] = []
+        self.lane_movement: List[str] = []
+        self.lane_polygons: Dict[str, Polygon] = {}
+        for feat in fc.get("features", []):
+            props = feat.get("properties", {})
+            if props.get("type", "lane") != "lane" or feat["geometry"]["type"] != "Polygon":
+                continue
+            lane_id = props["lane_id"]
+            self.lane_ids.append(lane_id)
+            self.lane_approach.append(props["approach_id"])
+            self.lane_movement.append(props.get("movement", "through"))
+            self.lane_polygons[lane_id] = Polygon(feat["geometry"]["coordinates"][0])
+
+        self.approach_ids: List[str] = sorted(set(self.lane_approach))
+        # lane index -> approach index, with a trailing -1 so lane -1 maps to -1
+        self._lane_to_approach = np.array(
+            [self.approach_ids.index(a) for a in self.lane_approach] + [-1], dtype=np.int16)
+
+        if frame_size is None:
+            maxx = max((p.bounds[2] for p in self.lane_polygons.values()), default=0)
+            maxy = max((p.bounds[3] for p in self.lane_polygons.values()), default=0)
+            frame_size = (int(np.ceil(maxx)) + 1, int(np.ceil(maxy)) + 1)
+        self.frame_size = frame_size
+        self.lane_image = self._rasterize(frame_size)
+
+    def _rasterize(self, frame_size) -> np.ndarray:
+        """
+        Pixel (col, row) gets the lane whose polygon contains its centre
+        (col + 0.5, row + 0.5); lookups are exact to within one pixel.
+        """
+        w, h = frame_size
+        img = np.full((h, w), -1, dtype=np.int16)
+        # Paint in reverse so earlier lanes win where polygons overlap
+        for idx in range(len(self.lane_ids) - 1, -1, -1):
+            poly = self.lane_polygons[self.lane_ids[idx]]
+            x0, y0, x1, y1 = poly.bounds
+            c0, c1 = max(int(np.floor(x0)), 0), min(int(np.ceil(x1)) + 1, w)
+            r0, r1 = max(int(np.floor(y0)), 0), min(int(np.ceil(y1)) + 1, h)
+            if c0 >= c1 or r0 >= r1:
+                continue
+            cx, cy = np.meshgrid(np.arange(c0, c1) + 0.5, np.arange(r0, r1) + 0.5)
+            inside = shapely.contains_xy(poly, cx, cy)
+            img[r0:r1, c0:c1][inside] = idx
+        return img
+
+    def lane_index(self, xs, ys) -> np.ndarray:
+        """
+        Lane index for each point (-1 outside every lane), vectorized.
+        """
+        xs = np.floor(np.asarray(xs, dtype=float)).astype(np.int64)
+        ys = np.floor(np.asarray(ys, dtype=float)).astype(np.int64)
+        h, w = self.lane_image.shape
+        inside = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+        out = np.full(xs.shape, -1, dtype=np.int16)
+        out[inside] = self.lane_image[ys[inside], xs[inside]]
+        return out
+
+    def map_centroids(self, bboxes) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (lane index, approach index) arrays for the centroids of (N,4) xyxy boxes.
+        """
+        b = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+        lanes = self.lane_index((b[:, 0] + b[:, 2]) / 2, (b[:, 1] + b[:, 3]) / 2)
+        return lanes, self._lane_to_approach[lanes]
+
+    def approaches_for_boxes(self, bboxes) -> List[str]:
+        _, app = self.map_centroids(bboxes)
+        names = self.approach_ids + [self.UNKNOWN]
+        return [names[a] for a in app.tolist()]
+
+    def get_approach_for_point(self, cx: float, cy: float) -> str:
+        a = int(self._lane_to_approach[self.lane_index([cx], [cy])[0]])
+        return self.approach_ids[a] if a >= 0 else self.UNKNOWN
+
+    def assign_tracks(self, tracks) -> Dict[str, List]:
+        """
+        Group tracks by the lane containing their bbox centroid. A TrackBatch
+        is split into one TrackBatch per lane without building objects.
+        """
+        if isinstance(tracks, TrackBatch):
+            lanes, _ = self.map_centroids(tracks.bbox)
+            return {lane_id: tracks[lanes == i] for i, lane_id in enumerate(self.lane_ids)}
+        out: Dict[str, List] = {lane_id: [] for lane_id in self.lane_ids}
+        if not tracks:
+            return out
+        lanes, _ = self.map_centroids([t.bbox for t in tracks])
+        for tr, li in zip(tracks, lanes.tolist()):
+            if li >= 0:
+                out[self.lane_ids[li]].append(tr)
+        return out
+
+    def compute_lane_stats(self, lane_assignments: Dict[str, List],
+                           ground: Optional[GroundKinematics] = None, ts: Optional[float] = None) -> List[LaneStat]:
+        """
+        One LaneStat per lane. With a calibrated ``ground`` (and frame
+        timestamp ``ts``) every track is converted to metres in a single
+        gather, filling queue_m and speed_mps.
+        """
+        dist = speed = None
+        offsets = {}
+        if ground is not None:
+            parts, n = [], 0
+            for lane_id in self.lane_ids:
+                lane_tracks = TrackBatch.from_models(lane_assignments.get(lane_id, []))
+                offsets[lane_id] = (n, n + len(lane_tracks))
+                parts.append(lane_tracks)
+                n += len(lane_tracks)
+            dist, speed = ground.measure(TrackBatch.concat(parts), ts if ts is not None else 0.0)
+
+        stats = []
+        for idx, lane_id in enumerate(self.lane_ids):
+            queue_m = speed_mps = None
+            if dist is not None:
+                a, b = offsets[lane_id]
+                queue_m = queue_length_m(dist[a:b], ground.stopline_gap_m)
+                v = speed[a:b]
+                v = v[~np.isnan(v)]
+                speed_mps = float(v.mean()) if v.size else None
+            stats.append(LaneStat(
+                approach_id=self.lane_approach[idx],
+                lane_id=lane_id,
+                movement=self.lane_movement[idx],
+                queue_len=len(lane_assignments.get(lane_id, [])),
+                arrival_rate_vph=0.0,
+                occupancy=0.0,
+                spillback=False,
+                queue_m=queue_m,
+                speed_mps=speed_mps,
+            ))
+        return stats
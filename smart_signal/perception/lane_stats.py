@@ -0,0 +1,203 @@
+# smart_signal/perception/lane_stats.py
+import math
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from smart_signal.types import LaneStat, TrackBatch, CLASS_NAMES
+from smart_signal.perception.lane_mapper import LaneMapper
+from smart_signal.perception.ground import GroundGrid, queue_length_m
+from smart_signal.utils.timing import PCU_FACTORS
+
+
+class _TrackState:
+    __slots__ = ("lane", "in_band", "counted", "dist", "speed", "ts", "gx", "gy", "pcu")
+
+    def __init__(self):
+        self.lane = -1
+        self.in_band = False
+        self.counted = False
+        self.dist = math.nan
+        self.speed = math.nan
+        self.ts = None
+        self.gx = self.gy = 0.0
+        self.pcu = 1.0
+
+
+class LaneStatsEngine:
+    """
+    Streaming per-lane statistics. Keeps running counters per lane and only
+    touches the tracks that changed this frame:
+
+    - queue_len: vehicles currently in the lane
+    - arrival_rate_vph: EWMA of new track IDs entering the stop-line band
+      (arrival_pcu_vph: the same, weighted by the class's PCU factor)
+    - occupancy: time-averaged fraction of time the stop-line band is occupied
+    - spillback: queue_len >= spillback_veh for at least spillback_hold_s
+
+    With a ground grid the stop-line band is |distance| <= stopline_gap_m and
+    queue_m / speed_mps are filled in; without one the whole lane polygon is
+    the band. ``snapshot`` is rebuilt once per update, so readers just take
+    the latest list.
+    """
+    def __init__(self, lane_mapper: LaneMapper, ground: Optional[GroundGrid] = None,
+                 stopline_gap_m: float = 3.0, rate_tau_s: float = 120.0, occupancy_tau_s: float = 60.0,
+                 spillback_veh: int = 12, spillback_hold_s: float = 5.0,
+                 pcu: Optional[Dict[str, float]] = None):
+        self.mapper = lane_mapper
+        self.ground = ground
+        self.stopline_gap_m = stopline_gap_m
+        self.rate_tau_s = rate_tau_s
+        self.occupancy_tau_s = occupancy_tau_s
+        self.spillback_veh = spillback_veh
+        self.spillback_hold_s = spillback_hold_s
+        pcu = {**PCU_FACTORS, **(pcu or {})}
+        self._pcu_lut = np.array([pcu.get(name, 1.0) for name in CLASS_NAMES])
+
+        n = len(lane_mapper.lane_ids)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.band_count = np.zeros(n, dtype=np.int64)
+        self.arrivals = np.zeros(n, dtype=np.int64)      # cumulative
+        self.rate_vph = np.zeros(n)
+        self.rate_pcu_vph = np.zeros(n)
+        self.occupancy = np.zeros(n)
+        self.queue_m = np.full(n, math.nan)
+        self.speed_mps = np.full(n, math.nan)
+        self._over_since = np.full(n, math.nan)         # time queue_len first reached spillback_veh
+        self._pending_arrivals = np.zeros(n, dtype=np.int64)
+        self._pending_pcu = np.zeros(n)
+        self._members: List[Dict[int, _TrackState]] = [{} for _ in range(n)]
+        self._dirty = set()
+
+        self._tracks: Dict[int, _TrackState] = {}
+        self._ts: Optional[float] = None
+        self.snapshot: List[LaneStat] = self._build_snapshot()
+
+    # ---------- ingest ----------
+    def update(self, tracks, frame_id: int, ts: float, coasted: bool = False) -> List[LaneStat]:
+        """
+        Feed the tracker output (TrackBatch or List[Track]) for one frame.
+        Only tracks seen this frame (last_seen_frame == frame_id) and tracks
+        that disappeared are processed. ``coasted`` marks a frame the
+        detector skipped: every track moved along its prediction without
+        being seen, so all of them are processed.
+        """
+        tracks = TrackBatch.from_models(tracks)
+        changed = tracks if coasted else tracks[tracks.last_seen_frame == frame_id]
+        born = sum(1 for tid in changed.track_id.tolist() if tid not in self._tracks)
+        removed = []
+        if len(self._tracks) + born != len(tracks):   # alive = old - removed + born
+            alive = set(tracks.track_id.tolist())
+            removed = [tid for tid in self._tracks if tid not in alive]
+        return self.apply(changed, removed, ts)
+
+    def apply(self, changed: TrackBatch, removed: Sequence[int], ts: float) -> List[LaneStat]:
+        """
+        Apply a delta: ``changed`` tracks (new or moved) and ``removed`` track IDs.
+        """
+        for tid in removed:
+            st = self._tracks.pop(tid, None)
+            if st is not None:
+                self._leave(tid, st)
+
+        if len(changed):
+            boxes = changed.bbox
+            lanes, _ = self.mapper.map_centroids(boxes)
+            pcu = self._pcu_lut[changed.cls].tolist()
+            if self.ground is not None:
+                g = self.ground.bottom_centers(boxes).astype(np.float64)
+            for i, tid in enumerate(changed.track_id.tolist()):
+                st = self._tracks.get(tid)
+                if st is None:
+                    st = self._tracks[tid] = _TrackState()
+                else:
+                    self._leave(tid, st)
+                st.lane = int(lanes[i])
+                st.pcu = pcu[i]
+                if self.ground is not None:
+                    x, y = g[i, 0], g[i, 1]
+                    if st.ts is not None and ts > st.ts:
+                        st.speed = math.hypot(x - st.gx, y - st.gy) / (ts - st.ts)
+                    st.gx, st.gy, st.ts = x, y, ts
+                    st.dist = g[i, 2]
+                    st.in_band = st.lane >= 0 and abs(st.dist) <= self.stopline_gap_m
+                else:
+                    st.in_band = st.lane >= 0
+                self._enter(tid, st)
+
+        self._advance(ts)
+        return self.snapshot
+
+    def _leave(self, tid: int, st: _TrackState):
+        if st.lane < 0:
+            return
+        self.count[st.lane] -= 1
+        if st.in_band:
+            self.band_count[st.lane] -= 1
+        self._members[st.lane].pop(tid, None)
+        self._dirty.add(st.lane)
+
+    def _enter(self, tid: int, st: _TrackState):
+        if st.lane < 0:
+            return
+        self.count[st.lane] += 1
+        if st.in_band:
+            self.band_count[st.lane] += 1
+            if not st.counted:
+                st.counted = True
+                self.arrivals[st.lane] += 1
+                self._pending_arrivals[st.lane] += 1
+                self._pending_pcu[st.lane] += st.pcu
+        self._members[st.lane][tid] = st
+        self._dirty.add(st.lane)
+
+    def _advance(self, ts: float):
+        """
+        Advance the time-based estimators (O(lanes)) and refresh metric
+        fields of lanes whose membership changed.
+        """
+        dt = 0.0 if self._ts is None else max(ts - self._ts, 0.0)
+        self._ts = ts
+        new = self._pending_arrivals
+        if dt > 0:
+            a = 1.0 - math.exp(-dt / self.rate_tau_s)
+            self.rate_vph += a * (new / dt * 3600.0 - self.rate_vph)
+            self.rate_pcu_vph += a * (self._pending_pcu / dt * 3600.0 - self.rate_pcu_vph)
+            a = 1.0 - math.exp(-dt / self.occupancy_tau_s)
+            self.occupancy += a * ((self.band_count > 0) - self.occupancy)
+            self._pending_arrivals = np.zeros_like(new)
+            self._pending_pcu = np.zeros_like(self._pending_pcu)
+        # with dt == 0 (first frame) arrivals stay pending for the next rate update
+
+        over = self.count >= self.spillback_veh
+        self._over_since[~over] = math.nan
+        self._over_since[over & np.isnan(self._over_since)] = ts
+
+        if self.ground is not None:
+            for li in self._dirty:
+                members = self._members[li].values()
+                self.queue_m[li] = queue_length_m([m.dist for m in members], self.stopline_gap_m)
+                v = [m.speed for m in members if not math.isnan(m.speed)]
+                self.speed_mps[li] = sum(v) / len(v) if v else math.nan
+        self._dirty.clear()
+        self.snapshot = self._build_snapshot()
+
+    # ---------- output ----------
+    def _build_snapshot(self) -> List[LaneStat]:
+        m = self.mapper
+        if self._ts is None:
+            spill = np.zeros(len(m.lane_ids), dtype=bool)
+        else:
+            spill = self._ts - self._over_since >= self.spillback_hold_s
+        return [
+            LaneStat(
+                approach_id=m.lane_approach[i], lane_id=lane_id, movement=m.lane_movement[i],
+                queue_len=int(self.count[i]), arrival_rate_vph=float(self.rate_vph[i]),
+                occupancy=float(self.occupancy[i]), spillback=bool(spill[i]),
+                queue_m=None if math.isnan(self.queue_m[i]) else float(self.queue_m[i]),
+                speed_mps=None if math.isnan(self.speed_mps[i]) else float(self.speed_mps[i]),
+                arrival_pcu_vph=float(self.rate_pcu_vph[i]),
+            )
+            for i, lane_id in enumerate(m.lane_ids)
+        ]
+
@@ -0,0 +1,153 @@
+# smart_signal/perception/scheduler.py
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class SkipStats:
+    frames: int = 0
+    detected: int = 0
+    motion_triggered: int = 0
+    detect_ms_avg: float = 0.0   # EWMA of detector time per frame
+
+    @property
+    def skipped(self) -> int:
+        return self.frames - self.detected
+
+    @property
+    def saved_fraction(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
+
+    @property
+    def saved_s(self) -> float:
+        """Estimated detector time not spent."""
+        return self.skipped * self.detect_ms_avg / 1e3
+
+
+class _CameraState:
+    __slots__ = ("since", "ref", "motion", "signal")
+
+    def __init__(self):
+        self.since = 0          # frames since the last detection
+        self.ref = None         # downscaled gray frame at the last detection
+        self.motion = 0.0       # EWMA of motion seen at detections
+        self.signal = None      # "red" | "yellow" | "green" | None (unknown)
+
+
+class AdaptiveScheduler:
+    """
+    Decides per camera whether a frame goes through the detector or is
+    bridged with tracker predictions.
+
+    The detector runs every k-th frame. k starts from the signal state
+    (sparse on red, where queues hardly move; dense on green) and shrinks
+    with recent scene motion. Independently, a cheap motion gate compares
+    a 1/``downscale`` grayscale thumbnail with the one from the last
+    detection and forces a detection when more than ``gate_thresh`` of it
+    changed.
+    """
+    SIGNAL_K = {"red": 1.0, "yellow": 0.5, "green": 0.0}   # share of the k_min..k_max range
+
+    def __init__(self, k_min: int = 1, k_max: int = 8, downscale: int = 8, pixel_thresh: int = 15,
+                 gate_thresh: float = 0.05, motion_alpha: float = 0.3):
+        if not 1 <= k_min <= k_max:
+            raise ValueError(f"need 1 <= k_min <= k_max, got {k_min}, {k_max}")
+        self.k_min = k_min
+        self.k_max = k_max
+        self.downscale = downscale
+        self.pixel_thresh = pixel_thresh
+        self.gate_thresh = gate_thresh
+        self.motion_alpha = motion_alpha
+        self.stats: Dict[str, SkipStats] = {}
+        self._cams: Dict[str, _CameraState] = {}
+
+    def set_signal(self, camera_id: str, state: Optional[str]):
+        self._state(camera_id).signal = state
+
+    def _state(self, camera_id: str) -> _CameraState:
+        st = self._cams.get(camera_id)
+        if st is None:
+            st = self._cams[camera_id] = _CameraState()
+            self.stats[camera_id] = SkipStats()
+        return st
+
+    def _thumb(self, frame) -> np.ndarray:
+        h, w = frame.shape[:2]
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        size = (max(w // self.downscale, 1), max(h // self.downscale, 1))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def k(self, camera_id: str) -> int:
+        st = self._state(camera_id)
+        share = self.SIGNAL_K.get(st.signal, 0.5)
+        base = self.k_min + share * (self.k_max - self.k_min)
+        activity = min(st.motion / self.gate_thresh, 1.0)
+        return int(round(base - activity * (base - self.k_min)))
+
+    def should_detect(self, camera_id: str, frame) -> bool:
+        st = self._state(camera_id)
+        s = self.stats[camera_id]
+        s.frames += 1
+        thumb = self._thumb(frame)
+        first = st.ref is None or st.ref.shape != thumb.shape
+        motion = 0.0 if first else float(np.count_nonzero(np.abs(thumb - st.ref) > self.pixel_thresh)) / thumb.size
+
+        st.since += 1
+        gate = first or motion > self.gate_thresh
+        k = self.k(camera_id)
+        if not gate and st.since < k:
+            return False
+
+        s.detected += 1
+        s.motion_triggered += int(gate and not first and st.since < k)
+        st.since = 0
+        st.ref = thumb
+        if not first:
+            st.motion += self.motion_alpha * (motion - st.motion)
+        return True
+
+    def timed(self, camera_id: str, fn, *args):
+        """
+        Run the detector call ``fn(*args)`` and fold its time into the
+        savings estimate.
+        """
+        t0 = time.perf_counter()
+        out = fn(*args)
+        self.record(camera_id, (time.perf_counter() - t0) * 1e3)
+        return out
+
+    def record(self, camera_id: str, ms: float):
+        """
+        Fold a detector time measured elsewhere (e.g. this camera's share of
+        a batched pass) into the savings estimate.
+        """
+        s = self.stats[camera_id]
+        s.detect_ms_avg = ms if s.detected <= 1 else 0.9 * s.detect_ms_avg + 0.1 * ms
+
+    def report(self) -> str:
+        lines = []
+        for cam, s in self.stats.items():
+            lines.append(f"{cam}: detector ran on {s.detected}/{s.frames} frames "
+                         f"({s.saved_fraction:.0%} skipped, {s.motion_triggered} motion-triggered), "
+                         f"~{s.saved_s:.1f}s detector time saved")
+        return "\n".join(lines)
+
+
+def make_scheduler(cfg: Optional[dict], tracker=None) -> Optional[AdaptiveScheduler]:
+    """
+    Build a scheduler from a perception.frame_skip config block, or None
+    when frame skipping is disabled (every frame is detected). ``tracker``
+    bridges the skipped frames and must predict motion (the "sort" tracker);
+    one that holds boxes still would freeze every vehicle between detections.
+    """
+    cfg = dict(cfg or {})
+    if not cfg.pop("enabled", False):
+        return None
+    if tracker is not None and not getattr(tracker, "predicts", False):
+        raise ValueError(f"frame_skip needs a tracker with a motion model (tracker.name: sort), "
+                         f"got {type(tracker).__name__}")
+    return AdaptiveScheduler(**cfg)
@@ -1,177 +1,283 @@
 # smart_signal/perception/tracker.py
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional
 import numpy as np
-from smart_signal.types import Detection, Track
-from smart_signal.utils.geometry import iou
+from smart_signal.types import Detection, Track, DetectionBatch, TrackBatch, TRACK_DTYPE
+from smart_signal.utils.geometry import iou, iou_matrix
+from smart_signal.utils.spatial import GridIndex
+from smart_signal.perception.assignment import ASSIGNERS
 
 # ---------- IOUTracker (approach-aware) ----------
 class IOUTracker:
-    def __init__(self, iou_thresh=0.3, max_age=10):
+    predicts = False    # coast() holds boxes where they were last seen
+
+    def __init__(self, iou_thresh=0.3, max_age=10, cell_size=64.0):
         self.iou_thresh = iou_thresh
         self.max_age = max_age
-        self.tracks: List[Track] = []
+        self.tracks = TrackBatch.empty()
         self.next_id = 1
+        # Live track state (bbox, cls code, approach code, last_seen_frame) by id,
+        # plus a candidate index grouped by (approach, class)
+        self._grid = GridIndex(cell_size)
+        self._state: Dict[int, list] = {}
 
     def update(self, detections: List[Detection], frame_id: int) -> List[Track]:
-        updated_tracks = []
-        for det in detections:
+        return self.update_batch(DetectionBatch.from_models(detections), frame_id).to_models()
+
+    def update_batch(self, detections: DetectionBatch, frame_id: int) -> TrackBatch:
+        # First position of each live track: ties on IoU go to the earlier one
+        rank: Dict[int, int] = {}
+        for pos, tid in enumerate(self.tracks.track_id.tolist()):
+            rank.setdefault(tid, pos)
+
+        state = self._state
+        born: Dict[int, list] = {}
+        out_ids = []
+        boxes = detections.bbox.tolist()
+        for bbox, cls, app in zip(boxes, detections.cls.tolist(), detections.approach.tolist()):
+            bbox = tuple(bbox)
             best_iou = 0
-            best_track = None
-            for track in self.tracks:
-                # ✅ Match only if same class AND same approach
-                if track.cls != det.cls or track.approach_id != det.approach_id:
-                    continue
-                s = iou(track.bbox, det.bbox)
+            best_id = None
+            # ✅ Only tracks of the same class AND approach in nearby cells
+            for tid in sorted(self._grid.query((app, cls), bbox), key=rank.__getitem__):
+                s = iou(state[tid][0], bbox)
                 if s > best_iou:
-                    best_iou, best_track = s, track
-            if best_iou >= self.iou_thresh and best_track:
-                best_track.bbox = det.bbox
-                best_track.last_seen_frame = frame_id
-                updated_tracks.append(best_track)
+                    best_iou, best_id = s, tid
+            if best_iou >= self.iou_thresh and best_id is not None:
+                st = state[best_id]
+                st[0], st[3] = bbox, frame_id
+                self._grid.move(best_id, bbox)
+                out_ids.append(best_id)
             else:
-                new_track = Track(
-                    track_id=self.next_id,
-                    bbox=det.bbox,
-                    cls=det.cls,
-                    approach_id=det.approach_id,
-                    last_seen_frame=frame_id
-                )
+                born[self.next_id] = [bbox, cls, app, frame_id]
+                out_ids.append(self.next_id)
                 self.next_id += 1
-                updated_tracks.append(new_track)
 
+        # Sync the index with the surviving tracks
+        alive = set(out_ids)
+        for tid in [tid for tid in state if tid not in alive]:
+            self._grid.remove(tid)
+            del state[tid]
+        for tid, st in born.items():
+            self._grid.insert(tid, (st[2], st[1]), st[0])
+            state[tid] = st
+
+        out = TrackBatch.empty(len(out_ids))
+        if out_ids:
+            rows = [state[tid] for tid in out_ids]
+            out.data["track_id"] = out_ids
+            out.data["bbox"] = [r[0] for r in rows]
+            out.data["cls"] = [r[1] for r in rows]
+            out.data["approach"] = [r[2] for r in rows]
+            out.data["last_seen_frame"] = [r[3] for r in rows]
         # age-out
-        self.tracks = [t for t in updated_tracks if frame_id - t.last_seen_frame <= self.max_age]
+        self.tracks = out[frame_id - out.last_seen_frame <= self.max_age]
+        return self.tracks
+
+    def coast(self, frame_id: int) -> TrackBatch:
+        """
+        Frame without detections (skipped by the scheduler): no motion
+        model, so tracks stay where they were last seen.
+        """
         return self.tracks
 
 
 # ---------- SORT-style tracker (approach-aware) ----------
-class KalmanBox:
-    def __init__(self, bbox: Tuple[float,float,float,float]):
-        self._init_state(bbox)
-
-    def _init_state(self, bbox):
-        x1, y1, x2, y2 = bbox
-        w, h = (x2 - x1), (y2 - y1)
-        x, y = x1 + w/2, y1 + h/2
-        self.x = np.array([x, y, w, h, 0, 0, 0, 0], dtype=float)  # state
-        self.P = np.eye(8) * 10.0  # covariance
-
-        # Constant velocity model
-        self.F = np.eye(8)
-        dt = 1.0
-        for i in range(4):
-            self.F[i, i+4] = dt
+class KalmanBank:
+    """
+    Constant-velocity Kalman filters for many boxes at once. State is
+    [cx, cy, w, h, vx, vy, vw, vh]; row i of ``x`` (N,8) and ``P`` (N,8,8)
+    belongs to one track. F, Q, H and R are shared by every row.
+    New tracks are appended (add_many) and dead ones dropped with keep(),
+    which compacts the surviving rows in place, in order, so storage stays
+    dense and row order follows the tracker's metadata array.
+    """
+    def __init__(self, capacity: int = 64, dt: float = 1.0):
+        self.n = 0
+        self._x = np.zeros((capacity, 8))
+        self._P = np.zeros((capacity, 8, 8))
 
+        self.F = np.eye(8)
+        self.F[:4, 4:] = np.eye(4) * dt
         self.Q = np.eye(8) * 0.01
         self.H = np.zeros((4, 8))
-        self.H[0,0] = self.H[1,1] = self.H[2,2] = self.H[3,3] = 1.0
+        self.H[:, :4] = np.eye(4)
         self.R = np.eye(4) * 1.0
+        self._P0 = np.eye(8) * 10.0
 
-    def predict(self):
-        self.x = self.F @ self.x
-        self.P = self.F @ self.P @ self.F.T + self.Q
-
-    def update(self, bbox: Tuple[float,float,float,float]):
-        x1, y1, x2, y2 = bbox
-        z = np.array([(x1+x2)/2, (y1+y2)/2, (x2-x1), (y2-y1)], dtype=float)
-        S = self.H @ self.P @ self.H.T + self.R
-        K = self.P @ self.H.T @ np.linalg.inv(S)
-        y = z - self.H @ self.x
-        self.x = self.x + K @ y
-        I = np.eye(8)
-        self.P = (I - K @ self.H) @ self.P
-
-    def bbox(self) -> Tuple[float,float,float,float]:
-        x, y, w, h = self.x[0], self.x[1], self.x[2], self.x[3]
-        x1, y1 = x - w/2, y - h/2
-        x2, y2 = x + w/2, y + h/2
-        return (float(x1), float(y1), float(x2), float(y2))
-
-
-class _STrack:
-    def __init__(self, track_id: int, det: Detection):
-        self.id = track_id
-        self.cls = det.cls
-        self.approach_id = det.approach_id
-        self.kf = KalmanBox(det.bbox)
-        self.last_seen_frame = det.frame_id
+    @property
+    def x(self) -> np.ndarray:
+        return self._x[:self.n]
+
+    @property
+    def P(self) -> np.ndarray:
+        return self._P[:self.n]
+
+    def add_many(self, bboxes: np.ndarray) -> np.ndarray:
+        """
+        Append one row per (K,4) xyxy box; returns the new row indices.
+        """
+        b = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+        k = len(b)
+        if self.n + k > len(self._x):
+            grow = max(len(self._x), self.n + k - len(self._x))
+            self._x = np.concatenate([self._x, np.zeros((grow, 8))])
+            self._P = np.concatenate([self._P, np.zeros((grow, 8, 8))])
+        rows = np.arange(self.n, self.n + k)
+        self._x[rows] = 0.0
+        self._x[rows, 0] = (b[:, 0] + b[:, 2]) / 2
+        self._x[rows, 1] = (b[:, 1] + b[:, 3]) / 2
+        self._x[rows, 2] = b[:, 2] - b[:, 0]
+        self._x[rows, 3] = b[:, 3] - b[:, 1]
+        self._P[rows] = self._P0
+        self.n += k
+        return rows
+
+    def keep(self, mask: np.ndarray):
+        """
+        Drop every row where ``mask`` is False, preserving the order of the rest.
+        """
+        m = int(mask.sum())
+        self._x[:m] = self.x[mask]
+        self._P[:m] = self.P[mask]
+        self.n = m
 
     def predict(self):
-        self.kf.predict()
+        x, P = self.x, self.P
+        x[:] = x @ self.F.T
+        P[:] = self.F @ P @ self.F.T + self.Q
 
-    def update(self, det: Detection):
-        self.kf.update(det.bbox)
-        self.last_seen_frame = det.frame_id
+    def update(self, rows: np.ndarray, bboxes: np.ndarray):
+        """
+        Correct the given rows with (K,4) xyxy measurements in one batch.
+        """
+        if len(rows) == 0:
+            return
+        b = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+        z = np.stack([(b[:, 0] + b[:, 2]) / 2, (b[:, 1] + b[:, 3]) / 2,
+                      b[:, 2] - b[:, 0], b[:, 3] - b[:, 1]], axis=1)
+        x, P = self._x[rows], self._P[rows]
+        HP = self.H @ P                                   # (K,4,8)
+        S = HP @ self.H.T + self.R                        # (K,4,4)
+        K = np.linalg.solve(S, HP).transpose(0, 2, 1)     # P H^T S^-1, (K,8,4)
+        y = z - x @ self.H.T
+        self._x[rows] = x + np.einsum("kij,kj->ki", K, y)
+        self._P[rows] = P - K @ HP
 
-    def bbox(self) -> Tuple[float,float,float,float]:
-        return self.kf.bbox()
+    def bboxes(self) -> np.ndarray:
+        """
+        Current (N,4) xyxy boxes for every row.
+        """
+        c, wh = self.x[:, :2], self.x[:, 2:4]
+        return np.hstack([c - wh / 2, c + wh / 2])
 
 
 class SORTTracker:
-    def __init__(self, iou_thresh=0.3, max_age=15):
+    predicts = True     # coast() moves boxes along their Kalman predictions
+
+    def __init__(self, iou_thresh=0.3, max_age=15, assignment="greedy"):
+        if assignment not in ASSIGNERS:
+            raise ValueError(f"Unknown assignment '{assignment}', expected one of {list(ASSIGNERS)}")
         self.iou_thresh = iou_thresh
         self.max_age = max_age
-        self._tracks: List[_STrack] = []
+        self.assignment = assignment
+        self._assign = ASSIGNERS[assignment]
+        self._bank = KalmanBank()
+        # Per-track metadata; row i <-> self._bank row i (bbox column unused)
+        self._meta = np.zeros(0, dtype=TRACK_DTYPE)
         self._next_id = 1
 
+    def _id_order(self) -> np.ndarray:
+        # Matching and output walk tracks by id (i.e. creation order) so
+        # results do not depend on storage layout.
+        return np.argsort(self._meta["track_id"], kind="stable")
+
+    @staticmethod
+    def _keys(batch) -> np.ndarray:
+        return batch["cls"].astype(np.int64) * 65536 + batch["approach"]
+
+    def _iou_matrix(self, order: np.ndarray, detections: DetectionBatch) -> np.ndarray:
+        """
+        (T,D) IoU between predicted track boxes (rows in ``order``) and
+        detections, zeroed where class or approach differ so those pairs can
+        never be matched.
+        """
+        if not (len(order) and len(detections)):
+            return np.empty((0, 0))
+        iou_m = iou_matrix(self._bank.bboxes()[order], detections.bbox)
+        t_key = self._keys(self._meta[order])
+        d_key = self._keys(detections.data)
+        iou_m[t_key[:, None] != d_key[None, :]] = 0.0
+        return iou_m
+
     def update(self, detections: List[Detection], frame_id: int) -> List[Track]:
+        return self.update_batch(DetectionBatch.from_models(detections), frame_id).to_models()
+
+    def coast(self, frame_id: int) -> TrackBatch:
+        """
+        Frame without detections (skipped by the scheduler): advance every
+        filter one step and return the predicted boxes. Nothing is matched
+        or aged, so skipping fewer than max_age frames never drops a track.
+        """
+        self._bank.predict()
+        return self._output()
+
+    def update_batch(self, detections: DetectionBatch, frame_id: int) -> TrackBatch:
         # Predict all
-        for t in self._tracks:
-            t.predict()
-
-        # Build IoU cost matrix (class + approach aware)
-        if len(self._tracks) and len(detections):
-            cost = np.zeros((len(self._tracks), len(detections)), dtype=float)
-            for i, t in enumerate(self._tracks):
-                tb = t.bbox()
-                for j, d in enumerate(detections):
-                    if t.cls != d.cls or t.approach_id != d.approach_id:
-                        cost[i, j] = 1.0  # force non-match
-                    else:
-                        cost[i, j] = 1.0 - iou(tb, d.bbox)
-        else:
-            cost = np.empty((0, 0))
-
-        # Greedy assign
-        assigned_t, assigned_d = set(), set()
-        pairs = []
-        if cost.size:
-            flat = [(cost[i, j], i, j) for i in range(cost.shape[0]) for j in range(cost.shape[1])]
-            for c, i, j in sorted(flat):
-                if i in assigned_t or j in assigned_d:
-                    continue
-                iou_ = 1.0 - c
-                if iou_ >= self.iou_thresh:
-                    pairs.append((i, j))
-                    assigned_t.add(i)
-                    assigned_d.add(j)
+        self._bank.predict()
+
+        # IoU matrix (class + approach aware) and assignment
+        order = self._id_order()
+        pairs = self._assign(self._iou_matrix(order, detections), self.iou_thresh)
 
         # Update matched
-        for i, j in pairs:
-            self._tracks[i].update(detections[j])
+        matched = np.zeros(len(detections), dtype=bool)
+        if pairs:
+            ti, dj = np.array(pairs).T
+            rows = order[ti]
+            self._bank.update(rows, detections.bbox[dj])
+            self._meta["last_seen_frame"][rows] = detections.frame_id[dj]
+            matched[dj] = True
 
         # Unmatched detections => new tracks
-        for j, d in enumerate(detections):
-            if j not in assigned_d:
-                nt = _STrack(self._next_id, d)
-                self._next_id += 1
-                self._tracks.append(nt)
+        new = detections.data[~matched]
+        if len(new):
+            self._bank.add_many(new["bbox"])
+            meta = np.zeros(len(new), dtype=TRACK_DTYPE)
+            meta["track_id"] = np.arange(self._next_id, self._next_id + len(new))
+            meta["cls"] = new["cls"]
+            meta["approach"] = new["approach"]
+            meta["last_seen_frame"] = new["frame_id"]
+            self._meta = np.concatenate([self._meta, meta])
+            self._next_id += len(new)
 
         # Prune aged tracks
-        alive = []
-        for t in self._tracks:
-            if frame_id - t.last_seen_frame <= self.max_age:
-                alive.append(t)
-        self._tracks = alive
-
-        # Return public Track list
-        out: List[Track] = []
-        for t in self._tracks:
-            out.append(Track(
-                track_id=t.id,
-                bbox=t.bbox(),
-                cls=t.cls,
-                approach_id=t.approach_id,
-                last_seen_frame=t.last_seen_frame
-            ))
-        return out
\ No newline at end of file
+        keep = frame_id - self._meta["last_seen_frame"] <= self.max_age
+        if not keep.all():
+            self._bank.keep(keep)
+            self._meta = self._meta[keep]
+
+        return self._output()
+
+    def _output(self) -> TrackBatch:
+        # Output in id order
+        order = self._id_order()
+        out = self._meta[order]
+        out["bbox"] = self._bank.bboxes()[order]
+        return TrackBatch(out)
+
+
+TRACKERS = ("iou", "sort")
+
+
+def make_tracker(cfg: dict):
+    """
+    Build a tracker from a perception.tracker config block.
+    """
+    name = cfg.get("name", "iou")
+    iou_thresh = cfg.get("iou_thresh", 0.3)
+    if name == "iou":
+        return IOUTracker(iou_thresh=iou_thresh, max_age=cfg.get("max_age", 10))
+    if name == "sort":
+        return SORTTracker(iou_thresh=iou_thresh, max_age=cfg.get("max_age", 15),
+                           assignment=cfg.get("assignment", "greedy"))
+    raise ValueError(f"Unknown tracker '{name}', expected one of {TRACKERS}")
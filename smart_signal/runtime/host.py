@@ -0,0 +1,273 @@
+# smart_signal/runtime/host.py
+"""
+Controller host: the control stage of many junctions in one process.
+
+Lane statistics of every junction live in one LANE_STAT_DTYPE array
+(junction after junction), fed from perception workers' shared-memory stats
+rings or pushed in directly. Each control interval computes the splits and
+max-pressure decisions of all junctions in one batched pass and dispatches
+a ControllerAction per junction. Webster cycle and phase greens of every
+junction are refreshed in the same pass (``phase_splits``).
+
+With ``--perception`` the host also starts every junction's perception
+workers (``start_perception``) and reads their stats rings directly.
+
+    python -m smart_signal.runtime.host [--perception] config/junction_a.yaml config/junction_b.yaml ...
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import yaml
+
+from smart_signal.types import LaneStat, Splits, ControllerAction
+from smart_signal.control.optimizer import SignalOptimizer, proportional_greens
+from smart_signal.control.phases import PhaseGraph, BatchedMaxPressure
+from smart_signal.runtime.shm_ring import RingSpec, ShmRing
+from smart_signal.runtime.slot import LatestSlot
+from smart_signal.runtime.workers import LANE_STAT_DTYPE, MultiProcessOrchestrator
+from smart_signal.utils.timing import WebsterNetwork, SATURATION_VPH
+
+
+def _read_lanes(geojson_path: str) -> List[tuple]:
+    """
+    (lane_id, approach_id, movement) of every lane feature, in file order
+    (the order LaneMapper and the stats rings use), without rasterizing.
+    """
+    with open(geojson_path) as f:
+        fc = json.load(f)
+    return [(p["lane_id"], p["approach_id"], p.get("movement", "through"))
+            for p, g in ((feat.get("properties", {}), feat["geometry"]) for feat in fc.get("features", []))
+            if p.get("type", "lane") == "lane" and g["type"] == "Polygon"]
+
+
+class ControllerHost:
+    """
+    Takes a list of nested config.yaml dicts, one per junction; each needs
+    ``intersection.id`` and ``control.phases``.
+    """
+    def __init__(self, configs: Sequence[dict], cycle_s: float = 60):
+        self.configs = list(configs)
+        self.cycle_s = cycle_s
+        self.junction_ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        lane_ids, lane_approach, lane_movement, lane_junction = [], [], [], []
+        graphs, timing = [], {k: [] for k in ("min_green_s", "max_green_s", "yellow_s", "all_red_s",
+                                             "fairness_max_skip")}
+        defaults = {"min_green_s": 7, "max_green_s": 60, "yellow_s": 3, "all_red_s": 1, "fairness_max_skip": 3}
+        lost_time, saturation, lane_saturation, lanes_by_junction = [], [], [], []
+        # junction -> approach -> (rows in that approach's stats ring, rows in self.stats)
+        self._layout: Dict[str, Dict[str, tuple]] = {}
+
+        for ji, cfg in enumerate(configs):
+            jid = cfg["intersection"]["id"]
+            if jid in self.index:
+                raise ValueError(f"duplicate junction id '{jid}'")
+            ctrl = cfg.get("control", {})
+            if not ctrl.get("phases"):
+                raise ValueError(f"junction '{jid}' has no control.phases")
+            self.junction_ids.append(jid)
+            self.index[jid] = ji
+            graphs.append(PhaseGraph.from_config(ctrl["phases"]))
+            for k in timing:
+                timing[k].append(ctrl.get(k, defaults[k]))
+            web = ctrl.get("webster", {})
+            lost_time.append(ctrl.get("lost_time_s", 4))
+            saturation.append(web.get("saturation_vph", SATURATION_VPH))
+            lane_saturation.append(web.get("lane_saturation_vph") or {})
+            lanes_by_junction.append([])
+
+            # Same lane order as MultiProcessOrchestrator.lane_stats: each
+            # approach's own lanes from its (possibly shared) geojson
+            default_geojson = cfg.get("lanes", {}).get("geojson_path")
+            self._layout[jid] = {}
+            for ap in cfg["intersection"]["approaches"]:
+                lanes = _read_lanes(ap.get("lane_geojson", default_geojson))
+                own = [i for i, (_, a, _) in enumerate(lanes) if a == ap["id"]]
+                self._layout[jid][ap["id"]] = (np.array(own, dtype=np.int64),
+                                               np.arange(len(lane_ids), len(lane_ids) + len(own)))
+                lanes_by_junction[-1] += [lanes[i] for i in own]
+                for i in own:
+                    lane_ids.append(lanes[i][0])
+                    lane_approach.append(lanes[i][1])
+                    lane_movement.append(lanes[i][2])
+                    lane_junction.append(ji)
+
+        n = len(self.junction_ids)
+        self.lane_ids = lane_ids
+        self.lane_junction = np.array(lane_junction, dtype=np.int64)
+        self.lane_offset = np.searchsorted(self.lane_junction, np.arange(n + 1))
+        self.stats = np.zeros(len(lane_ids), dtype=LANE_STAT_DTYPE)
+        for name in ("queue_m", "speed_mps"):
+            self.stats[name] = np.nan
+
+        self.controller = BatchedMaxPressure(graphs, **timing)
+        # each lane's column in the stacked movement vector (-1 = not in any phase)
+        self._lane_movement = np.full(len(lane_ids), -1, dtype=np.int64)
+        for ji, g in enumerate(graphs):
+            lo, hi = self.lane_offset[ji], self.lane_offset[ji + 1]
+            col = g.lane_index(lane_approach[lo:hi], lane_movement[lo:hi])
+            self._lane_movement[lo:hi] = np.where(col >= 0, col + self.controller.movement_offset[ji], -1)
+
+        self.webster = WebsterNetwork(graphs, lanes_by_junction, lost_time_s=lost_time,
+                                      min_green_s=timing["min_green_s"], max_green_s=timing["max_green_s"],
+                                      saturation_vph=saturation, lane_saturation_vph=lane_saturation)
+        self.greens = np.zeros(len(lane_ids))
+        self.webster_cycle_s = np.zeros(n)
+        self.phase_greens = np.zeros(len(self.webster.phase_junction))
+        self.phase = np.zeros(n, dtype=np.int64)
+        self.action_slots = {jid: LatestSlot() for jid in self.junction_ids}
+        self.emergency_slots = {jid: LatestSlot([]) for jid in self.junction_ids}
+        self.on_action: List[Callable[[str, ControllerAction], None]] = []
+        self._sources = []     # (ring, seen_seq, src rows, dst rows)
+        self._perception: List[MultiProcessOrchestrator] = []
+
+    @classmethod
+    def load(cls, paths: Sequence[str], **kw) -> "ControllerHost":
+        configs = []
+        for path in paths:
+            with open(path) as f:
+                configs.append(yaml.safe_load(f))
+        return cls(configs, **kw)
+
+    # ---------- ingest ----------
+    def _rows(self, junction_id: str) -> np.ndarray:
+        ji = self.index[junction_id]
+        return np.arange(self.lane_offset[ji], self.lane_offset[ji + 1])
+
+    def attach(self, junction_id: str, approach_id: str, spec: RingSpec):
+        """
+        Pull one perception worker's stats ring (laid out over that
+        approach's geojson) into the host array on every step.
+        """
+        src_rows, dst_rows = self._layout[junction_id][approach_id]
+        self._sources.append([ShmRing.attach(spec), 0, src_rows, dst_rows])
+
+    def start_perception(self):
+        """
+        Start the perception workers of every junction (a
+        MultiProcessOrchestrator each, of which only the rings and worker
+        processes are used) and attach their stats rings. close() stops them.
+        """
+        for jid, cfg in zip(self.junction_ids, self.configs):
+            mpo = MultiProcessOrchestrator(cfg)
+            self._perception.append(mpo)
+            for aid, rings in mpo.rings.items():
+                self.attach(jid, aid, rings["stats"].spec)
+            mpo.start()
+
+    def update(self, junction_id: str, stats: np.ndarray):
+        """
+        Push one junction's LANE_STAT_DTYPE rows (host lane order).
+        """
+        self.stats[self._rows(junction_id)] = stats
+
+    def update_lane_stats(self, junction_id: str, lane_stats: List[LaneStat]):
+        rows = self._rows(junction_id)
+        by_id = {self.lane_ids[r]: r for r in rows.tolist()}
+        for ls in lane_stats:
+            r = by_id.get(ls.lane_id)
+            if r is not None:
+                self.stats[r] = (ls.queue_len, ls.arrival_rate_vph, ls.occupancy, ls.spillback,
+                                 np.nan if ls.queue_m is None else ls.queue_m,
+                                 np.nan if ls.speed_mps is None else ls.speed_mps,
+                                 ls.arrival_rate_vph if ls.arrival_pcu_vph is None else ls.arrival_pcu_vph)
+
+    def poll(self):
+        for src in self._sources:
+            ring, seen, src_rows, dst_rows = src
+            got = ring.read_latest(seen)
+            if got is not None:
+                src[1] = got[0]
+                self.stats[dst_rows] = got[1][src_rows]
+
+    # ---------- control ----------
+    def step(self, t: Optional[float] = None, downstream: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        One batched control pass over every junction. Returns the (J,)
+        phase index each junction has (or is about to get) the green for.
+        """
+        t = time.monotonic() if t is None else t
+        self.poll()
+        c = self.controller
+        q = self.stats["queue_len"].astype(float)
+        self.greens = proportional_greens(q, self.lane_junction, len(self.junction_ids),
+                                          c.min_green_s, c.max_green_s, self.cycle_s)
+        self.webster_cycle_s, self.phase_greens, _ = self.webster.compute(self.stats["arrival_pcu_vph"])
+        ok = self._lane_movement >= 0
+        up = np.bincount(self._lane_movement[ok], weights=q[ok], minlength=c.n_movements)
+        self.phase = c.tick(t, c.pressure(up, downstream))
+
+        for jid, action in zip(self.junction_ids, c.actions(t)):
+            self.action_slots[jid].publish(action)
+            for fn in self.on_action:
+                fn(jid, action)
+        return self.phase
+
+    def splits(self, junction_id: str) -> Splits:
+        """
+        Lane splits of one junction from the last step (emergency priority applied).
+        """
+        rows = self._rows(junction_id)
+        splits = Splits(cycle_s=self.cycle_s, greens_s={self.lane_ids[r]: float(self.greens[r]) for r in rows.tolist()})
+        events = self.emergency_slots[junction_id].value
+        if events:
+            ji = self.index[junction_id]
+            opt = SignalOptimizer(min_green_s=self.controller.min_green_s[ji], max_green_s=self.controller.max_green_s[ji])
+            splits = opt.apply_emergency_priority(splits, events)
+        return splits
+
+    def phase_splits(self, junction_id: str) -> Splits:
+        """
+        Webster cycle and per-phase greens of one junction from the last step.
+        """
+        ji = self.index[junction_id]
+        lo, hi = self.webster.phase_offset[ji], self.webster.phase_offset[ji + 1]
+        return Splits(cycle_s=float(self.webster_cycle_s[ji]),
+                      greens_s=dict(zip(self.webster.phase_ids[ji], self.phase_greens[lo:hi].tolist())))
+
+    def run(self, interval_s: float = 1.0, duration_s: Optional[float] = None, verbose: bool = True):
+        t_end = None if duration_s is None else time.monotonic() + duration_s
+        deadline = time.monotonic()
+        try:
+            while t_end is None or time.monotonic() < t_end:
+                self.step()
+                if verbose:
+                    print({jid: self.action_slots[jid].value.phase_id for jid in self.junction_ids})
+                deadline = max(deadline + interval_s, time.monotonic())
+                time.sleep(max(deadline - time.monotonic(), 0))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        for ring, *_ in self._sources:
+            ring.close()
+        self._sources = []
+        for mpo in self._perception:
+            mpo.shutdown()
+        self._perception = []
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the control stage of many junctions in one process")
+    ap.add_argument("configs", nargs="+", help="one config.yaml per junction")
+    ap.add_argument("--interval", type=float, default=1.0, help="control interval (s)")
+    ap.add_argument("--duration", type=float, default=None, help="seconds to run (default: forever)")
+    ap.add_argument("--perception", action="store_true", help="also run each junction's perception workers")
+    args = ap.parse_args(argv)
+    host = ControllerHost.load(args.configs)
+    if args.perception:
+        try:
+            host.start_perception()
+        except BaseException:
+            host.close()
+            raise
+    host.run(args.interval, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,224 @@
+import os
+import threading
 import time
 import cv2
 import numpy as np
 from smart_signal.perception.camera import CameraStream
-from smart_signal.perception.detector import YOLODetector, StubDetector
-from smart_signal.perception.tracker import IOUTracker
+from smart_signal.perception.detector import make_detector, RoiDetector
+from smart_signal.perception.tracker import make_tracker
+from smart_signal.perception.scheduler import make_scheduler
 from smart_signal.perception.lane_mapper import LaneMapper
+from smart_signal.perception.ground import GroundCalibration, GroundGrid
+from smart_signal.perception.lane_stats import LaneStatsEngine
 from smart_signal.control.optimizer import SignalOptimizer
-from smart_signal.types import EmergencyEvent
+from smart_signal.control.phases import PhaseGraph, MaxPressureController
+from smart_signal.control.forecast import ArrivalForecaster, SplitPlanner, forecast_lane_stats
+from smart_signal.runtime.slot import LatestSlot
+from smart_signal.types import EmergencyEvent, approach_code
 
 class Orchestrator:
     def __init__(self, config):
         self.cfg = config
-        self.cam = CameraStream(config["camera_source"], fps=config.get("fps", None))
-        # Choose detector type
-        if config.get("use_stub", False):
-            self.detector = StubDetector()
-        else:
-            self.detector = YOLODetector(model_path=config.get("model_path", "yolov8n.pt"),
-                                         conf_thresh=config.get("conf_thresh", 0.3))
-        self.tracker = IOUTracker(iou_thresh=0.3, max_age=10)
+        # Threaded capture with a 1-frame drop-oldest buffer: always process the freshest frame
+        self.cam = CameraStream(config["camera_source"], fps=config.get("fps", None),
+                                threaded=config.get("threaded_capture", True),
+                                buffer_size=config.get("capture_buffer", 1),
+                                drop_policy=config.get("capture_drop_policy", "oldest"))
+        # Choose detector type: "detector" is a perception.detector block, else the legacy flat keys
+        det_cfg = config.get("detector") or {
+            "name": "stub" if config.get("use_stub", False) else "yolov8",
+            "model_path": config.get("model_path", "yolov8n.pt"),
+            "conf_thresh": config.get("conf_thresh", 0.3),
+        }
+        self.detector = make_detector(det_cfg)
+        self.tracker = make_tracker(config.get("tracker") or {"name": "iou", "iou_thresh": 0.3, "max_age": 10})
+        # Optional adaptive frame skipping: skipped frames are bridged by the
+        # tracker's predictions (needs the "sort" tracker so boxes keep moving)
+        self.scheduler = make_scheduler(config.get("frame_skip"), self.tracker)
+        self.camera_id = config.get("camera_id", "cam0")
         self.lane_mapper = LaneMapper(config["lane_geojson"])
+        roi = det_cfg.get("roi") or {}
+        if roi.get("enabled", False):
+            self.detector = RoiDetector.from_lanes(self.detector, self.lane_mapper.lane_polygons.values(),
+                                                   margin_px=roi.get("margin_px", 16), tiles=roi.get("tiles", 1))
+        # Optional pixel->ground calibration for metric queue lengths and speeds
+        # (flat key, else the lanes block of config.yaml)
+        self.ground = None
+        lanes_cfg = config.get("lanes") or {}
+        calib_path = config.get("calibration_path", lanes_cfg.get("calibration_path"))
+        if calib_path:
+            cache_dir = config.get("calibration_cache_dir", lanes_cfg.get("calibration_cache_dir", "data/calibration/cache"))
+            self.ground = GroundGrid.load_or_build(GroundCalibration.load(calib_path), cache_dir)
+        # Streaming lane statistics, updated from the tracks that changed each frame
+        self.lane_stats = LaneStatsEngine(self.lane_mapper, self.ground,
+                                          stopline_gap_m=config.get("stopline_gap_m", 3.0), pcu=config.get("pcu"))
         self.optimizer = SignalOptimizer(min_green_s=7, max_green_s=60)
+        # Max-pressure phase control when phases are configured (control.phases layout)
+        self.controller = None
+        if config.get("strategy") == "max_pressure" and config.get("phases"):
+            self.controller = MaxPressureController(
+                PhaseGraph.from_config(config["phases"]), min_green_s=config.get("min_green_s", 7),
+                max_green_s=config.get("max_green_s", 60), yellow_s=config.get("yellow_s", 3),
+                all_red_s=config.get("all_red_s", 1), fairness_max_skip=config.get("fairness_max_skip", 3))
 
-    def run(self):
-        print("Starting orchestrator loop...")
-        for fid, ts, frame in self.cam.frames():
-            # 1) Detect vehicles with placeholder approach_id
-            raw_detections = self.detector.infer(frame, fid, "unknown")
+        # Perception publishes lane stats at camera rate; control samples them
+        # on its own timer and publishes splits back. Neither side waits.
+        self.control_interval_s = config.get("control_interval_s", 1.0)
+        self.display = config.get("display", True)
+        self.lane_stats_slot = LatestSlot()
+        self.emergency_slot = LatestSlot([])
+        self.splits_slot = LatestSlot()
+        self.action_slot = LatestSlot()
+        self._stop = threading.Event()
+        self._control_thread = None
+        # Optional arrival forecasting: a planner thread keeps the next
+        # cycle's splits ready and control_step just picks them up
+        fc = config.get("forecast") or {}
+        self.forecaster = self.planner = None
+        if fc.get("enabled", False):
+            self.forecaster = ArrivalForecaster(len(self.lane_mapper.lane_ids), bin_s=fc.get("bin_s", 900),
+                                                history_weeks=fc.get("history_weeks", 4))
+            self.forecast_horizon_s = fc.get("horizon_s", 30.0)
+            self.forecast_history_path = fc.get("history_path")
+            if self.forecast_history_path and os.path.exists(self.forecast_history_path):
+                self.forecaster.load(self.forecast_history_path)
+            self.planner = SplitPlanner(self._plan_next_splits, fc.get("plan_interval_s", self.control_interval_s))
+        # LaneMapper approach index (-1 = outside, via the trailing entry) -> interned approach code
+        self._approach_codes = np.array([approach_code(a) for a in self.lane_mapper.approach_ids] + [-1], dtype=np.int16)
+        self._lane_pts = {lane_id: np.array([(int(x), int(y)) for x, y in poly.exterior.coords], dtype=np.int32)
+                          for lane_id, poly in self.lane_mapper.lane_polygons.items()}
+
+    # ---------- perception stage (camera rate) ----------
+    def perceive(self, fid, ts, frame):
+        if self.scheduler is not None and not self.scheduler.should_detect(self.camera_id, frame):
+            # Skipped frame: no detector, tracks coast on their predictions
+            tracks = self.tracker.coast(fid)
+            self.lane_stats_slot.publish(self.lane_stats.update(tracks, fid, ts, coasted=True))
+            return tracks
 
-            # Map each detection to an approach
-            for det in raw_detections:
-                cx = (det.bbox[0] + det.bbox[2]) / 2
-                cy = (det.bbox[1] + det.bbox[3]) / 2
-                det.approach_id = self.lane_mapper.get_approach_for_point(cx, cy)
+        # 1) Detect vehicles with placeholder approach_id
+        if self.scheduler is not None:
+            raw_detections = self.scheduler.timed(self.camera_id, self.detector.detect, frame, fid, "unknown")
+        else:
+            raw_detections = self.detector.detect(frame, fid, "unknown")
 
-        # Filter out anything not in a lane polygon
-            detections = [d for d in raw_detections if d.approach_id != "unknown"]
+        # Map each detection to an approach (one batched lookup) and drop
+        # anything not in a lane polygon
+        _, app_idx = self.lane_mapper.map_centroids(raw_detections.bbox)
+        raw_detections.approach[:] = self._approach_codes[app_idx]
+        detections = raw_detections[app_idx >= 0]
 
         # 2) Track vehicles
-            tracks = self.tracker.update(detections, fid)
+        tracks = self.tracker.update_batch(detections, fid)
 
-        # 3) Map to lanes
-            lane_assignments = self.lane_mapper.assign_tracks(tracks)
-            lane_stats = self.lane_mapper.compute_lane_stats(lane_assignments)
+        # 3) Lane statistics, handed to the control stage
+        self.lane_stats_slot.publish(self.lane_stats.update(tracks, fid, ts))
+        return tracks
 
-        # 4) Get emergency events (placeholder: none for now)
-            emergencies = []
+    def set_signal_state(self, state):
+        """
+        Current signal indication ("red" | "yellow" | "green") seen by the
+        camera; frame skipping detects sparsely on red and densely on green.
+        """
+        if self.scheduler is not None:
+            self.scheduler.set_signal(self.camera_id, state)
 
-        # 5) Optimise signal timings
+    # ---------- control stage (fixed timer) ----------
+    def control_step(self):
+        """
+        One control decision from the latest lane stats. Returns the new
+        splits, or None if perception has not published anything yet.
+        """
+        lane_stats = self.lane_stats_slot.value
+        if lane_stats is None:
+            return None
+        splits = self.planner.latest if self.planner is not None else None
+        if splits is None:
             splits = self.optimizer.compute_splits(lane_stats)
-            splits = self.optimizer.apply_emergency_priority(splits, emergencies)
-
-        # 6) Draw overlay
-            self._draw_overlay(frame, lane_assignments, splits)
-
-        # 7) Show frame
-            cv2.imshow("Traffic AI Orchestrator", frame)
-
-        # 8) Quit key
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                print("Stopping orchestrator...")
-                break
-
-        self.cam.release()
-        cv2.destroyAllWindows()
-
-    def _draw_overlay(self, frame, lane_assignments, splits):
-        # Draw lane polygons
-        for lane_id, poly in self.lane_mapper.lane_polygons.items():
-            pts = [(int(x), int(y)) for x, y in poly.exterior.coords]
-            cv2.polylines(frame, [np.array(pts, dtype=np.int32)], isClosed=True, color=(255, 0, 0), thickness=2)
-            # Show green time decision
-            green_time = splits.greens_s.get(lane_id, 0)
-            cv2.putText(frame, f"{lane_id}: {green_time:.1f}s",
-                        pts[0], cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-        # Draw tracked vehicles
-        for lane_id, tracks in lane_assignments.items():
-            for tr in tracks:
-                x1, y1, x2, y2 = map(int, tr.bbox)
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, f"{tr.cls} ID{tr.track_id}",
-                            (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
\ No newline at end of file
+        elif self.emergency_slot.value:
+            splits = splits.model_copy(deep=True)   # the planner's copy stays untouched
+        splits = self.optimizer.apply_emergency_priority(splits, self.emergency_slot.value)
+        self.splits_slot.publish(splits)
+        if self.controller is not None:
+            self.action_slot.publish(self.controller.step(time.monotonic(), lane_stats))
+            # the phase decides how sparsely the camera's approaches are detected
+            self.set_signal_state(self.controller.signal_state(self.lane_mapper.approach_ids))
+        return splits
+
+    def _control_loop(self):
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            self.control_step()
+            deadline += self.control_interval_s
+            delay = deadline - time.monotonic()
+            if delay < 0:           # overran: re-anchor rather than bursting
+                deadline, delay = time.monotonic(), 0
+            self._stop.wait(delay)
+
+    def _plan_next_splits(self):
+        """
+        Planner thread: feed the forecaster and plan splits for the lane
+        stats expected forecast_horizon_s ahead.
+        """
+        lane_stats = self.lane_stats_slot.value
+        if lane_stats is None:
+            return None
+        now = time.time()
+        self.forecaster.observe(now, np.array([ls.arrival_rate_vph for ls in lane_stats]))
+        rates = self.forecaster.forecast(now, self.forecast_horizon_s)
+        return self.optimizer.compute_splits(forecast_lane_stats(lane_stats, rates, self.forecast_horizon_s))
+
+    def start_control(self):
+        if self._control_thread is None:
+            self._stop.clear()
+            self._control_thread = threading.Thread(target=self._control_loop, name="control", daemon=True)
+            self._control_thread.start()
+        if self.planner is not None:
+            self.planner.start()
+
+    def stop_control(self):
+        self._stop.set()
+        if self._control_thread is not None:
+            self._control_thread.join(timeout=2.0)
+            self._control_thread = None
+        if self.planner is not None:
+            self.planner.stop()
+            if self.forecast_history_path:
+                self.forecaster.save(self.forecast_history_path)
+
+    def run(self):
+        print("Starting orchestrator loop...")
+        self.start_control()
+        try:
+            for fid, ts, frame in self.cam.frames():
+                tracks = self.perceive(fid, ts, frame)
+                if not self.display:
+                    continue
+
+                self._draw_overlay(frame, tracks, self.splits_slot.value)
+                cv2.imshow("Traffic AI Orchestrator", frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    print("Stopping orchestrator...")
+                    break
+        finally:
+            self.stop_control()
+            self.cam.release()
+            if self.scheduler is not None:
+                print(self.scheduler.report())
+            if self.display:
+                cv2.destroyAllWindows()
+
+    def _draw_overlay(self, frame, tracks, splits):
+        # Draw lane polygons and the latest green time decision
+        greens = splits.greens_s if splits is not None else {}
+        for lane_id, pts in self._lane_pts.items():
+            cv2.polylines(frame, [pts], isClosed=True, color=(255, 0, 0), thickness=2)
+            cv2.putText(frame, f"{lane_id}: {greens.get(lane_id, 0):.1f}s",
+                        (int(pts[0][0]), int(pts[0][1])), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+        # Draw tracked vehicles (already filtered to lane polygons)
+        for (x1, y1, x2, y2), cls, tid in zip(tracks.bbox.astype(int).tolist(), tracks.class_names(),
+                                              tracks.track_id.tolist()):
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(frame, f"{cls} ID{tid}",
+                        (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
@@ -0,0 +1,102 @@
+# smart_signal/runtime/shm_ring.py
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RingSpec:
+    """
+    Everything a second process needs to attach to a ring (picklable).
+    """
+    name: str
+    shape: Tuple[int, ...]
+    dtype: np.dtype
+    slots: int
+
+
+class ShmRing:
+    """
+    Fixed-shape ring buffer in one multiprocessing.shared_memory block,
+    one producer and any number of latest-value readers. Nothing is pickled:
+    the writer copies into the next slot, readers copy out of the newest.
+
+    Layout: int64 header [head_seq, slot_seq[slots], slot_n[slots]] followed
+    by ``slots`` arrays of ``shape``/``dtype``. Each slot is stamped with
+    its sequence number seqlock-style (-1 while being written) and readers
+    retry if the stamp changes under them, so a reader never returns a torn
+    slot. ``n`` lets variable-length payloads (e.g. detections) use the
+    first n rows of a slot.
+    """
+    def __init__(self, shape, dtype, slots: int = 4, name: Optional[str] = None, create: bool = True):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        hdr_bytes = 8 * (1 + 2 * slots)
+        slot_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=hdr_bytes + slots * slot_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._owner = create
+        self._hdr = np.ndarray((1 + 2 * slots,), dtype=np.int64, buffer=self.shm.buf)
+        self._data = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=hdr_bytes)
+        if create:
+            self._hdr[:] = 0
+
+    @property
+    def spec(self) -> RingSpec:
+        return RingSpec(self.shm.name, self.shape, self.dtype, self.slots)
+
+    @classmethod
+    def attach(cls, spec: RingSpec) -> "ShmRing":
+        return cls(spec.shape, spec.dtype, spec.slots, name=spec.name, create=False)
+
+    @property
+    def seq(self) -> int:
+        return int(self._hdr[0])
+
+    def write(self, arr, n: Optional[int] = None) -> int:
+        seq = int(self._hdr[0]) + 1
+        slot = seq % self.slots
+        stamp, count = 1 + slot, 1 + self.slots + slot
+        self._hdr[stamp] = -1
+        if n is None:
+            self._data[slot] = arr
+            n = self.shape[0] if self.shape else 1
+        else:
+            self._data[slot, :n] = arr[:n]
+        self._hdr[count] = n
+        self._hdr[stamp] = seq
+        self._hdr[0] = seq
+        return seq
+
+    def read_latest(self, seen_seq: int = 0, out: Optional[np.ndarray] = None, retries: int = 8):
+        """
+        Copy of the newest slot as (seq, array, n), or None if nothing newer
+        than ``seen_seq`` has been written (or the writer kept lapping us).
+        """
+        for _ in range(retries):
+            seq = int(self._hdr[0])
+            if seq <= seen_seq:
+                return None
+            slot = seq % self.slots
+            stamp, count = 1 + slot, 1 + self.slots + slot
+            if self._hdr[stamp] != seq:
+                continue
+            n = int(self._hdr[count])
+            if out is None:
+                out = np.empty(self.shape, dtype=self.dtype)
+            np.copyto(out, self._data[slot])
+            if self._hdr[stamp] == seq:
+                return seq, out, n
+        return None
+
+    def close(self):
+        # drop our views first so the mmap can actually be released
+        self._hdr = self._data = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
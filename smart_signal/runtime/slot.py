@@ -0,0 +1,31 @@
+# smart_signal/runtime/slot.py
+from typing import Any, Optional, Tuple
+
+
+class LatestSlot:
+    """
+    Single-writer latest-value slot. The writer replaces one reference with
+    a (seq, value) tuple, which is atomic under the GIL, so readers never
+    block the writer and always see a consistent pair. Readers that are
+    slower than the writer simply miss intermediate values.
+    """
+    __slots__ = ("_item",)
+
+    def __init__(self, value: Any = None):
+        self._item: Tuple[int, Any] = (0, value)
+
+    def publish(self, value: Any) -> int:
+        seq = self._item[0] + 1
+        self._item = (seq, value)
+        return seq
+
+    def read(self) -> Tuple[int, Any]:
+        return self._item
+
+    def read_if_newer(self, seen_seq: int) -> Optional[Tuple[int, Any]]:
+        item = self._item
+        return item if item[0] > seen_seq else None
+
+    @property
+    def value(self) -> Any:
+        return self._item[1]
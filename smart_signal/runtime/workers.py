@@ -0,0 +1,421 @@
+# smart_signal/runtime/workers.py
+"""
+Multi-process perception: one worker process per approach camera, each
+running CameraStream -> detector -> tracker -> LaneStatsEngine, so the four
+pipelines use separate cores instead of sharing one GIL. With
+runtime.batched_detection a single worker runs one batched detector over
+all cameras (BatchedDetector) and the per-approach rest. Workers publish
+lane stats, tracks and (optionally) frames through shared-memory rings; the
+parent only aggregates LaneStats and runs the optimizer on its timer.
+
+    python -m smart_signal.runtime.workers --config config/config.yaml
+"""
+import argparse
+import multiprocessing as mp
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import yaml
+
+from smart_signal.types import LaneStat, TrackBatch, DetectionBatch, TRACK_DTYPE, approach_code
+from smart_signal.perception.lane_mapper import LaneMapper
+from smart_signal.control.optimizer import SignalOptimizer
+from smart_signal.control.phases import PhaseGraph, MaxPressureController
+from smart_signal.runtime.shm_ring import RingSpec, ShmRing
+from smart_signal.runtime.slot import LatestSlot
+
+LANE_STAT_DTYPE = np.dtype([("queue_len", "i4"), ("arrival_rate_vph", "f4"), ("occupancy", "f4"),
+                            ("spillback", "?"), ("queue_m", "f4"), ("speed_mps", "f4"),
+                            ("arrival_pcu_vph", "f4")])
+
+
+@dataclass
+class WorkerSpec:
+    approach_id: str
+    camera_source: str
+    lane_geojson: str
+    stats_ring: RingSpec
+    tracks_ring: RingSpec
+    frames_ring: Optional[RingSpec] = None
+    fps: Optional[float] = None
+    detector: Optional[dict] = None      # perception.detector block
+    tracker: Optional[dict] = None       # perception.tracker block
+    frame_skip: Optional[dict] = None    # perception.frame_skip block
+    calibration_path: Optional[str] = None
+    calibration_cache_dir: str = "data/calibration/cache"
+    stopline_gap_m: float = 3.0
+    cv_threads: int = 1
+    pcu: Optional[dict] = None           # control.webster.pcu
+
+
+class _ApproachPipeline:
+    """
+    Everything downstream of the detector for one approach: frame-skip
+    scheduler, tracker, lane statistics and the shared-memory rings.
+    """
+    def __init__(self, spec: WorkerSpec):
+        from smart_signal.perception.tracker import make_tracker
+        from smart_signal.perception.scheduler import make_scheduler
+        from smart_signal.perception.ground import GroundCalibration, GroundGrid
+        from smart_signal.perception.lane_stats import LaneStatsEngine
+
+        self.spec = spec
+        self.stats_ring = ShmRing.attach(spec.stats_ring)
+        self.tracks_ring = ShmRing.attach(spec.tracks_ring)
+        self.frames_ring = ShmRing.attach(spec.frames_ring) if spec.frames_ring else None
+        self.tracker = make_tracker(spec.tracker or {})
+        self.scheduler = make_scheduler(spec.frame_skip, self.tracker)
+        self.mapper = LaneMapper(spec.lane_geojson)
+        ground = None
+        if spec.calibration_path:
+            ground = GroundGrid.load_or_build(GroundCalibration.load(spec.calibration_path), spec.calibration_cache_dir)
+        self.engine = LaneStatsEngine(self.mapper, ground, stopline_gap_m=spec.stopline_gap_m, pcu=spec.pcu)
+        # only lanes of this approach count for this camera
+        self.lane_ok = np.array([a == spec.approach_id for a in self.mapper.lane_approach] + [False])
+        self.stats = np.zeros(len(self.mapper.lane_ids), dtype=LANE_STAT_DTYPE)
+
+    def roi_detector(self, detector):
+        roi = (self.spec.detector or {}).get("roi") or {}
+        if not roi.get("enabled", False):
+            return detector
+        from smart_signal.perception.detector import RoiDetector
+        m = self.mapper
+        own = [m.lane_polygons[lane_id] for lane_id, a in zip(m.lane_ids, m.lane_approach) if a == self.spec.approach_id]
+        return RoiDetector.from_lanes(detector, own or m.lane_polygons.values(),
+                                      margin_px=roi.get("margin_px", 16), tiles=roi.get("tiles", 1))
+
+    def should_detect(self, frame) -> bool:
+        return self.scheduler is None or self.scheduler.should_detect(self.spec.approach_id, frame)
+
+    def detect(self, detector, fid, frame):
+        """
+        Run ``detector`` on one frame, timed for the frame-skip savings report.
+        """
+        aid = self.spec.approach_id
+        if self.scheduler is None:
+            return detector.detect(frame, fid, aid)
+        return self.scheduler.timed(aid, detector.detect, frame, fid, aid)
+
+    def publish(self, fid, ts, frame, dets):
+        """
+        Track ``dets`` (None = skipped frame, tracks coast) and write stats,
+        tracks and optionally the frame to the rings.
+        """
+        if dets is not None:
+            lanes, _ = self.mapper.map_centroids(dets.bbox)
+            tracks = self.tracker.update_batch(dets[self.lane_ok[lanes]], fid)
+        else:
+            tracks = self.tracker.coast(fid)
+
+        stats = self.stats
+        for i, ls in enumerate(self.engine.update(tracks, fid, ts, coasted=dets is None)):
+            stats[i] = (ls.queue_len, ls.arrival_rate_vph, ls.occupancy, ls.spillback,
+                        np.nan if ls.queue_m is None else ls.queue_m,
+                        np.nan if ls.speed_mps is None else ls.speed_mps, ls.arrival_pcu_vph)
+        self.stats_ring.write(stats)
+
+        n = min(len(tracks), self.tracks_ring.shape[0])
+        self.tracks_ring.write(tracks.data, n)
+
+        if self.frames_ring is not None:
+            h, w = self.frames_ring.shape[:2]
+            if frame.shape[:2] != (h, w):
+                frame = cv2.resize(frame, (w, h))
+            self.frames_ring.write(frame)
+
+    def close(self):
+        if self.scheduler is not None:
+            print(self.scheduler.report())
+        self.stats_ring.close()
+        self.tracks_ring.close()
+        if self.frames_ring is not None:
+            self.frames_ring.close()
+
+
+def perception_worker(spec: WorkerSpec, stop):
+    """
+    Process entry point for one approach. Runs until the camera ends or
+    ``stop`` (a multiprocessing.Event) is set.
+    """
+    from smart_signal.perception.camera import CameraStream
+    from smart_signal.perception.detector import make_detector
+
+    cv2.setNumThreads(spec.cv_threads)
+    pipe = _ApproachPipeline(spec)
+    detector = pipe.roi_detector(make_detector(spec.detector or {}))
+    cam = CameraStream(spec.camera_source, fps=spec.fps, threaded=True)
+    try:
+        for fid, ts, frame in cam.frames():
+            if stop.is_set():
+                break
+            dets = pipe.detect(detector, fid, frame) if pipe.should_detect(frame) else None
+            pipe.publish(fid, ts, frame, dets)
+    finally:
+        cam.release()
+        pipe.close()
+
+
+def _detect_batch(batched, pipes: Dict[str, _ApproachPipeline], got: Dict[str, tuple]) -> Dict[str, DetectionBatch]:
+    """
+    Detect the collected frames that their approach's scheduler does not
+    skip, in one pass; each detected approach is charged an equal share of
+    the pass for the frame-skip savings report.
+    """
+    todo = {aid: item for aid, item in got.items() if pipes[aid].should_detect(item[2])}
+    if not todo:
+        return {}
+    t0 = time.perf_counter()
+    dets = batched.detect(todo)
+    ms = (time.perf_counter() - t0) * 1e3 / len(todo)
+    for aid in todo:
+        if pipes[aid].scheduler is not None:
+            pipes[aid].scheduler.record(aid, ms)
+    return dets
+
+
+def batched_perception_worker(specs: List[WorkerSpec], stop, max_wait_s: float = 0.05):
+    """
+    Process entry point for all approaches at once: one detector, fed the
+    latest frame of every camera through a BatchedDetector, so each forward
+    pass covers all cameras (one model in memory, full batches on a GPU).
+    Tracking and lane statistics stay per approach. Runs until every camera
+    ends or ``stop`` is set.
+    """
+    from smart_signal.perception.camera import CameraStream
+    from smart_signal.perception.detector import make_detector, BatchedDetector
+
+    det_cfg = specs[0].detector or {}
+    if (det_cfg.get("roi") or {}).get("enabled", False):
+        # RoiDetector crops every frame to one region; cameras differ
+        raise ValueError("perception.detector.roi is per camera and not supported with runtime.batched_detection")
+    cv2.setNumThreads(specs[0].cv_threads)
+    pipes = {spec.approach_id: _ApproachPipeline(spec) for spec in specs}
+    batched = BatchedDetector(make_detector(det_cfg), list(pipes), max_wait_s=max_wait_s)
+    cams = [CameraStream(spec.camera_source, fps=spec.fps, threaded=True) for spec in specs]
+    try:
+        for spec, cam in zip(specs, cams):
+            batched.attach(spec.approach_id, cam)
+        while not stop.is_set():
+            got = batched.collect(timeout=0.5)
+            if not got:
+                if not batched.feeding:
+                    break
+                continue
+            dets = _detect_batch(batched, pipes, got)
+            for aid, (fid, ts, frame) in got.items():
+                pipes[aid].publish(fid, ts, frame, dets.get(aid))
+    finally:
+        batched.stop()
+        for cam in cams:
+            cam.release()
+        for pipe in pipes.values():
+            pipe.close()
+
+
+class MultiProcessOrchestrator:
+    """
+    Parent side: owns the shared-memory rings and worker processes, and runs
+    the control stage on its own timer from the newest stats of each worker.
+    Takes the nested config.yaml dict.
+    """
+    def __init__(self, config: dict):
+        self.cfg = config
+        lanes_cfg = config.get("lanes", {})
+        det_cfg = config.get("perception", {}).get("detector", {})
+        trk_cfg = config.get("perception", {}).get("tracker", {})
+        skip_cfg = config.get("perception", {}).get("frame_skip")
+        ctrl = config.get("control", {})
+        rt = config.get("runtime", {})
+        approaches = config["intersection"]["approaches"]
+
+        self.control_interval_s = ctrl.get("control_interval_s", 1.0)
+        # One process running batched detection over every camera instead of one per approach
+        self.batched_detection = rt.get("batched_detection", False)
+        self.max_batch_wait_s = det_cfg.get("max_batch_wait_s", 0.05)
+        self.optimizer = SignalOptimizer(min_green_s=ctrl.get("min_green_s", 7), max_green_s=ctrl.get("max_green_s", 60),
+                                         lost_time_s=ctrl.get("lost_time_s", 4))
+        self.splits_slot = LatestSlot()
+        self.emergency_slot = LatestSlot([])
+        # Max-pressure phase control, fed straight from the stats arrays
+        self.controller = None
+        self.action_slot = LatestSlot()
+        if ctrl.get("strategy") == "max_pressure" and ctrl.get("phases"):
+            self.controller = MaxPressureController(
+                PhaseGraph.from_config(ctrl["phases"]), min_green_s=ctrl.get("min_green_s", 7),
+                max_green_s=ctrl.get("max_green_s", 60), yellow_s=ctrl.get("yellow_s", 3),
+                all_red_s=ctrl.get("all_red_s", 1), fairness_max_skip=ctrl.get("fairness_max_skip", 3))
+        self._movement_index: Dict[str, np.ndarray] = {}
+
+        max_tracks = rt.get("max_tracks", 256)
+        frame_w, frame_h = rt.get("frame_size", [1920, 1080])
+        n_procs = 1 if self.batched_detection else max(len(approaches), 1)
+        cv_threads = max(1, (os.cpu_count() or 1) // n_procs - 1)
+
+        self.specs: List[WorkerSpec] = []
+        self.rings: Dict[str, Dict[str, ShmRing]] = {}
+        self.mappers: Dict[str, LaneMapper] = {}
+        self._own_lanes: Dict[str, np.ndarray] = {}
+        self._seen: Dict[str, int] = {}
+        self._stats: Dict[str, np.ndarray] = {}
+        for ap in approaches:
+            aid = ap["id"]
+            geojson = ap.get("lane_geojson", lanes_cfg["geojson_path"])
+            mapper = LaneMapper(geojson)
+            rings = {
+                "stats": ShmRing((len(mapper.lane_ids),), LANE_STAT_DTYPE, slots=4),
+                "tracks": ShmRing((max_tracks,), TRACK_DTYPE, slots=4),
+            }
+            if rt.get("share_frames", False):
+                rings["frames"] = ShmRing((frame_h, frame_w, 3), np.uint8, slots=3)
+            self.rings[aid] = rings
+            self.mappers[aid] = mapper
+            self._own_lanes[aid] = np.flatnonzero([a == aid for a in mapper.lane_approach])
+            if self.controller is not None:
+                own = self._own_lanes[aid].tolist()
+                self._movement_index[aid] = self.controller.graph.lane_index(
+                    [aid] * len(own), [mapper.lane_movement[i] for i in own])
+            self._seen[aid] = 0
+            self.specs.append(WorkerSpec(
+                approach_id=aid, camera_source=ap["camera_url"], lane_geojson=geojson,
+                stats_ring=rings["stats"].spec, tracks_ring=rings["tracks"].spec,
+                frames_ring=rings["frames"].spec if "frames" in rings else None,
+                fps=config.get("intersection", {}).get("fps"),
+                detector=det_cfg,
+                tracker=trk_cfg, frame_skip=skip_cfg,
+                calibration_path=ap.get("calibration_path", lanes_cfg.get("calibration_path")),
+                calibration_cache_dir=lanes_cfg.get("calibration_cache_dir", "data/calibration/cache"),
+                stopline_gap_m=lanes_cfg.get("stopline_gap_m", 3.0),
+                cv_threads=cv_threads,
+                pcu=ctrl.get("webster", {}).get("pcu"),
+            ))
+
+        self._ctx = mp.get_context("spawn")
+        self._stop = self._ctx.Event()
+        self.procs: List[mp.Process] = []
+
+    def start(self):
+        if self.procs:
+            return
+        if self.batched_detection:
+            p = self._ctx.Process(target=batched_perception_worker, args=(self.specs, self._stop, self.max_batch_wait_s),
+                                  name="perception-batched", daemon=True)
+            p.start()
+            self.procs.append(p)
+            return
+        for spec in self.specs:
+            p = self._ctx.Process(target=perception_worker, args=(spec, self._stop),
+                                  name=f"perception-{spec.approach_id}", daemon=True)
+            p.start()
+            self.procs.append(p)
+
+    def alive(self) -> bool:
+        return any(p.is_alive() for p in self.procs)
+
+    def lane_stats(self) -> List[LaneStat]:
+        """
+        Newest LaneStats from every worker (the last known values for
+        workers that have not published since the previous call).
+        """
+        out = []
+        for aid, rings in self.rings.items():
+            got = rings["stats"].read_latest(self._seen[aid])
+            if got is not None:
+                self._seen[aid], self._stats[aid], _ = got
+            arr = self._stats.get(aid)
+            if arr is None:
+                continue
+            m = self.mappers[aid]
+            for i in self._own_lanes[aid].tolist():
+                r = arr[i]
+                out.append(LaneStat(
+                    approach_id=aid, lane_id=m.lane_ids[i], movement=m.lane_movement[i],
+                    queue_len=int(r["queue_len"]), arrival_rate_vph=float(r["arrival_rate_vph"]),
+                    occupancy=float(r["occupancy"]), spillback=bool(r["spillback"]),
+                    queue_m=None if np.isnan(r["queue_m"]) else float(r["queue_m"]),
+                    speed_mps=None if np.isnan(r["speed_mps"]) else float(r["speed_mps"]),
+                    arrival_pcu_vph=float(r["arrival_pcu_vph"]),
+                ))
+        return out
+
+    def tracks(self, approach_id: str) -> Optional[TrackBatch]:
+        got = self.rings[approach_id]["tracks"].read_latest()
+        if got is None:
+            return None
+        batch = TrackBatch(got[1][:got[2]])
+        batch.approach[:] = approach_code(approach_id)  # approach codes are interned per process
+        return batch
+
+    def latest_frame(self, approach_id: str) -> Optional[np.ndarray]:
+        ring = self.rings[approach_id].get("frames")
+        got = ring.read_latest() if ring is not None else None
+        return None if got is None else got[1]
+
+    def control_step(self):
+        lane_stats = self.lane_stats()
+        if not lane_stats:
+            return None
+        splits = self.optimizer.compute_splits(lane_stats)
+        splits = self.optimizer.apply_emergency_priority(splits, self.emergency_slot.value)
+        self.splits_slot.publish(splits)
+        if self.controller is not None:
+            self.action_slot.publish(self.phase_step(time.monotonic()))
+        return splits
+
+    def phase_step(self, t: float):
+        """
+        One max-pressure tick from the stats arrays lane_stats() just read.
+        """
+        graph = self.controller.graph
+        up = np.zeros(len(graph.movements))
+        for aid, arr in self._stats.items():
+            up += graph.movement_queues(self._movement_index[aid], arr["queue_len"][self._own_lanes[aid]])
+        self.controller.tick(t, graph.pressure(up))
+        return self.controller.action(t)
+
+    def run(self, duration_s: Optional[float] = None, verbose: bool = True):
+        self.start()
+        t_end = None if duration_s is None else time.monotonic() + duration_s
+        deadline = time.monotonic()
+        try:
+            while self.alive() and (t_end is None or time.monotonic() < t_end):
+                splits = self.control_step()
+                if verbose and splits is not None:
+                    print({k: round(v, 1) for k, v in splits.greens_s.items()})
+                    if self.controller is not None:
+                        print(self.action_slot.value)
+                deadline = max(deadline + self.control_interval_s, time.monotonic())
+                time.sleep(max(deadline - time.monotonic(), 0))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self._stop.set()
+        for p in self.procs:
+            p.join(timeout=5.0)
+            if p.is_alive():
+                p.terminate()
+        self.procs = []
+        for rings in self.rings.values():
+            for ring in rings.values():
+                ring.close()
+        self.rings = {}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run one perception process per approach camera")
+    ap.add_argument("--config", default="config/config.yaml")
+    ap.add_argument("--duration", type=float, default=None, help="seconds to run (default: until cameras end)")
+    args = ap.parse_args(argv)
+    with open(args.config) as f:
+        cfg = yaml.safe_load(f)
+    MultiProcessOrchestrator(cfg).run(args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# smart_signal/simulation/events.py
+import heapq
+import itertools
+from typing import Callable, List, Tuple
+
+class EventScheduler:
+    """
+    Discrete-event scheduler on simulated time. Events due at the same time
+    fire in the order they were scheduled, so a run is fully deterministic.
+    Nothing sleeps: advance_to() / run_until() jump the clock from event to
+    event as fast as the callbacks allow.
+    """
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self._queue: List[Tuple[float, int, Callable, tuple]] = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def schedule(self, delay_s: float, fn: Callable, *args):
+        self.schedule_at(self.now + delay_s, fn, *args)
+
+    def schedule_at(self, t: float, fn: Callable, *args):
+        if t < self.now:
+            raise ValueError(f"cannot schedule in the past ({t} < {self.now})")
+        heapq.heappush(self._queue, (t, next(self._seq), fn, args))
+
+    def every(self, period_s: float, fn: Callable, *args, first_s: float = None):
+        """
+        Call ``fn(*args)`` every ``period_s``; stops once fn returns False.
+        """
+        def tick():
+            if fn(*args) is not False:
+                self.schedule(period_s, tick)
+        self.schedule(period_s if first_s is None else first_s, tick)
+
+    def peek(self) -> float:
+        return self._queue[0][0] if self._queue else float("inf")
+
+    def advance_to(self, t: float) -> int:
+        """
+        Fire every event due at or before ``t`` and set the clock to ``t``.
+        Returns the number of events fired.
+        """
+        fired = 0
+        while self._queue and self._queue[0][0] <= t:
+            et, _, fn, args = heapq.heappop(self._queue)
+            self.now = et
+            fn(*args)
+            fired += 1
+        self.now = max(self.now, t)
+        return fired
+
+    def run_until(self, t: float, stop: Callable[[], bool] = lambda: False) -> int:
+        fired = 0
+        while self._queue and self._queue[0][0] <= t and not stop():
+            fired += self.advance_to(self._queue[0][0])
+        if not stop():
+            self.now = max(self.now, t)
+        return fired
@@ -0,0 +1,201 @@
+# smart_signal/simulation/scenarios.py
+"""
+Monte-Carlo scenario runner: seeded headless SimWorld runs fanned out over a
+process pool, sweeping demand, strategy and timing bounds, with results
+collected into one columnar .npz file.
+
+    python -m smart_signal.simulation.scenarios --duration 900 --seeds 8 \\
+        --demand 0.002 0.005 0.01 --out results/sweep.npz
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import yaml
+
+from smart_signal.types import LaneStat
+from smart_signal.control.optimizer import SignalOptimizer
+from smart_signal.control.controller import PriorityCycleController
+from smart_signal.utils.timing import webster_splits
+from smart_signal.simulation.sim_core import SimWorld, APPROACHES
+
+STRATEGIES = ("fixed", "optimizer", "priority_cycle", "webster")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    strategy: str
+    demand: float          # per-step spawn probability per approach (SimWorld.spawn_random p)
+    seed: int
+    min_green_s: float = 7
+    max_green_s: float = 60
+    lost_time_s: float = 4
+    duration_s: float = 600
+    fps: int = 30
+
+
+class _Observed:
+    """
+    Lane statistics a controller would see, one LaneStat per approach, with
+    arrival rates measured since the previous signal switch.
+    """
+    def __init__(self):
+        self._arrivals = np.zeros(len(APPROACHES), dtype=np.int64)
+        self._t = 0.0
+
+    def lane_stats(self, world: SimWorld) -> List[LaneStat]:
+        dt = max(world.sim_time - self._t, 1e-6)
+        rate_vph = (world.arrivals - self._arrivals) / dt * 3600.0
+        self._arrivals = world.arrivals.copy()
+        self._t = world.sim_time
+        return [
+            LaneStat(approach_id=a, lane_id=a, movement="through",
+                     queue_len=int(world.queue_len[i]), arrival_rate_vph=float(rate_vph[i]),
+                     occupancy=0.0, spillback=False)
+            for i, a in enumerate(APPROACHES)
+        ]
+
+
+def make_green_time_fn(sc: Scenario) -> Callable[[SimWorld, Tuple[str, str]], float]:
+    """
+    Adapt a strategy to SimWorld.green_time_fn(world, pair) -> green seconds.
+    """
+    if sc.strategy == "fixed":
+        return lambda world, pair: 12
+
+    observed = _Observed()
+    if sc.strategy == "optimizer":
+        opt = SignalOptimizer(min_green_s=sc.min_green_s, max_green_s=sc.max_green_s, lost_time_s=sc.lost_time_s)
+
+        def fn(world, pair):
+            greens = opt.compute_splits(observed.lane_stats(world)).greens_s
+            return max(greens.get(a, sc.min_green_s) for a in pair)
+        return fn
+
+    if sc.strategy == "priority_cycle":
+        def fn(world, pair):
+            stats = observed.lane_stats(world)
+            counts = {ls.approach_id: ls.queue_len for ls in stats if ls.approach_id in pair}
+            ctrl = PriorityCycleController(approaches=list(pair), min_green=sc.min_green_s, max_green=sc.max_green_s)
+            _, green, _ = ctrl.next_phase(counts)
+            return green
+        return fn
+
+    if sc.strategy == "webster":
+        def fn(world, pair):
+            stats = [ls for ls in observed.lane_stats(world) if ls.approach_id in pair]
+            splits = webster_splits(stats, sc.lost_time_s, sc.min_green_s, sc.max_green_s)
+            return max(splits.greens_s.values())
+        return fn
+
+    raise ValueError(f"Unknown strategy '{sc.strategy}', expected one of {STRATEGIES}")
+
+
+def run_scenario(sc: Scenario) -> Dict[str, float]:
+    world = SimWorld(headless=True, fps=sc.fps, seed=sc.seed)
+    world.green_time_fn = make_green_time_fn(sc)
+
+    queue_sum = np.zeros(len(APPROACHES))
+    queue_max = np.zeros(len(APPROACHES))
+
+    def sample(w):
+        nonlocal queue_sum
+        queue_sum += w.queue_len
+        np.maximum(queue_max, w.queue_len, out=queue_max)
+
+    world.add_observer(sample)
+    world.run(sc.duration_s, spawns=True, spawn_p=sc.demand)
+
+    hours = world.sim_time / 3600.0
+    arrived = int(world.arrivals.sum())
+    row = asdict(sc)
+    row.update(
+        arrivals=arrived,
+        departures=int(world.departures.sum()),
+        throughput_vph=float(world.departures.sum() / hours) if hours else 0.0,
+        total_delay_s=float(world.delay_s.sum()),
+        mean_delay_s=float(world.delay_s.sum() / arrived) if arrived else 0.0,
+        mean_queue=float(queue_sum.sum() / max(world.steps, 1)),
+        max_queue=float(queue_max.max()),
+    )
+    return row
+
+
+def build_sweep(strategies: Sequence[str], demands: Sequence[float], seeds: Iterable[int],
+                min_greens: Sequence[float], max_greens: Sequence[float], lost_times: Sequence[float],
+                duration_s: float) -> List[Scenario]:
+    return [
+        Scenario(strategy=st, demand=d, seed=s, min_green_s=mn, max_green_s=mx, lost_time_s=lt, duration_s=duration_s)
+        for st, d, s, mn, mx, lt in itertools.product(strategies, demands, seeds, min_greens, max_greens, lost_times)
+        if mn <= mx
+    ]
+
+
+def run_sweep(scenarios: Sequence[Scenario], processes=None) -> Dict[str, np.ndarray]:
+    """
+    Run every scenario on a process pool; return {column: array}, one row
+    per scenario in input order.
+    """
+    if processes == 1:
+        rows = [run_scenario(sc) for sc in scenarios]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            rows = list(pool.map(run_scenario, scenarios))
+    if not rows:
+        return {}
+    return {k: np.array([r[k] for r in rows]) for k in rows[0]}
+
+
+def save_results(cols: Dict[str, np.ndarray], path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(path, **cols)
+
+
+def summarize(cols: Dict[str, np.ndarray]) -> str:
+    lines = [f"{'strategy':<15} {'demand':>7} {'runs':>5} {'thru vph':>9} {'delay s/veh':>12} {'mean q':>7}"]
+    keys = sorted(set(zip(cols["strategy"].tolist(), cols["demand"].tolist())))
+    for st, d in keys:
+        m = (cols["strategy"] == st) & (cols["demand"] == d)
+        lines.append(f"{st:<15} {d:>7.4f} {int(m.sum()):>5} {cols['throughput_vph'][m].mean():>9.1f} "
+                     f"{cols['mean_delay_s'][m].mean():>12.2f} {cols['mean_queue'][m].mean():>7.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Parallel Monte-Carlo evaluation of signal strategies")
+    ap.add_argument("--config", default="config/config.yaml")
+    ap.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=STRATEGIES)
+    ap.add_argument("--demand", nargs="+", type=float, default=[0.002, 0.005, 0.01])
+    ap.add_argument("--seeds", type=int, default=4, help="seeds per cell (0..N-1)")
+    ap.add_argument("--min-green", nargs="+", type=float, default=None)
+    ap.add_argument("--max-green", nargs="+", type=float, default=None)
+    ap.add_argument("--lost-time", nargs="+", type=float, default=None)
+    ap.add_argument("--duration", type=float, default=600, help="simulated seconds per run")
+    ap.add_argument("--processes", type=int, default=None)
+    ap.add_argument("--out", default="results/sweep.npz")
+    args = ap.parse_args(argv)
+
+    ctrl = {}
+    if os.path.exists(args.config):
+        with open(args.config) as f:
+            ctrl = (yaml.safe_load(f) or {}).get("control", {})
+
+    scenarios = build_sweep(
+        args.strategies, args.demand, range(args.seeds),
+        args.min_green or [ctrl.get("min_green_s", 7)],
+        args.max_green or [ctrl.get("max_green_s", 60)],
+        args.lost_time or [ctrl.get("lost_time_s", 4)],
+        args.duration,
+    )
+    cols = run_sweep(scenarios, processes=args.processes)
+    save_results(cols, args.out)
+    print(summarize(cols))
+    print(f"{len(scenarios)} runs -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 # smart_signal/simulation/sim_core.py
-import pygame
 import random
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+try:
+    import pygame
+except ImportError:  # headless runs don't need it
+    pygame = None
 
 WIDTH, HEIGHT = 800, 800
 LANE_WIDTH = 40
@@ -38,14 +44,102 @@ class Vehicle:
             surf.blit(label, (int(self.x), int(self.y) - 12))
 
 
+APPROACHES = ("N", "S", "E", "W")
+_CODE = {a: i for i, a in enumerate(APPROACHES)}
+_OPPOSITE = np.array([_CODE["S"], _CODE["N"], _CODE["W"], _CODE["E"]])
+# Per direction code: unit step along x / y, and whether it drives along y
+_DX = np.array([0.0, 0.0, 1.0, -1.0])
+_DY = np.array([-1.0, 1.0, 0.0, 0.0])
+_VERTICAL = np.array([True, True, False, False])
+
+
+class VehicleArrays:
+    """
+    Struct-of-arrays store for the vehicle population: one row per vehicle,
+    in spawn order. Approach/direction are codes into APPROACHES, vehicle
+    types are codes into ``type_names``.
+    """
+    def __init__(self, capacity=256):
+        self.n = 0
+        self.type_names: List[str] = []
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        self._x = np.zeros(capacity)
+        self._y = np.zeros(capacity)
+        self._speed = np.zeros(capacity)
+        self._w = np.zeros(capacity)
+        self._h = np.zeros(capacity)
+        self._direction = np.zeros(capacity, dtype=np.int8)
+        self._approach = np.zeros(capacity, dtype=np.int8)
+        self._vtype = np.zeros(capacity, dtype=np.int16)
+        self._color = np.zeros((capacity, 3), dtype=np.uint8)
+
+    _FIELDS = ("_x", "_y", "_speed", "_w", "_h", "_direction", "_approach", "_vtype", "_color")
+
+    x = property(lambda self: self._x[:self.n])
+    y = property(lambda self: self._y[:self.n])
+    speed = property(lambda self: self._speed[:self.n])
+    w = property(lambda self: self._w[:self.n])
+    h = property(lambda self: self._h[:self.n])
+    direction = property(lambda self: self._direction[:self.n])
+    approach = property(lambda self: self._approach[:self.n])
+    vtype = property(lambda self: self._vtype[:self.n])
+    color = property(lambda self: self._color[:self.n])
+
+    def __len__(self):
+        return self.n
+
+    def append(self, x, y, direction, approach_id, speed=2.0, color=(0, 220, 0), vehicle_type="car"):
+        if self.n == len(self._x):
+            old = {f: getattr(self, f) for f in self._FIELDS}
+            self._alloc(2 * len(self._x))
+            for f, arr in old.items():
+                getattr(self, f)[:self.n] = arr
+        if vehicle_type not in self.type_names:
+            self.type_names.append(vehicle_type)
+        i = self.n
+        d = _CODE[direction]
+        self._x[i], self._y[i], self._speed[i] = x, y, speed
+        self._w[i], self._h[i] = (20, 36) if _VERTICAL[d] else (36, 20)
+        self._direction[i], self._approach[i] = d, _CODE[approach_id]
+        self._vtype[i] = self.type_names.index(vehicle_type)
+        self._color[i] = color
+        self.n += 1
+
+    def compress(self, keep: np.ndarray):
+        """
+        Drop rows where ``keep`` is False, preserving order.
+        """
+        m = int(keep.sum())
+        for f in self._FIELDS:
+            arr = getattr(self, f)
+            arr[:m] = arr[:self.n][keep]
+        self.n = m
+
+    def view(self, i) -> Vehicle:
+        v = Vehicle(float(self._x[i]), float(self._y[i]),
+                    direction=APPROACHES[self._direction[i]],
+                    approach_id=APPROACHES[self._approach[i]],
+                    speed=float(self._speed[i]),
+                    color=tuple(int(c) for c in self._color[i]),
+                    vehicle_type=self.type_names[self._vtype[i]])
+        return v
+
+
 class SimWorld:
-    def __init__(self, width=WIDTH, height=HEIGHT):
-        pygame.init()
+    """
+    Four-approach intersection simulation.
+
+    With ``headless=True`` there is no window, event pump or clock: step()
+    runs as fast as the CPU allows and each step advances ``sim_time`` by
+    1/fps simulated seconds. Rendering is an observer (PygameRenderer) that
+    can be attached to any world; non-headless worlds get one automatically.
+    """
+    def __init__(self, width=WIDTH, height=HEIGHT, headless=False, fps=30, seed=None):
         self.width, self.height = width, height
-        self.screen = pygame.display.set_mode((width, height))
-        pygame.display.set_caption("2D Traffic Sim")
-        self.clock = pygame.time.Clock()
-        self.conflict_box = pygame.Rect(CENTER[0] - 40, CENTER[1] - 40, 80, 80)
+        self.conflict_box = (CENTER[0] - 40, CENTER[1] - 40, 80, 80)  # x, y, w, h
+        self.rng = random.Random(seed)
 
         # Lane spawn anchors
         self.lanes = {
@@ -62,13 +156,49 @@ class SimWorld:
             "W": self.width // 2 + 60
         }
 
-        self.vehicles = []
+        self.fleet = VehicleArrays()
         self.lights = {"N": "GREEN", "S": "GREEN", "E": "RED", "W": "RED"}
         self.light_timers = {"N": 12, "S": 12, "E": 0, "W": 0}
         self.cycle_pair = ("N", "S")
-        self.fps = 30
+        self.fps = fps
+        self.sim_time = 0.0
+        self.steps = 0
         self.running = True
 
+        # Green time for the pair about to turn green; None = fixed 12 s.
+        # Called as green_time_fn(world, pair) at every switch.
+        self.green_time_fn: Optional[Callable[["SimWorld", Tuple[str, str]], float]] = None
+
+        # Per-approach counters, indexed like APPROACHES
+        self.arrivals = np.zeros(len(APPROACHES), dtype=np.int64)
+        self.departures = np.zeros(len(APPROACHES), dtype=np.int64)
+        self.queue_len = np.zeros(len(APPROACHES), dtype=np.int64)  # vehicles held this step
+        self.delay_s = np.zeros(len(APPROACHES))                    # accumulated vehicle-seconds held
+
+        self.headless = headless
+        self.observers: List[Callable[["SimWorld"], None]] = []
+        self.renderer: Optional["PygameRenderer"] = None
+        if not headless:
+            self.renderer = PygameRenderer(self)
+
+    def add_observer(self, fn: Callable[["SimWorld"], None]):
+        """
+        Call ``fn(world)`` after every step.
+        """
+        self.observers.append(fn)
+
+    @property
+    def vehicles(self) -> List[Vehicle]:
+        """
+        Snapshot of the fleet as Vehicle objects (for drawing / adapters).
+        The simulation itself works on ``self.fleet``.
+        """
+        return [self.fleet.view(i) for i in range(self.fleet.n)]
+
+    def add_vehicle(self, vehicle: Vehicle):
+        self.fleet.append(vehicle.x, vehicle.y, vehicle.direction, vehicle.approach_id,
+                          vehicle.speed, vehicle.color, vehicle.vehicle_type)
+
     def spawn_random(self, p=0.02, p_emergency=0.005):
         # Normal vehicles
         lane_choice = {
@@ -81,38 +211,38 @@ class SimWorld:
         for approach in ("N", "S", "E", "W"):
             lane_idx = lane_choice[approach]
             lx, ly = self.lanes[approach][lane_idx]
-            if random.random() < p:
-                self.vehicles.append(Vehicle(
+            if self.rng.random() < p:
+                self.fleet.append(
                     lx, ly,
                     direction=approach,
                     approach_id=approach,
                     speed=2.0,
                     color=(0, 220, 0),
                     vehicle_type="car"
-                ))
+                )
 
-            if random.random() < p:
-                self.vehicles.append(Vehicle(
+            if self.rng.random() < p:
+                self.fleet.append(
                     lx, ly,
                     direction=approach,
                     approach_id=approach,
                     speed=2.0,
                     color=(0, 220, 0),
                     vehicle_type="car"
-                ))
+                )
 
 
         # Emergency vehicle example: from N lane 0
-        if random.random() < p_emergency:
+        if self.rng.random() < p_emergency:
             lx, ly = self.lanes["N"][0]  # still lane 0
-            self.vehicles.append(Vehicle(
+            self.fleet.append(
                 lx, ly,
                 direction="N",
                 approach_id="N",
                 speed=3.5,
                 color=(255, 0, 0),
                 vehicle_type="ambulance"
-            ))
+            )
 
     def _update_lights(self):
         # decrement timers for active greens
@@ -122,59 +252,174 @@ class SimWorld:
         # switch when both greens expire
         if all(self.light_timers[k] <= 0 for k in self.cycle_pair):
             self.cycle_pair = ("E", "W") if self.cycle_pair == ("N", "S") else ("N", "S")
+            green = 12 if self.green_time_fn is None else self.green_time_fn(self, self.cycle_pair)
             for k in ("N", "S", "E", "W"):
                 self.lights[k] = "GREEN" if k in self.cycle_pair else "RED"
-                self.light_timers[k] = 12 if self.lights[k] == "GREEN" else 0
+                self.light_timers[k] = green if self.lights[k] == "GREEN" else 0
+
+    def _near_stop_line(self, rows) -> np.ndarray:
+        f = self.fleet
+        x1, y1, x2, y2 = CENTER[0] - 60, CENTER[1] - 60, CENTER[0] + 60, CENTER[1] + 60
+        d = f.direction[rows]
+        x, y, w, h = f.x[rows], f.y[rows], f.w[rows], f.h[rows]
+        return np.select([d == 0, d == 1, d == 2, d == 3],
+                         [y <= y2 + 10, y + h >= y1 - 10, x + w >= x1 - 10, x <= x2 + 10], False)
 
     def _move_with_gaps(self):
+        """
+        Car-following for the whole fleet, one vectorized pass per approach.
+
+        Matches the original per-vehicle loop: approaches go N, S, E, W in
+        turn; within one, vehicles are ordered front to back and each one's
+        leader is the front-most vehicle ahead of it within 12 px laterally.
+        A follower's headway is checked against its leader's position after
+        the leader has moved this step, and the conflict box is checked
+        against the opposite approach as it stands when this approach moves.
+        """
         headway = 28
-        groups = {"N": [], "S": [], "E": [], "W": []}
-        for v in self.vehicles:
-            groups[v.approach_id].append(v)
-
-        def sort_key(app):
-            if app == "N": return lambda v: v.y
-            if app == "S": return lambda v: -v.y
-            if app == "E": return lambda v: -v.x
-            if app == "W": return lambda v: v.x
-
-        for app, vs in groups.items():
-            vs.sort(key=sort_key(app))
-            for i, v in enumerate(vs):
-                leader = None
-                for j in range(i):
-                    u = vs[j]
-                    if app in ("N", "S") and abs(u.x - v.x) < 12:
-                        leader = u
-                        break
-                    if app in ("E", "W") and abs(u.y - v.y) < 12:
-                        leader = u
-                        break
-
-                red_ahead = (self.lights.get(v.approach_id, "RED") == "RED") and v._near_stop_line()
-                too_close = False
-                if leader:
-                    if app == "N":
-                        too_close = (v.y + v.h) > (leader.y - headway)
-                    elif app == "S":
-                        too_close = (v.y) < (leader.y + leader.h + headway)
-                    elif app == "E":
-                        too_close = (v.x) < (leader.x + leader.w + headway)
-                    elif app == "W":
-                        too_close = (v.x + v.w) > (leader.x - headway)
-
-                if not red_ahead and not too_close:
-                    if self._box_occupied_by_opposite(v.approach_id):
-                        continue  # wait until box is clear
-                    if not red_ahead and not too_close and not self._box_occupied_by_opposite(v.approach_id):
-                        v.move_step()
+        f = self.fleet
+        self.queue_len[:] = 0
+        if f.n == 0:
+            return
+        x, y, w, h, speed, direction = f.x, f.y, f.w, f.h, f.speed, f.direction
+
+        for code, app in enumerate(APPROACHES):
+            rows = np.flatnonzero(f.approach == code)
+            if rows.size == 0:
+                continue
+            vertical = _VERTICAL[code]
+            key = (y if vertical else x)[rows]
+            if code in (1, 2):  # S and E sort descending
+                key = -key
+            rows = rows[np.argsort(key, kind="stable")]
+            m = rows.size
+            pos = np.arange(m)
+
+            # Leader: first vehicle in order whose lateral offset is < 12
+            lat = (x if vertical else y)[rows]
+            leader = np.full(m, -1)
+            for u in np.unique(lat):
+                first = int(np.argmax(np.abs(lat - u) < 12))
+                leader[(lat == u) & (pos > first)] = first
+
+            red = self.lights.get(app, "RED") == "RED"
+            blocked = self._near_stop_line(rows) if red else np.zeros(m, dtype=bool)
+            if self._box_occupied_by_opposite(app):
+                blocked[:] = True
+
+            # Resolve moves front to back, one leader level at a time
+            moved = np.zeros(m, dtype=bool)
+            done = leader < 0
+            moved[done] = ~blocked[done]
+            while not done.all():
+                ready = ~done & done[np.maximum(leader, 0)]
+                fr, ld = rows[ready], rows[leader[ready]]
+                step_l = speed[ld] * moved[leader[ready]]
+                lx = x[ld] + _DX[direction[ld]] * step_l
+                ly = y[ld] + _DY[direction[ld]] * step_l
+                if code == 0:
+                    too_close = (y[fr] + h[fr]) > (ly - headway)
+                elif code == 1:
+                    too_close = y[fr] < (ly + h[ld] + headway)
+                elif code == 2:
+                    too_close = x[fr] < (lx + w[ld] + headway)
+                else:
+                    too_close = (x[fr] + w[fr]) > (lx - headway)
+                moved[ready] = ~blocked[ready] & ~too_close
+                done |= ready
+
+            self.queue_len[code] = m - int(moved.sum())
+            self.delay_s[code] += self.queue_len[code] / self.fps
+
+            mv = rows[moved]
+            x[mv] += _DX[direction[mv]] * speed[mv]
+            y[mv] += _DY[direction[mv]] * speed[mv]
+
+    def _box_occupied_by_opposite(self, approach) -> bool:
+        f = self.fleet
+        opp = f.approach == _OPPOSITE[_CODE[approach]]
+        bx, by, bw, bh = self.conflict_box
+        # same test as pygame.Rect(v.x, v.y, v.w, v.h).colliderect(box)
+        vx, vy = np.trunc(f.x[opp]), np.trunc(f.y[opp])
+        hit = (vx < bx + bw) & (bx < vx + f.w[opp]) & (vy < by + bh) & (by < vy + f.h[opp])
+        return bool(hit.any())
+
+    def step(self, spawns=True, spawn_p=0.02):
+        # Handle quit events
+        if self.renderer is not None:
+            self.renderer.poll_events()
+
+        # Spawn vehicles
+        if spawns:
+            n0 = self.fleet.n
+            self.spawn_random(spawn_p)
+            self.arrivals += np.bincount(self.fleet.approach[n0:], minlength=len(APPROACHES))
+
+        # Update lights and move vehicles with gap logic
+        self._update_lights()
+        self._move_with_gaps()
+
+        # Remove vehicles that have left the visible area
+        f = self.fleet
+        keep = (f.x >= -100) & (f.x <= self.width + 100) & (f.y >= -100) & (f.y <= self.height + 100)
+        self.departures += np.bincount(f.approach[~keep], minlength=len(APPROACHES))
+        f.compress(keep)
+
+        self.steps += 1
+        self.sim_time = self.steps / self.fps
+        for fn in self.observers:
+            fn(self)
+
+    def run(self, duration_s, spawns=True, spawn_p=0.02):
+        """
+        Step until ``duration_s`` simulated seconds have passed (or the window
+        is closed). Headless worlds run this as fast as the CPU allows.
+        """
+        end = self.steps + int(round(duration_s * self.fps))
+        while self.running and self.steps < end:
+            self.step(spawns=spawns, spawn_p=spawn_p)
+
+    def render(self, fps=30):
+        if self.renderer is not None:
+            self.renderer.draw()
+            self.renderer.tick(fps)
+
+    def shutdown(self):
+        if self.renderer is not None:
+            self.renderer.close()
+
+
+class PygameRenderer:
+    """
+    Window, event pump and clock for a SimWorld. Call it as an observer
+    (world.add_observer(renderer)) to draw after every step, or use
+    draw()/tick() directly.
+    """
+    def __init__(self, world: SimWorld, fps=None, caption="2D Traffic Sim"):
+        if pygame is None:
+            raise RuntimeError("pygame is required for rendering; use SimWorld(headless=True) without it")
+        pygame.init()
+        self.world = world
+        self.fps = fps
+        self.screen = pygame.display.set_mode((world.width, world.height))
+        pygame.display.set_caption(caption)
+        self.clock = pygame.time.Clock()
 
+    def __call__(self, world: SimWorld):
+        self.draw()
+        if self.fps:
+            self.tick(self.fps)
+
+    def poll_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.world.running = False
 
     def draw_intersection(self):
         self.screen.fill((28, 28, 28))
         road_color = (70, 70, 70)
-        pygame.draw.rect(self.screen, road_color, (CENTER[0] - 3 * LANE_WIDTH, 0, 6 * LANE_WIDTH, self.height))
-        pygame.draw.rect(self.screen, road_color, (0, CENTER[1] - 3 * LANE_WIDTH, self.width, 6 * LANE_WIDTH))
+        pygame.draw.rect(self.screen, road_color, (CENTER[0] - 3 * LANE_WIDTH, 0, 6 * LANE_WIDTH, self.world.height))
+        pygame.draw.rect(self.screen, road_color, (0, CENTER[1] - 3 * LANE_WIDTH, self.world.width, 6 * LANE_WIDTH))
         pygame.draw.rect(self.screen, (200, 200, 200), (CENTER[0] - 60, CENTER[1] - 60, 120, 120), 2)
 
         font = pygame.font.SysFont(None, 24)
@@ -183,51 +428,22 @@ class SimWorld:
                      "E": (CENTER[0] + 90, CENTER[1] - 10),
                      "W": (CENTER[0] - 120, CENTER[1] - 10)}
         for k, pos in positions.items():
-            col = (50, 220, 50) if self.lights[k] == "GREEN" else (230, 60, 60)
+            col = (50, 220, 50) if self.world.lights[k] == "GREEN" else (230, 60, 60)
             pygame.draw.circle(self.screen, col, pos, 12)
-            t = int(self.light_timers[k]) if self.lights[k] == "GREEN" else 0
+            t = int(self.world.light_timers[k]) if self.world.lights[k] == "GREEN" else 0
             timer_text = font.render(str(t), True, (255, 255, 255))
             self.screen.blit(timer_text, (pos[0] - 8, pos[1] + 16))
 
-    def _box_occupied_by_opposite(self, approach):
-    # Map each approach to its opposite
-        opposite = {"N": "S", "S": "N", "E": "W", "W": "E"}
-        opp = opposite[approach]
-        for v in self.vehicles:
-            if v.approach_id == opp:
-                veh_rect = pygame.Rect(v.x, v.y, v.w, v.h)
-                if veh_rect.colliderect(self.conflict_box):
-                    return True
-        return False
-
-    def step(self, spawns=True, spawn_p=0.02):
-        # Handle quit events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-
-        # Spawn vehicles
-        if spawns:
-            self.spawn_random(spawn_p)
-
-        # Update lights and move vehicles with gap logic
-        self._update_lights()
-        self._move_with_gaps()
-
-        # Remove vehicles that have left the visible area
-        self.vehicles = [
-            v for v in self.vehicles
-            if -100 <= v.x <= self.width + 100 and -100 <= v.y <= self.height + 100
-        ]
-
-    def render(self, fps=30):
+    def draw(self):
         self.draw_intersection()
-        for v in self.vehicles:
+        for v in self.world.vehicles:
             v.draw(self.screen)
         pygame.display.flip()
+
+    def tick(self, fps):
         self.clock.tick(fps)
 
-    def shutdown(self):
+    def close(self):
         pygame.quit()
 
 
@@ -236,4 +452,4 @@ if __name__ == "__main__":
     while world.running:
         world.step(spawns=True, spawn_p=0.03)
         world.render(fps=60)
-    world.shutdown()
\ No newline at end of file
+    world.shutdown()
@@ -1,9 +1,27 @@
-from typing import List, Tuple, Optional, Literal, Dict
+from typing import List, Tuple, Optional, Literal, Dict, Iterable, get_args
 from pydantic import BaseModel
 from dataclasses import dataclass
+import numpy as np
 
 ClassName = Literal["car","bus","truck","motorcycle","bicycle","pedestrian","unknown"]
 
+CLASS_NAMES: Tuple[str, ...] = get_args(ClassName)
+CLASS_CODE: Dict[str, int] = {c: i for i, c in enumerate(CLASS_NAMES)}
+
+# Approach ids are interned process-wide; code -1 is "unknown"
+APPROACH_IDS: List[str] = []
+_APPROACH_CODE: Dict[str, int] = {"unknown": -1}
+
+def approach_code(approach_id: str) -> int:
+    code = _APPROACH_CODE.get(approach_id)
+    if code is None:
+        code = _APPROACH_CODE[approach_id] = len(APPROACH_IDS)
+        APPROACH_IDS.append(approach_id)
+    return code
+
+def approach_name(code: int) -> str:
+    return APPROACH_IDS[code] if code >= 0 else "unknown"
+
 @dataclass
 class BBox:
     x1: float
@@ -34,6 +52,9 @@ class LaneStat(BaseModel):
     arrival_rate_vph: float
     occupancy: float
     spillback: bool
+    queue_m: Optional[float] = None      # metric queue length, needs ground calibration
+    speed_mps: Optional[float] = None    # mean ground speed of tracked vehicles
+    arrival_pcu_vph: Optional[float] = None   # arrival rate in passenger-car units (class-weighted)
 
 class Phase(BaseModel):
     id: str
@@ -54,4 +75,130 @@ class EmergencyEvent(BaseModel):
 
 class Splits(BaseModel):
     cycle_s: float
-    greens_s: Dict[str, float]  # phase_id -> green seconds
\ No newline at end of file
+    greens_s: Dict[str, float]  # phase_id -> green seconds
+
+
+# ---------- array-backed batches ----------
+DETECTION_DTYPE = np.dtype([("bbox", "f4", (4,)), ("score", "f4"), ("cls", "i1"),
+                            ("approach", "i2"), ("frame_id", "i8")])
+TRACK_DTYPE = np.dtype([("track_id", "i8"), ("bbox", "f4", (4,)), ("cls", "i1"),
+                        ("approach", "i2"), ("last_seen_frame", "i8")])
+
+
+class _Batch:
+    """
+    Thin wrapper over a structured array; columns are exposed as array
+    views and indexing with a mask/slice/index array returns a new batch.
+    """
+    __slots__ = ("data",)
+    DTYPE: np.dtype
+
+    def __init__(self, data: Optional[np.ndarray] = None):
+        self.data = np.zeros(0, dtype=self.DTYPE) if data is None else data
+
+    @classmethod
+    def empty(cls, n: int = 0):
+        return cls(np.zeros(n, dtype=cls.DTYPE))
+
+    @classmethod
+    def concat(cls, batches: Iterable["_Batch"]):
+        return cls(np.concatenate([b.data for b in batches] or [np.zeros(0, dtype=cls.DTYPE)]))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, idx):
+        return type(self)(self.data[np.atleast_1d(idx)] if np.isscalar(idx) else self.data[idx])
+
+    @property
+    def bbox(self) -> np.ndarray:
+        return self.data["bbox"]
+
+    @property
+    def cls(self) -> np.ndarray:
+        return self.data["cls"]
+
+    @property
+    def approach(self) -> np.ndarray:
+        return self.data["approach"]
+
+    def class_names(self) -> List[str]:
+        return [CLASS_NAMES[c] for c in self.cls.tolist()]
+
+    def approach_names(self) -> List[str]:
+        return [approach_name(a) for a in self.approach.tolist()]
+
+
+class DetectionBatch(_Batch):
+    """
+    Detections of one or more frames as a DETECTION_DTYPE structured array.
+    """
+    __slots__ = ()
+    DTYPE = DETECTION_DTYPE
+
+    @classmethod
+    def from_arrays(cls, bbox, score, cls_code, approach, frame_id) -> "DetectionBatch":
+        bbox = np.asarray(bbox, dtype=np.float32).reshape(-1, 4)
+        b = cls.empty(len(bbox))
+        b.data["bbox"] = bbox
+        b.data["score"] = score
+        b.data["cls"] = cls_code
+        b.data["approach"] = approach
+        b.data["frame_id"] = frame_id
+        return b
+
+    @classmethod
+    def from_models(cls, detections: List[Detection]) -> "DetectionBatch":
+        if isinstance(detections, DetectionBatch):
+            return detections
+        return cls.from_arrays([d.bbox for d in detections], [d.score for d in detections],
+                               [CLASS_CODE[d.cls] for d in detections],
+                               [approach_code(d.approach_id) for d in detections],
+                               [d.frame_id for d in detections])
+
+    @property
+    def score(self) -> np.ndarray:
+        return self.data["score"]
+
+    @property
+    def frame_id(self) -> np.ndarray:
+        return self.data["frame_id"]
+
+    def to_models(self) -> List[Detection]:
+        return [Detection(bbox=tuple(b), score=s, cls=c, frame_id=f, approach_id=a)
+                for b, s, c, f, a in zip(self.bbox.tolist(), self.score.tolist(), self.class_names(),
+                                         self.frame_id.tolist(), self.approach_names())]
+
+
+class TrackBatch(_Batch):
+    """
+    Tracks as a TRACK_DTYPE structured array.
+    """
+    __slots__ = ()
+    DTYPE = TRACK_DTYPE
+
+    @classmethod
+    def from_models(cls, tracks: List[Track]) -> "TrackBatch":
+        if isinstance(tracks, TrackBatch):
+            return tracks
+        b = cls.empty(len(tracks))
+        if tracks:
+            b.data["track_id"] = [t.track_id for t in tracks]
+            b.data["bbox"] = [t.bbox for t in tracks]
+            b.data["cls"] = [CLASS_CODE[t.cls] for t in tracks]
+            b.data["approach"] = [approach_code(t.approach_id) for t in tracks]
+            b.data["last_seen_frame"] = [t.last_seen_frame for t in tracks]
+        return b
+
+    @property
+    def track_id(self) -> np.ndarray:
+        return self.data["track_id"]
+
+    @property
+    def last_seen_frame(self) -> np.ndarray:
+        return self.data["last_seen_frame"]
+
+    def to_models(self) -> List[Track]:
+        return [Track(track_id=i, bbox=tuple(b), cls=c, approach_id=a, last_seen_frame=f)
+                for i, b, c, a, f in zip(self.track_id.tolist(), self.bbox.tolist(), self.class_names(),
+                                         self.approach_names(), self.last_seen_frame.tolist())]
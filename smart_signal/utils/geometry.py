@@ -1,3 +1,4 @@
+import numpy as np
 from shapely.geometry import Polygon, LineString, Point
 from shapely.ops import unary_union
 from typing import Dict, Any, Tuple, Optional, List
@@ -16,9 +17,46 @@ def iou(box_a, box_b) -> float:
     area_b = (bx2 - bx1) * (by2 - by1)
     return inter / max(area_a + area_b - inter, 1e-6)
 
+def iou_matrix(boxes_a, boxes_b) -> np.ndarray:
+    """
+    Pairwise IoU between (N,4) and (M,4) xyxy boxes, computed in one
+    broadcast pass. Returns an (N,M) float array.
+    """
+    a = np.asarray(boxes_a, dtype=float).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=float).reshape(-1, 4)
+    ax1, ay1, ax2, ay2 = (a[:, k:k+1] for k in range(4))
+    bx1, by1, bx2, by2 = (b[:, k] for k in range(4))
+    iw = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0.0, None)
+    ih = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0.0, None)
+    inter = iw * ih
+    area_a = (ax2 - ax1) * (ay2 - ay1)
+    area_b = (bx2 - bx1) * (by2 - by1)
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
 def point_to_line_distance(point: Tuple[float,float], line: LineString) -> float:
     return line.distance(Point(point))
 
 def box_centroid(b):
     x1,y1,x2,y2 = b
-    return ((x1+x2)/2.0, (y1+y2)/2.0)
\ No newline at end of file
+    return ((x1+x2)/2.0, (y1+y2)/2.0)
+
+
+def nms(boxes, scores, iou_thresh: float = 0.45, classes=None, max_det: int = 300) -> np.ndarray:
+    """
+    Greedy non-maximum suppression over (N,4) xyxy boxes; returns kept
+    indices, best score first. With ``classes`` a box only suppresses boxes
+    of the same class. Each pick suppresses all remaining overlaps in one
+    vectorized step.
+    """
+    b = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    order = np.argsort(-np.asarray(scores, dtype=float).reshape(-1), kind="stable")
+    c = None if classes is None else np.asarray(classes).reshape(-1)
+    keep = []
+    while order.size and len(keep) < max_det:
+        i, rest = order[0], order[1:]
+        keep.append(i)
+        over = iou_matrix(b[i], b[rest])[0] > iou_thresh
+        if c is not None:
+            over &= c[rest] == c[i]
+        order = rest[~over]
+    return np.asarray(keep, dtype=np.int64)
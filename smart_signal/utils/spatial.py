@@ -0,0 +1,66 @@
+# smart_signal/utils/spatial.py
+from typing import Dict, Hashable, List, Set, Tuple
+
+Cell = Tuple[Hashable, int, int]
+
+class GridIndex:
+    """
+    Uniform-grid spatial hash over xyxy boxes. Items live in every cell their
+    box touches, partitioned by a group key (e.g. (approach_id, cls)) so a
+    query only sees items of the same group. Boxes that overlap always share
+    at least one cell, so query() never misses a pair with IoU > 0.
+    """
+    def __init__(self, cell_size: float = 64.0):
+        self.cell_size = float(cell_size)
+        self._cells: Dict[Cell, Set[Hashable]] = {}
+        self._items: Dict[Hashable, Tuple[Hashable, List[Cell]]] = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item_id):
+        return item_id in self._items
+
+    def _cells_for(self, key, bbox) -> List[Cell]:
+        x1, y1, x2, y2 = bbox
+        cs = self.cell_size
+        gx1, gx2 = int(x1 // cs), int(x2 // cs)
+        gy1, gy2 = int(y1 // cs), int(y2 // cs)
+        return [(key, gx, gy) for gx in range(gx1, gx2 + 1) for gy in range(gy1, gy2 + 1)]
+
+    def insert(self, item_id, key, bbox):
+        cells = self._cells_for(key, bbox)
+        for c in cells:
+            self._cells.setdefault(c, set()).add(item_id)
+        self._items[item_id] = (key, cells)
+
+    def remove(self, item_id):
+        _, cells = self._items.pop(item_id)
+        for c in cells:
+            bucket = self._cells[c]
+            bucket.discard(item_id)
+            if not bucket:
+                del self._cells[c]
+
+    def move(self, item_id, bbox):
+        key, old = self._items[item_id]
+        new = self._cells_for(key, bbox)
+        if new == old:
+            return
+        self.remove(item_id)
+        self.insert(item_id, key, bbox)
+
+    def query(self, key, bbox) -> Set[Hashable]:
+        """
+        Ids of items in ``key`` whose cells overlap ``bbox``'s cells.
+        """
+        found: Set[Hashable] = set()
+        for c in self._cells_for(key, bbox):
+            bucket = self._cells.get(c)
+            if bucket:
+                found |= bucket
+        return found
+
+    def clear(self):
+        self._cells.clear()
+        self._items.clear()
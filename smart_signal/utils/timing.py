@@ -1,17 +1,158 @@
-from typing import Dict, List
-from smart_signal.types import LaneStat, Splits
-
-def webster_splits(lane_stats: List[LaneStat], lost_time_s: float, min_green: float, max_green: float) -> Splits:
-    # Estimate flow ratios y_i from arrivals; simple normalization
-    by_phase = {}  # phase key we’ll map later, placeholder
-    Y = 0.0
-    # Here we assume a single phase per movement later; will refine in Step 8
-    # Use arrivals scaled to saturation (assume 1800 vph per lane)
-    phase_key = "PH_ALL"  # placeholder
-    y = sum(max(ls.arrival_rate_vph, 1.0)/1800.0 for ls in lane_stats)
-    Y = min(max(y, 0.05), 0.95)
-    cycle = (1.5*lost_time_s + 5.0) / (1.0 - Y)
-    effective_green = max(cycle - lost_time_s, min_green * len(lane_stats))
-    # naive equal split
-    g_each = max(min(effective_green / max(len(lane_stats),1), max_green), min_green)
-    return Splits(cycle_s=cycle, greens_s={phase_key: g_each})
\ No newline at end of file
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from smart_signal.types import LaneStat, Splits, Phase
+from smart_signal.control.phases import PhaseGraph
+
+# Passenger-car equivalents per class (HCM-style heavy-vehicle / two-wheeler factors)
+PCU_FACTORS: Dict[str, float] = {"car": 1.0, "bus": 2.0, "truck": 2.0, "motorcycle": 0.4,
+                                 "bicycle": 0.3, "pedestrian": 0.0, "unknown": 1.0}
+SATURATION_VPH = 1800.0   # per lane, in PCU
+
+
+def webster_cycle(flow_ratio_sum, lost_time_s):
+    # Webster's optimum cycle C0 = (1.5 L + 5) / (1 - Y), Y clamped to keep it finite;
+    # scalars or arrays (one entry per intersection)
+    Y = np.clip(flow_ratio_sum, 0.05, 0.95)
+    return (1.5*np.asarray(lost_time_s) + 5.0) / (1.0 - Y)
+
+
+class WebsterNetwork:
+    """
+    Webster/HCM timings for many intersections in one vectorized pass.
+
+    Every lane is tied to the first phase serving its (approach, movement);
+    a phase's flow ratio is that of its critical (highest v/s) lane, with v
+    in PCU/h and s the lane's saturation flow. Per intersection:
+
+        Y = sum of critical ratios,  C0 = (1.5 L + 5) / (1 - Y)
+        g_p = (C - L) * y_p / Y
+
+    with C0 clamped to [cycle_min_s, cycle_max_s] and greens to
+    [min_green_s, max_green_s]. Green a clipped phase gives up or takes is
+    shared among the unclipped ones by flow ratio, so the greens plus L
+    always add up to the cycle; a cycle the minimum greens do not fit in
+    is stretched to fit them, one the maximum greens cannot fill is cut.
+    """
+    def __init__(self, graphs: Sequence[PhaseGraph], lanes: Sequence[Sequence[Tuple[str, str, str]]],
+                 lost_time_s=4.0, min_green_s=7.0, max_green_s=60.0, cycle_min_s: float = 30.0,
+                 cycle_max_s: float = 150.0, saturation_vph=SATURATION_VPH,
+                 lane_saturation_vph=None):
+        """
+        :param graphs: phase graph of each intersection
+        :param lanes: (lane_id, approach_id, movement) of each intersection's lanes,
+            in the order flows are passed to ``compute``
+        :param saturation_vph: per-lane saturation flow (PCU/h), scalar or one per intersection
+        :param lane_saturation_vph: {lane_id: PCU/h} overrides, one dict for all
+            intersections or a list with one per intersection
+        """
+        n = len(graphs)
+        sat = np.broadcast_to(np.asarray(saturation_vph, dtype=float), (n,))
+        overrides = lane_saturation_vph or {}
+        if isinstance(overrides, dict):
+            overrides = [overrides] * n
+        self.phase_ids = [g.phase_ids for g in graphs]
+        self.phase_offset = np.concatenate([[0], np.cumsum([len(g.phase_ids) for g in graphs])]).astype(np.int64)
+        self.phase_junction = np.repeat(np.arange(n), np.diff(self.phase_offset))
+        lane_phase, lane_sat = [], []
+        for ji, (g, lns) in enumerate(zip(graphs, lanes)):
+            first = {}
+            for pi, p in enumerate(g.phases):
+                for mv in p.movements:
+                    first.setdefault(tuple(mv), pi)
+            for lane_id, approach, movement in lns:
+                pi = first.get((approach, movement))
+                lane_phase.append(-1 if pi is None else self.phase_offset[ji] + pi)
+                lane_sat.append(overrides[ji].get(lane_id, sat[ji]))
+        self.lane_phase = np.array(lane_phase, dtype=np.int64)
+        self.lane_sat = np.array(lane_sat, dtype=float)
+
+        def per_junction(v):
+            return np.broadcast_to(np.asarray(v, dtype=float), (n,)).copy()
+        self.lost_time_s = per_junction(lost_time_s)
+        self.min_green_s = per_junction(min_green_s)
+        self.max_green_s = per_junction(max_green_s)
+        self.cycle_min_s = cycle_min_s
+        self.cycle_max_s = cycle_max_s
+
+    def compute(self, flow_pcu_vph: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        From (L,) lane flows in PCU/h: (J,) cycles, (P,) effective greens of
+        every phase (stacked intersection after intersection) and (P,)
+        critical flow ratios.
+        """
+        n, p = len(self.lost_time_s), len(self.phase_junction)
+        ok = self.lane_phase >= 0
+        y_lane = np.asarray(flow_pcu_vph, dtype=float)[ok] / self.lane_sat[ok]
+        y = np.zeros(p)
+        np.maximum.at(y, self.lane_phase[ok], y_lane)
+
+        pj = self.phase_junction
+        Y = np.bincount(pj, weights=y, minlength=n)
+        cycle = np.clip(webster_cycle(Y, self.lost_time_s), self.cycle_min_s, self.cycle_max_s)
+        lo, hi = self.min_green_s[pj], self.max_green_s[pj]
+        # minimum greens that do not fit in C0 stretch the cycle, maximum
+        # greens that cannot fill it cut it
+        cycle = np.clip(cycle, np.bincount(pj, weights=lo, minlength=n) + self.lost_time_s,
+                        np.bincount(pj, weights=np.maximum(lo, hi), minlength=n) + self.lost_time_s)
+        greens = self._fill(cycle - self.lost_time_s, np.where(Y[pj] > 0, y, 1.0), lo, np.maximum(lo, hi))
+        return cycle, greens, y
+
+    def _fill(self, budget: np.ndarray, weight: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """
+        Share each intersection's ``budget`` among its phases in proportion
+        to ``weight`` within [lo, hi]. Each round pins the phases whose
+        share overshoots a bound on the side that outweighs the other
+        (below lo if the missing green exceeds the excess, above hi
+        otherwise) and shares what is left among the rest, so it settles
+        within one round more than an intersection has phases.
+        """
+        n, pj = len(budget), self.phase_junction
+        greens = np.zeros(len(pj))
+        pinned = np.zeros(len(pj), dtype=bool)
+        for _ in range(int(np.diff(self.phase_offset).max(initial=0)) + 1):
+            free = ~pinned
+            left = budget - np.bincount(pj, weights=np.where(pinned, greens, 0.0), minlength=n)
+            w = np.where(free, weight, 0.0)
+            total = np.bincount(pj, weights=w, minlength=n)
+            n_free = np.bincount(pj, weights=free, minlength=n)
+            # free phases without flow at all share equally
+            share = np.where(total[pj] > 0, w / np.where(total > 0, total, 1.0)[pj],
+                             free / np.maximum(n_free, 1)[pj])
+            raw = np.where(pinned, greens, left[pj] * share)
+            below, above = free & (raw < lo), free & (raw > hi)
+            short = np.bincount(pj, weights=np.where(below, lo - raw, 0.0) - np.where(above, raw - hi, 0.0),
+                                minlength=n)[pj]
+            pin = (below & (short >= 0)) | (above & (short <= 0))
+            greens = np.where(pin, np.clip(raw, lo, hi), raw)
+            if not pin.any():
+                break
+            pinned |= pin
+        return greens
+
+    def splits(self, flow_pcu_vph: np.ndarray) -> List[Splits]:
+        cycle, greens, _ = self.compute(flow_pcu_vph)
+        return [Splits(cycle_s=float(c), greens_s=dict(zip(ids, greens[lo:hi].tolist())))
+                for c, ids, lo, hi in zip(cycle.tolist(), self.phase_ids, self.phase_offset[:-1], self.phase_offset[1:])]
+
+
+def lane_flow_pcu(lane_stats: Sequence[LaneStat]) -> np.ndarray:
+    # PCU-weighted arrival rate where perception provides it, raw vehicles/h otherwise
+    return np.array([ls.arrival_rate_vph if ls.arrival_pcu_vph is None else ls.arrival_pcu_vph
+                     for ls in lane_stats], dtype=float)
+
+
+def webster_splits(lane_stats: List[LaneStat], lost_time_s: float, min_green: float, max_green: float,
+                   phases: Optional[PhaseGraph] = None, saturation_vph: float = SATURATION_VPH) -> Splits:
+    """
+    Webster timing of one intersection. Without a phase graph every
+    (approach, movement) is its own phase, keyed "approach:movement".
+    """
+    if not lane_stats and phases is None:
+        return Splits(cycle_s=float(webster_cycle(0.0, lost_time_s)), greens_s={})
+    if phases is None:
+        movements = dict.fromkeys((ls.approach_id, ls.movement) for ls in lane_stats)
+        phases = PhaseGraph([Phase(id=f"{a}:{m}", movements=[(a, m)]) for a, m in movements])
+    net = WebsterNetwork([phases], [[(ls.lane_id, ls.approach_id, ls.movement) for ls in lane_stats]],
+                         lost_time_s=lost_time_s, min_green_s=min_green, max_green_s=max_green,
+                         saturation_vph=saturation_vph)
+    return net.splits(lane_flow_pcu(lane_stats))[0]
@@ -0,0 +1,34 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from smart_signal.perception.detector import BatchedDetector, StubDetector
+
+FRAME = np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+def test_submit_rejects_unknown_approach():
+    bd = BatchedDetector(StubDetector(), ["N", "E"], max_wait_s=0.5)
+    with pytest.raises(ValueError):
+        bd.submit("X", 1, FRAME)
+    bd.submit("N", 1, FRAME)
+    # the rejected frame must not count towards a full batch
+    t0 = time.monotonic()
+    assert list(bd.collect(timeout=0.1)) == ["N"]
+    assert time.monotonic() - t0 >= 0.4
+
+
+def test_collect_returns_once_every_approach_is_in():
+    bd = BatchedDetector(StubDetector(), ["N", "E"], max_wait_s=5.0)
+    bd.submit("N", 1, FRAME, ts=10.0)
+    threading.Timer(0.05, bd.submit, args=("E", 7, FRAME)).start()
+    t0 = time.monotonic()
+    batch = bd.collect(timeout=1.0)
+    assert time.monotonic() - t0 < 2.0
+    assert sorted(batch) == ["E", "N"]
+    assert batch["N"][:2] == (1, 10.0) and batch["E"][0] == 7
+    dets = bd.detect(batch)
+    assert sorted(dets) == ["E", "N"]
+    assert bd.collect(timeout=0.01) == {}
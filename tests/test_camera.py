@@ -0,0 +1,57 @@
+import threading
+
+import numpy as np
+
+from smart_signal.perception.camera import CameraStream
+
+
+class StalledCapture:
+    """
+    VideoCapture stand-in whose read() blocks until ``gate`` is set, and
+    that records a release() landing while a read is in flight.
+    """
+    def __init__(self):
+        self.gate = threading.Event()
+        self.reading = threading.Event()
+        self.released = threading.Event()
+        self.released_mid_read = False
+
+    def read(self):
+        self.reading.set()
+        self.gate.wait()
+        self.reading.clear()
+        return True, np.zeros((4, 4, 3), np.uint8)
+
+    def release(self):
+        self.released_mid_read |= self.reading.is_set()
+        self.released.set()
+
+
+def stream(cap):
+    cam = CameraStream("stub", fps=None, warmup_time=0.0, threaded=True)
+    cam.cap = cap
+    return cam
+
+
+def test_release_waits_for_a_blocked_read(monkeypatch):
+    cap = StalledCapture()
+    cam = stream(cap)
+    joined = []
+    monkeypatch.setattr(threading.Thread, "join", lambda self, timeout=None: joined.append(timeout))
+    cam.start()
+    assert cap.reading.wait(2.0)
+
+    cam.release()                  # join "times out" with the reader still in cap.read()
+    assert joined == [2.0] and cam.cap is None
+    assert not cap.released.is_set()
+
+    cap.gate.set()                 # the read returns; the reader sees stop and frees the capture
+    assert cap.released.wait(2.0)
+    assert not cap.released_mid_read
+
+
+def test_release_without_a_thread_frees_the_capture():
+    cap = StalledCapture()
+    cam = stream(cap)
+    cam.release()
+    assert cap.released.is_set() and cam.cap is None
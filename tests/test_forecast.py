@@ -0,0 +1,48 @@
+import numpy as np
+
+from smart_signal.control.forecast import ArrivalForecaster
+
+BIN = 900
+T0 = 4 * 86400.0          # a Monday 00:00 in the forecaster's week (utc_offset_s=0)
+
+
+def forecaster():
+    return ArrivalForecaster(2, bin_s=BIN, history_weeks=2, utc_offset_s=0)
+
+
+def stored(f, ts):
+    week, slot = divmod(f._abs_bin(ts), f.bins_per_week)
+    return f.history[week % len(f.history), slot]
+
+
+def test_bin_mean_lands_in_history():
+    f = forecaster()
+    for k, rate in enumerate((100.0, 200.0, 300.0)):
+        f.observe(T0 + 60 * k, np.array([rate, 10.0]))
+    f.observe(T0 + BIN, np.zeros(2))
+    assert np.allclose(stored(f, T0), [200.0, 10.0])
+
+
+def test_save_keeps_the_partial_bin(tmp_path):
+    path = str(tmp_path / "history.npz")
+    f = forecaster()
+    f.observe(T0, np.array([100.0, 10.0]))
+    f.observe(T0 + 60, np.array([200.0, 10.0]))
+    f.save(path)
+
+    g = forecaster()
+    g.load(path)
+    g.observe(T0 + 120, np.array([300.0, 10.0]))
+    g.observe(T0 + BIN, np.zeros(2))
+    assert np.allclose(stored(g, T0), [200.0, 10.0])
+
+
+def test_forecast_follows_the_profile():
+    f = ArrivalForecaster(1, bin_s=BIN, history_weeks=1, utc_offset_s=0, level_tau_s=60.0)
+    # a flat 100 vph day with a 400 vph hour at 08:00
+    for t in np.arange(0.0, 86400.0, 60.0):
+        f.observe(T0 + t, np.array([400.0 if 8 * 3600 <= t < 9 * 3600 else 100.0]))
+    f.observe(T0 + 86400.0, np.array([100.0]))
+    now = T0 + 86400.0 + 7 * 3600
+    assert f.forecast(now, 0.0)[0] < 150.0
+    assert f.forecast(now, 3600.0 + BIN)[0] > 300.0
@@ -0,0 +1,73 @@
+import copy
+import os
+
+import numpy as np
+import yaml
+
+from smart_signal.types import LaneStat
+from smart_signal.control.optimizer import SignalOptimizer
+from smart_signal.control.phases import MaxPressureController
+from smart_signal.runtime.host import ControllerHost
+from smart_signal.runtime.workers import LANE_STAT_DTYPE, MultiProcessOrchestrator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configs(n):
+    with open(os.path.join(ROOT, "config", "config.yaml")) as f:
+        base = yaml.safe_load(f)
+    out = []
+    for i in range(n):
+        cfg = copy.deepcopy(base)
+        cfg["intersection"]["id"] = f"J{i:02d}"
+        out.append(cfg)
+    return out
+
+
+def test_host_matches_per_junction(monkeypatch):
+    # lane geojson paths in the config are relative to the repo root
+    monkeypatch.chdir(ROOT)
+    rng = np.random.default_rng(0)
+    n = 6
+    host = ControllerHost(configs(n))
+    per = [(SignalOptimizer(), MaxPressureController(g)) for g in host.controller.graphs]
+
+    for step in range(120):
+        t = float(step)
+        queues = rng.integers(0, 4, size=host.stats.shape[0])
+        host.stats["queue_len"] = queues
+        host.step(t)
+        for j, jid in enumerate(host.junction_ids):
+            rows = range(host.lane_offset[j], host.lane_offset[j + 1])
+            ls = [LaneStat(approach_id=host.lane_ids[r][0], lane_id=host.lane_ids[r], movement="through",
+                           queue_len=int(queues[r]), arrival_rate_vph=0.0, occupancy=0.0, spillback=False)
+                  for r in rows]
+            opt, mp = per[j]
+            assert host.splits(jid).greens_s == opt.compute_splits(ls).greens_s
+            assert host.action_slots[jid].value == mp.step(t, ls)
+
+
+def test_host_reads_its_perception_workers_stats(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    started = []
+    monkeypatch.setattr(MultiProcessOrchestrator, "start", lambda self: started.append(self))
+    host = ControllerHost(configs(2))
+    try:
+        host.start_perception()
+        assert len(started) == 2
+        want = []
+        for j, mpo in enumerate(started):
+            want.append({})
+            for a, (aid, rings) in enumerate(mpo.rings.items()):
+                arr = np.zeros(rings["stats"].shape, dtype=LANE_STAT_DTYPE)
+                arr["queue_len"] = 100 * j + 10 * a + np.arange(len(arr))
+                rings["stats"].write(arr)
+                lane_ids = mpo.mappers[aid].lane_ids
+                want[-1].update({lane_ids[i]: int(arr["queue_len"][i]) for i in mpo._own_lanes[aid].tolist()})
+        host.step(0.0)
+        for j in range(2):
+            rows = range(host.lane_offset[j], host.lane_offset[j + 1])
+            assert {host.lane_ids[r]: int(host.stats["queue_len"][r]) for r in rows} == want[j]
+    finally:
+        host.close()
+    assert all(not mpo.rings for mpo in started)
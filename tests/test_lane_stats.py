@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from smart_signal.types import Track
+from smart_signal.perception.lane_mapper import LaneMapper
+from smart_signal.perception.lane_stats import LaneStatsEngine
+from smart_signal.perception.scheduler import make_scheduler
+from smart_signal.perception.tracker import make_tracker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GEOJSON = os.path.join(ROOT, "data", "lanes", "example_intersection.geojson")
+IN_N1, IN_E1 = (130.0, 180.0, 170.0, 220.0), (330.0, 180.0, 370.0, 220.0)
+
+
+def queues(engine):
+    return {ls.lane_id: ls.queue_len for ls in engine.snapshot}
+
+
+def track(bbox, last_seen):
+    return Track(track_id=1, bbox=bbox, cls="car", approach_id="N", last_seen_frame=last_seen)
+
+
+@pytest.fixture
+def engine():
+    return LaneStatsEngine(LaneMapper(GEOJSON))
+
+
+def test_unseen_tracks_are_skipped(engine):
+    engine.update([track(IN_N1, 1)], 1, 0.0)
+    engine.update([track(IN_E1, 1)], 2, 0.1)
+    assert queues(engine)["N1"] == 1 and queues(engine)["E1"] == 0
+
+
+def test_coasted_tracks_move_between_lanes(engine):
+    engine.update([track(IN_N1, 1)], 1, 0.0)
+    engine.update([track(IN_E1, 1)], 2, 0.1, coasted=True)
+    assert queues(engine)["N1"] == 0 and queues(engine)["E1"] == 1
+    assert engine.arrivals.sum() == 1      # still one arrival per track
+
+
+def test_frame_skip_needs_a_predicting_tracker():
+    cfg = {"enabled": True, "k_min": 1, "k_max": 4}
+    with pytest.raises(ValueError, match="sort"):
+        make_scheduler(cfg, make_tracker({"name": "iou"}))
+    assert make_scheduler(cfg, make_tracker({"name": "sort"})) is not None
+    assert make_scheduler({"enabled": False}, make_tracker({"name": "iou"})) is None
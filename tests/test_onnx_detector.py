@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+from onnx import TensorProto, helper
+
+from smart_signal.perception.detector import ONNXDetector
+
+
+def export(path, shape):
+    """
+    Stand-in YOLOv8 export: an ``images`` input of ``shape`` and a constant
+    (1, 84, 8) prediction with no detections.
+    """
+    out = helper.make_tensor("pred", TensorProto.FLOAT, [1, 84, 8], np.zeros(84 * 8, np.float32))
+    graph = helper.make_graph(
+        [helper.make_node("Constant", [], ["output0"], value=out)], "stub",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, shape)],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, [1, 84, 8])])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return str(path)
+
+
+def test_static_input_size_wins(tmp_path):
+    det = ONNXDetector(export(tmp_path / "m.onnx", [1, 3, 320, 320]), input_size=640, batch_size=4)
+    assert det.input_size == 320 and det.batch_size == 1
+    assert len(det.detect(np.zeros((480, 640, 3), np.uint8), 0, "N")) == 0
+
+
+def test_dynamic_input_size_is_configured(tmp_path):
+    det = ONNXDetector(export(tmp_path / "m.onnx", ["batch", 3, "height", "width"]), input_size=416, batch_size=2)
+    assert det.input_size == 416 and det.batch_size == 2
+
+
+def test_non_square_input_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="square"):
+        ONNXDetector(export(tmp_path / "m.onnx", [1, 3, 384, 640]))
@@ -0,0 +1,42 @@
+import numpy as np
+
+from smart_signal.types import Phase
+from smart_signal.control.phases import PhaseGraph
+from smart_signal.utils.timing import WebsterNetwork
+
+GRAPH = PhaseGraph([
+    Phase(id="NS", movements=[("N", "through"), ("S", "through")]),
+    Phase(id="NS_L", movements=[("N", "left"), ("S", "left")]),
+    Phase(id="EW", movements=[("E", "through"), ("W", "through")]),
+    Phase(id="EW_L", movements=[("E", "left"), ("W", "left")]),
+])
+LANES = [(f"{a}{m}", a, m) for a in "NESW" for m in ("through", "left")]
+
+
+def test_greens_and_lost_time_add_up_to_the_cycle():
+    rng = np.random.default_rng(0)
+    n = 500
+    # light to saturated junctions, many with one or more phases at a bound
+    flows = rng.uniform(0, 900, size=(n, len(LANES))) * rng.uniform(0.05, 1.0, size=(n, 1))
+    flows[rng.random(flows.shape) < 0.2] = 0.0
+    net = WebsterNetwork([GRAPH] * n, [LANES] * n, lost_time_s=rng.uniform(2, 12, n),
+                         min_green_s=7.0, max_green_s=45.0)
+    cycle, greens, _ = net.compute(flows.ravel())
+
+    pj = net.phase_junction
+    assert np.allclose(np.bincount(pj, weights=greens) + net.lost_time_s, cycle)
+    assert np.all(greens >= 7.0 - 1e-9) and np.all(greens <= 45.0 + 1e-9)
+
+
+def test_clipped_green_goes_to_the_other_phases_by_flow_ratio():
+    # NS_L is far below its minimum green, EW far above its maximum
+    flows = dict.fromkeys(LANES, 0.0)
+    flows.update({("Nthrough", "N", "through"): 300.0, ("Nleft", "N", "left"): 10.0,
+                  ("Ethrough", "E", "through"): 900.0, ("Eleft", "E", "left"): 250.0})
+    net = WebsterNetwork([GRAPH], [LANES], lost_time_s=8.0, min_green_s=7.0, max_green_s=35.0)
+    cycle, greens, y = net.compute(np.array(list(flows.values())))
+
+    g = dict(zip(GRAPH.phase_ids, greens))
+    assert g["NS_L"] == 7.0 and g["EW"] == 35.0
+    assert np.isclose(sum(greens) + 8.0, cycle[0])
+    assert np.isclose(g["NS"] / g["EW_L"], y[0] / y[3])
@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("pygame")
+
+import traffic_sim_2d as sim2d
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # sprites are loaded from images/ relative to the working directory
+    monkeypatch.chdir(ROOT)
+
+
+def counts(sim):
+    return [sim.vehicles[d]['crossed'] for d in sim2d.directionNumbers.values()]
+
+
+def test_sim_time_zero_ends():
+    sim = sim2d.TrafficSim(seed=0, sim_time=0, verbose=False)
+    sim.run()
+    assert sim.finished and sim.timeElapsed == 1
+
+
+def test_seed_reproduces_run():
+    a = sim2d.TrafficSim(seed=7, sim_time=600, verbose=False)
+    b = sim2d.TrafficSim(seed=7, sim_time=600, verbose=False)
+    a.run()
+    b.run()
+    assert counts(a) == counts(b)
+    assert [(v.seq, v.x, v.y) for v in a.active] == [(v.seq, v.x, v.y) for v in b.active]
+
+
+def test_sleep_and_retire_match_moving_everything(monkeypatch):
+    # reference: every vehicle moved on every tick and never retired
+    fast = sim2d.TrafficSim(seed=3, sim_time=900, verbose=False)
+    fast.run()
+
+    class EveryTick(sim2d.TrafficSim):
+        def step(self):
+            self.clock.advance_to(self.tick / self.ticks_per_second)
+            for vehicle in self.active:
+                vehicle.move()
+            self._awake = []
+            self.tick += 1
+
+        def run(self):
+            while not self.finished:
+                self.step()
+
+    monkeypatch.setattr(sim2d.Vehicle, "cruising", lambda self: False)
+    ref = EveryTick(seed=3, sim_time=900, verbose=False)
+    ref.run()
+    assert counts(fast) == counts(ref)
+    queued = lambda s: sorted((v.seq, v.x, v.y) for v in s.active if not v.crossed)
+    assert queued(fast) == queued(ref)
+
+
+def test_queues_stay_bounded():
+    sim = sim2d.TrafficSim(seed=1, sim_time=2400, verbose=False)
+    sim.run()
+    assert len(sim.active) < 200
+    # arrivals that do not fit wait off-screen instead of being simulated
+    assert sum(len(w) for lanes in sim.backlog.values() for w in lanes.values()) > 0
+    for v in sim.active:
+        if not v.crossed:
+            assert -sim2d.cullMargin <= v.x <= sim2d.screenWidth + sim2d.cullMargin
+            assert -sim2d.cullMargin <= v.y <= sim2d.screenHeight + sim2d.cullMargin
+
+
+def test_full_day_runs_in_linear_time():
+    sim = sim2d.TrafficSim(seed=1, sim_time=86400, verbose=False)
+    t0 = time.perf_counter()
+    sim.run()
+    elapsed = time.perf_counter() - t0
+    assert sim.timeElapsed == 86400
+    assert sum(counts(sim)) > 100000
+    assert elapsed < 180, f"24 h took {elapsed:.0f} s"
@@ -0,0 +1,95 @@
+import os
+import time
+
+import numpy as np
+import pytest
+import yaml
+
+from smart_signal.types import DetectionBatch
+from smart_signal.perception.detector import BatchedDetector
+from smart_signal.perception.ground import GroundGrid
+from smart_signal.runtime.orchestrator import Orchestrator
+from smart_signal.runtime.workers import MultiProcessOrchestrator, _ApproachPipeline, _detect_batch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def config(monkeypatch, tmp_path):
+    # paths in the config are relative to the repo root; keep baked grids out of the tree
+    monkeypatch.chdir(ROOT)
+    with open(os.path.join(ROOT, "config", "config.yaml")) as f:
+        cfg = yaml.safe_load(f)
+    cfg["lanes"]["calibration_cache_dir"] = str(tmp_path / "cache")
+    return cfg
+
+
+@pytest.fixture
+def orchestrator(config):
+    mpo = MultiProcessOrchestrator(config)
+    yield mpo
+    mpo.shutdown()
+
+
+def test_shipped_config_builds_a_ground_grid(orchestrator, config):
+    assert all(spec.calibration_path == config["lanes"]["calibration_path"] for spec in orchestrator.specs)
+    pipe = _ApproachPipeline(orchestrator.specs[0])
+    try:
+        assert isinstance(pipe.engine.ground, GroundGrid)
+    finally:
+        pipe.close()
+
+
+def test_approach_calibration_overrides_the_lanes_default(config):
+    config["intersection"]["approaches"][1]["calibration_path"] = "elsewhere.json"
+    mpo = MultiProcessOrchestrator(config)
+    try:
+        assert [s.calibration_path for s in mpo.specs][:2] == [config["lanes"]["calibration_path"], "elsewhere.json"]
+    finally:
+        mpo.shutdown()
+
+
+def test_orchestrator_falls_back_to_the_lanes_calibration(config):
+    orch = Orchestrator({"camera_source": "videos/traffic.mp4", "lane_geojson": config["lanes"]["geojson_path"],
+                         "detector": {"name": "stub"}, "lanes": config["lanes"], "display": False})
+    assert isinstance(orch.ground, GroundGrid)
+
+
+class SlowDetector:
+    def detect(self, frame, frame_id, approach_id):
+        time.sleep(0.002)
+        return DetectionBatch.empty(0)
+
+    def detect_batch(self, frames, frame_ids, approach_ids):
+        time.sleep(0.002 * len(frames))
+        return [DetectionBatch.empty(0) for _ in frames]
+
+
+@pytest.fixture
+def skipping(config):
+    config["perception"]["frame_skip"]["enabled"] = True
+    config["perception"]["tracker"]["name"] = "sort"
+    mpo = MultiProcessOrchestrator(config)
+    pipes = {spec.approach_id: _ApproachPipeline(spec) for spec in mpo.specs}
+    yield pipes
+    for pipe in pipes.values():
+        pipe.close()
+    mpo.shutdown()
+
+
+def test_worker_detect_is_timed(skipping):
+    pipe = skipping["N"]
+    frame = np.zeros((48, 64, 3), np.uint8)
+    assert pipe.should_detect(frame)
+    pipe.detect(SlowDetector(), 1, frame)
+    assert pipe.scheduler.stats["N"].detect_ms_avg >= 2.0
+
+
+def test_batched_detect_time_is_shared(skipping):
+    frame = np.zeros((48, 64, 3), np.uint8)
+    got = {aid: (1, 0.0, frame) for aid in ("N", "E")}
+    dets = _detect_batch(BatchedDetector(SlowDetector(), list(skipping)), skipping, got)
+    assert set(dets) == {"N", "E"}
+    for aid in ("N", "E"):
+        assert 2.0 <= skipping[aid].scheduler.stats[aid].detect_ms_avg < 4.0
+    assert "S" not in skipping["S"].scheduler.stats
@@ -6,14 +6,15 @@
 # Distribution using python class
 
 # *** IMAGE XY COOD IS TOP LEFT
+import argparse
+import heapq
 import random
 import math
-import time
-import threading
+from collections import deque
 # from vehicle_detection import detection
 import pygame
-import sys
-import os
+
+from smart_signal.simulation.events import EventScheduler
 
 # options={
 #    'model':'./cfg/yolo.cfg',     #specifying the path of model
@@ -30,14 +31,13 @@ defaultGreen = 20
 defaultMinimum = 10
 defaultMaximum = 60
 
-signals = []
 noOfSignals = 4
 simTime = 300       # change this to change time of simulation
-timeElapsed = 0
 
-currentGreen = 0   # Indicates which signal is green
-nextGreen = (currentGreen+1)%noOfSignals
-currentYellow = 0   # Indicates whether yellow signal is on or off 
+# Simulation clock: vehicles move once per tick; signals, spawns and the
+# elapsed-time counter are events on the same simulated clock
+ticksPerSecond = 60
+spawnInterval = 0.75
 
 # Average times for vehicles to pass the intersection
 carTime = 3
@@ -46,12 +46,6 @@ rickshawTime = 3
 busTime = 3
 truckTime = 3
 
-# Count of cars at a traffic signal
-noOfCars = 0
-noOfBikes = 0
-noOfBuses =0
-noOfTrucks = 0
-noOfRickshaws = 0
 noOfLanes = 2
 
 # Red signal time at which cars will be detected at a signal
@@ -59,11 +53,10 @@ detectionTime = 5
 
 speeds = {'car':1, 'bus':1, 'truck':1, 'rickshaw':1, 'bike':1}  # average speeds of vehicles
 
-# Coordinates of start
+# Coordinates of start (defaults; each TrafficSim moves its own copy behind the lane's tail)
 x = {'right':[0,0,0], 'down':[755,727,697], 'left':[1400,1400,1400], 'up':[602,627,657]}    
 y = {'right':[348,370,398], 'down':[0,0,0], 'left':[498,466,436], 'up':[800,800,800]}
 
-vehicles = {'right': {0:[], 1:[], 2:[], 'crossed':0}, 'down': {0:[], 1:[], 2:[], 'crossed':0}, 'left': {0:[], 1:[], 2:[], 'crossed':0}, 'up': {0:[], 1:[], 2:[], 'crossed':0}}
 vehicleTypes = {0:'car', 1:'bus', 2:'truck', 3:'rickshaw', 4:'bike'}
 directionNumbers = {0:'right', 1:'down', 2:'left', 3:'up'}
 
@@ -71,13 +64,20 @@ directionNumbers = {0:'right', 1:'down', 2:'left', 3:'up'}
 signalCoods = [(530,230),(810,230),(810,570),(530,570)]
 signalTimerCoods = [(530,210),(810,210),(810,550),(530,550)]
 vehicleCountCoods = [(480,210),(880,210),(880,550),(480,550)]
-vehicleCountTexts = ["0", "0", "0", "0"]
 
 # Coordinates of stop lines
 stopLines = {'right': 590, 'down': 330, 'left': 800, 'up': 535}
 defaultStop = {'right': 580, 'down': 320, 'left': 810, 'up': 545}
 stops = {'right': [580,580,580], 'down': [320,320,320], 'left': [810,810,810], 'up': [545,545,545]}
 
+# Crossed vehicles this far outside the screen stop being simulated, and new
+# vehicles that would start further out wait off-screen instead
+screenWidth, screenHeight = 1400, 800
+cullMargin = 200
+
+# Heading of a vehicle that has crossed, by the direction it ends up driving in
+headings = {'right': (1, 0), 'down': (0, 1), 'left': (-1, 0), 'up': (0, -1)}
+
 mid = {'right': {'x':705, 'y':445}, 'down': {'x':695, 'y':450}, 'left': {'x':695, 'y':425}, 'up': {'x':695, 'y':400}}
 rotationAngle = 3
 
@@ -85,8 +85,43 @@ rotationAngle = 3
 gap = 15    # stopping gap
 gap2 = 15   # moving gap
 
-pygame.init()
-simulation = pygame.sprite.Group()
+# A lane leader that has crossed and finished turning is retired (only drawn)
+# once its follower is this far behind along its heading: gap2 plus what a
+# follower can close up while turning, so it is never held by it again
+retireGap = 150
+
+class SpriteCache:
+    """
+    Loads each images/<direction>/<class>.png once and pre-rotates it for
+    every turning angle (multiples of rotationAngle up to 90 degrees), along
+    with the bounding-rect size of each frame. Memory is bounded by the
+    asset set, not by how many vehicles are on the road.
+    """
+    def __init__(self, root="images"):
+        self.root = root
+        self._images = {}
+        self._frames = {}
+
+    def image(self, direction, vehicleClass):
+        key = (direction, vehicleClass)
+        if key not in self._images:
+            img = pygame.image.load(self.root + "/" + direction + "/" + vehicleClass + ".png")
+            self._images[key] = img
+            frames = {}
+            for angle in range(0, 90 + rotationAngle, rotationAngle):
+                rotated = img if angle == 0 else pygame.transform.rotate(img, -angle)
+                rect = rotated.get_rect()
+                frames[angle] = (rotated, (rect.width, rect.height))
+            self._frames[key] = frames
+        return self._images[key]
+
+    def frame(self, direction, vehicleClass, angle):
+        key = (direction, vehicleClass)
+        if key not in self._frames:
+            self.image(direction, vehicleClass)
+        return self._frames[key][angle]
+
+sprites = SpriteCache()
 
 class TrafficSignal:
     def __init__(self, red, yellow, green, minimum, maximum):
@@ -98,79 +133,122 @@ class TrafficSignal:
         self.signalText = "30"
         self.totalGreenTime = 0
         
-class Vehicle(pygame.sprite.Sprite):
-    def __init__(self, lane, vehicleClass, direction_number, direction, will_turn):
-        pygame.sprite.Sprite.__init__(self)
+class Vehicle:
+    def __init__(self, sim, lane, vehicleClass, direction_number, direction, will_turn):
+        self.sim = sim
         self.lane = lane
         self.vehicleClass = vehicleClass
         self.speed = speeds[vehicleClass]
         self.direction_number = direction_number
         self.direction = direction
-        self.x = x[direction][lane]
-        self.y = y[direction][lane]
+        self.x = sim.x[direction][lane]
+        self.y = sim.y[direction][lane]
         self.crossed = 0
         self.willTurn = will_turn
         self.turned = 0
         self.rotateAngle = 0
-        vehicles[direction][lane].append(self)
-        # self.stop = stops[direction][lane]
-        self.index = len(vehicles[direction][lane]) - 1
-        path = "images/" + direction + "/" + vehicleClass + ".png"
-        self.originalImage = pygame.image.load(path)
-        self.currentImage = pygame.image.load(path)
-
-    
+        self.seq = sim.spawned   # spawn order, the order vehicles move in within a tick
+        sim.spawned += 1
+        self.awake = False
+        self.lastMove = -1       # last tick this vehicle moved on
+        self.retired = None      # (tick, x, y) once only drawn
+        lane_vehicles = sim.vehicles[direction][lane]
+        self.ahead = lane_vehicles[-1] if lane_vehicles else None   # vehicle in front in this lane
+        self.behind = None
+        if self.ahead is not None:
+            self.ahead.behind = self
+        lane_vehicles.append(self)
+        self.originalImage = sprites.image(direction, vehicleClass)
+        self._setFrame(0)
+
+        prev = self.ahead
         if(direction=='right'):
-            if(len(vehicles[direction][lane])>1 and vehicles[direction][lane][self.index-1].crossed==0):    # if more than 1 vehicle in the lane of vehicle before it has crossed stop line
-                self.stop = vehicles[direction][lane][self.index-1].stop - vehicles[direction][lane][self.index-1].currentImage.get_rect().width - gap         # setting stop coordinate as: stop coordinate of next vehicle - width of next vehicle - gap
+            if(prev is not None and prev.crossed==0):    # if more than 1 vehicle in the lane of vehicle before it has crossed stop line
+                self.stop = prev.stop - prev.width - gap         # setting stop coordinate as: stop coordinate of next vehicle - width of next vehicle - gap
             else:
                 self.stop = defaultStop[direction]
             # Set new starting and stopping coordinate
-            temp = self.currentImage.get_rect().width + gap    
-            x[direction][lane] -= temp
-            stops[direction][lane] -= temp
+            temp = self.width + gap    
+            sim.x[direction][lane] -= temp
+            sim.stops[direction][lane] -= temp
         elif(direction=='left'):
-            if(len(vehicles[direction][lane])>1 and vehicles[direction][lane][self.index-1].crossed==0):
-                self.stop = vehicles[direction][lane][self.index-1].stop + vehicles[direction][lane][self.index-1].currentImage.get_rect().width + gap
+            if(prev is not None and prev.crossed==0):
+                self.stop = prev.stop + prev.width + gap
             else:
                 self.stop = defaultStop[direction]
-            temp = self.currentImage.get_rect().width + gap
-            x[direction][lane] += temp
-            stops[direction][lane] += temp
+            temp = self.width + gap
+            sim.x[direction][lane] += temp
+            sim.stops[direction][lane] += temp
         elif(direction=='down'):
-            if(len(vehicles[direction][lane])>1 and vehicles[direction][lane][self.index-1].crossed==0):
-                self.stop = vehicles[direction][lane][self.index-1].stop - vehicles[direction][lane][self.index-1].currentImage.get_rect().height - gap
+            if(prev is not None and prev.crossed==0):
+                self.stop = prev.stop - prev.height - gap
             else:
                 self.stop = defaultStop[direction]
-            temp = self.currentImage.get_rect().height + gap
-            y[direction][lane] -= temp
-            stops[direction][lane] -= temp
+            temp = self.height + gap
+            sim.y[direction][lane] -= temp
+            sim.stops[direction][lane] -= temp
         elif(direction=='up'):
-            if(len(vehicles[direction][lane])>1 and vehicles[direction][lane][self.index-1].crossed==0):
-                self.stop = vehicles[direction][lane][self.index-1].stop + vehicles[direction][lane][self.index-1].currentImage.get_rect().height + gap
+            if(prev is not None and prev.crossed==0):
+                self.stop = prev.stop + prev.height + gap
             else:
                 self.stop = defaultStop[direction]
-            temp = self.currentImage.get_rect().height + gap
-            y[direction][lane] += temp
-            stops[direction][lane] += temp
-        simulation.add(self)
+            temp = self.height + gap
+            sim.y[direction][lane] += temp
+            sim.stops[direction][lane] += temp
+        sim.active.append(self)
+        sim.wake(self)
+
+    def _setFrame(self, angle):
+        # Pre-rotated sprite and its bounding-rect size, shared by all vehicles
+        self.currentImage, (self.width, self.height) = sprites.frame(self.direction, self.vehicleClass, angle)
 
     def render(self, screen):
         screen.blit(self.currentImage, (self.x, self.y))
 
+    def cruising(self):
+        # crossed and done turning: from here on it only drives straight
+        return self.crossed == 1 and (self.willTurn == 0 or self.turned == 1)
+
+    def heading(self):
+        if self.turned:
+            return headings[directionNumbers[(self.direction_number+1)%noOfSignals]]
+        return headings[self.direction]
+
+    def lead(self, follower):
+        # distance from follower to this vehicle along this vehicle's heading
+        hx, hy = self.heading()
+        if hx > 0:
+            return self.x - (follower.x + follower.width)
+        if hx < 0:
+            return follower.x - (self.x + self.width)
+        if hy > 0:
+            return self.y - (follower.y + follower.height)
+        return follower.y - (self.y + self.height)
+
+    def drift(self, tick):
+        # a retired vehicle keeps driving straight at its speed
+        t0, x0, y0 = self.retired
+        hx, hy = self.heading()
+        self.x = x0 + hx * self.speed * (tick - t0)
+        self.y = y0 + hy * self.speed * (tick - t0)
+
+    def offscreen(self):
+        return (self.x < -cullMargin or self.x > screenWidth + cullMargin
+                or self.y < -cullMargin or self.y > screenHeight + cullMargin)
+
     def move(self):
         if(self.direction=='right'):
-            if(self.crossed==0 and self.x+self.currentImage.get_rect().width>stopLines[self.direction]):   # if the image has crossed stop line now
+            if(self.crossed==0 and self.x+self.width>stopLines[self.direction]):   # if the image has crossed stop line now
                 self.crossed = 1
-                vehicles[self.direction]['crossed'] += 1
+                self.sim.vehicles[self.direction]['crossed'] += 1
             if(self.willTurn==1):
-                if(self.crossed==0 or self.x+self.currentImage.get_rect().width<mid[self.direction]['x']):
-                    if((self.x+self.currentImage.get_rect().width<=self.stop or (currentGreen==0 and currentYellow==0) or self.crossed==1) and (self.index==0 or self.x+self.currentImage.get_rect().width<(vehicles[self.direction][self.lane][self.index-1].x - gap2) or vehicles[self.direction][self.lane][self.index-1].turned==1)):                
+                if(self.crossed==0 or self.x+self.width<mid[self.direction]['x']):
+                    if((self.x+self.width<=self.stop or (self.sim.currentGreen==0 and self.sim.currentYellow==0) or self.crossed==1) and (self.ahead is None or self.x+self.width<(self.ahead.x - gap2) or self.ahead.turned==1)):                
                         self.x += self.speed
                 else:   
                     if(self.turned==0):
                         self.rotateAngle += rotationAngle
-                        self.currentImage = pygame.transform.rotate(self.originalImage, -self.rotateAngle)
+                        self._setFrame(self.rotateAngle)
                         self.x += 2
                         self.y += 1.8
                         if(self.rotateAngle==90):
@@ -180,50 +258,50 @@ class Vehicle(pygame.sprite.Sprite):
                             # self.y = mid[self.direction]['y']
                             # self.image = pygame.image.load(path)
                     else:
-                        if(self.index==0 or self.y+self.currentImage.get_rect().height<(vehicles[self.direction][self.lane][self.index-1].y - gap2) or self.x+self.currentImage.get_rect().width<(vehicles[self.direction][self.lane][self.index-1].x - gap2)):
+                        if(self.ahead is None or self.y+self.height<(self.ahead.y - gap2) or self.x+self.width<(self.ahead.x - gap2)):
                             self.y += self.speed
             else: 
-                if((self.x+self.currentImage.get_rect().width<=self.stop or self.crossed == 1 or (currentGreen==0 and currentYellow==0)) and (self.index==0 or self.x+self.currentImage.get_rect().width<(vehicles[self.direction][self.lane][self.index-1].x - gap2) or (vehicles[self.direction][self.lane][self.index-1].turned==1))):                
+                if((self.x+self.width<=self.stop or self.crossed == 1 or (self.sim.currentGreen==0 and self.sim.currentYellow==0)) and (self.ahead is None or self.x+self.width<(self.ahead.x - gap2) or (self.ahead.turned==1))):                
                 # (if the image has not reached its stop coordinate or has crossed stop line or has green signal) and (it is either the first vehicle in that lane or it is has enough gap to the next vehicle in that lane)
                     self.x += self.speed  # move the vehicle
 
 
 
         elif(self.direction=='down'):
-            if(self.crossed==0 and self.y+self.currentImage.get_rect().height>stopLines[self.direction]):
+            if(self.crossed==0 and self.y+self.height>stopLines[self.direction]):
                 self.crossed = 1
-                vehicles[self.direction]['crossed'] += 1
+                self.sim.vehicles[self.direction]['crossed'] += 1
             if(self.willTurn==1):
-                if(self.crossed==0 or self.y+self.currentImage.get_rect().height<mid[self.direction]['y']):
-                    if((self.y+self.currentImage.get_rect().height<=self.stop or (currentGreen==1 and currentYellow==0) or self.crossed==1) and (self.index==0 or self.y+self.currentImage.get_rect().height<(vehicles[self.direction][self.lane][self.index-1].y - gap2) or vehicles[self.direction][self.lane][self.index-1].turned==1)):                
+                if(self.crossed==0 or self.y+self.height<mid[self.direction]['y']):
+                    if((self.y+self.height<=self.stop or (self.sim.currentGreen==1 and self.sim.currentYellow==0) or self.crossed==1) and (self.ahead is None or self.y+self.height<(self.ahead.y - gap2) or self.ahead.turned==1)):                
                         self.y += self.speed
                 else:   
                     if(self.turned==0):
                         self.rotateAngle += rotationAngle
-                        self.currentImage = pygame.transform.rotate(self.originalImage, -self.rotateAngle)
+                        self._setFrame(self.rotateAngle)
                         self.x -= 2.5
                         self.y += 2
                         if(self.rotateAngle==90):
                             self.turned = 1
                     else:
-                        if(self.index==0 or self.x>(vehicles[self.direction][self.lane][self.index-1].x + vehicles[self.direction][self.lane][self.index-1].currentImage.get_rect().width + gap2) or self.y<(vehicles[self.direction][self.lane][self.index-1].y - gap2)):
+                        if(self.ahead is None or self.x>(self.ahead.x + self.ahead.width + gap2) or self.y<(self.ahead.y - gap2)):
                             self.x -= self.speed
             else: 
-                if((self.y+self.currentImage.get_rect().height<=self.stop or self.crossed == 1 or (currentGreen==1 and currentYellow==0)) and (self.index==0 or self.y+self.currentImage.get_rect().height<(vehicles[self.direction][self.lane][self.index-1].y - gap2) or (vehicles[self.direction][self.lane][self.index-1].turned==1))):                
+                if((self.y+self.height<=self.stop or self.crossed == 1 or (self.sim.currentGreen==1 and self.sim.currentYellow==0)) and (self.ahead is None or self.y+self.height<(self.ahead.y - gap2) or (self.ahead.turned==1))):                
                     self.y += self.speed
             
         elif(self.direction=='left'):
             if(self.crossed==0 and self.x<stopLines[self.direction]):
                 self.crossed = 1
-                vehicles[self.direction]['crossed'] += 1
+                self.sim.vehicles[self.direction]['crossed'] += 1
             if(self.willTurn==1):
                 if(self.crossed==0 or self.x>mid[self.direction]['x']):
-                    if((self.x>=self.stop or (currentGreen==2 and currentYellow==0) or self.crossed==1) and (self.index==0 or self.x>(vehicles[self.direction][self.lane][self.index-1].x + vehicles[self.direction][self.lane][self.index-1].currentImage.get_rect().width + gap2) or vehicles[self.direction][self.lane][self.index-1].turned==1)):                
+                    if((self.x>=self.stop or (self.sim.currentGreen==2 and self.sim.currentYellow==0) or self.crossed==1) and (self.ahead is None or self.x>(self.ahead.x + self.ahead.width + gap2) or self.ahead.turned==1)):                
                         self.x -= self.speed
                 else: 
                     if(self.turned==0):
                         self.rotateAngle += rotationAngle
-                        self.currentImage = pygame.transform.rotate(self.originalImage, -self.rotateAngle)
+                        self._setFrame(self.rotateAngle)
                         self.x -= 1.8
                         self.y -= 2.5
                         if(self.rotateAngle==90):
@@ -233,160 +311,205 @@ class Vehicle(pygame.sprite.Sprite):
                             # self.y = mid[self.direction]['y']
                             # self.currentImage = pygame.image.load(path)
                     else:
-                        if(self.index==0 or self.y>(vehicles[self.direction][self.lane][self.index-1].y + vehicles[self.direction][self.lane][self.index-1].currentImage.get_rect().height +  gap2) or self.x>(vehicles[self.direction][self.lane][self.index-1].x + gap2)):
+                        if(self.ahead is None or self.y>(self.ahead.y + self.ahead.height +  gap2) or self.x>(self.ahead.x + gap2)):
                             self.y -= self.speed
             else: 
-                if((self.x>=self.stop or self.crossed == 1 or (currentGreen==2 and currentYellow==0)) and (self.index==0 or self.x>(vehicles[self.direction][self.lane][self.index-1].x + vehicles[self.direction][self.lane][self.index-1].currentImage.get_rect().width + gap2) or (vehicles[self.direction][self.lane][self.index-1].turned==1))):                
+                if((self.x>=self.stop or self.crossed == 1 or (self.sim.currentGreen==2 and self.sim.currentYellow==0)) and (self.ahead is None or self.x>(self.ahead.x + self.ahead.width + gap2) or (self.ahead.turned==1))):                
                 # (if the image has not reached its stop coordinate or has crossed stop line or has green signal) and (it is either the first vehicle in that lane or it is has enough gap to the next vehicle in that lane)
                     self.x -= self.speed  # move the vehicle    
-            # if((self.x>=self.stop or self.crossed == 1 or (currentGreen==2 and currentYellow==0)) and (self.index==0 or self.x>(vehicles[self.direction][self.lane][self.index-1].x + vehicles[self.direction][self.lane][self.index-1].currentImage.get_rect().width + gap2))):                
+            # if((self.x>=self.stop or self.crossed == 1 or (self.sim.currentGreen==2 and self.sim.currentYellow==0)) and (self.ahead is None or self.x>(self.ahead.x + self.ahead.width + gap2))):                
             #     self.x -= self.speed
         elif(self.direction=='up'):
             if(self.crossed==0 and self.y<stopLines[self.direction]):
                 self.crossed = 1
-                vehicles[self.direction]['crossed'] += 1
+                self.sim.vehicles[self.direction]['crossed'] += 1
             if(self.willTurn==1):
                 if(self.crossed==0 or self.y>mid[self.direction]['y']):
-                    if((self.y>=self.stop or (currentGreen==3 and currentYellow==0) or self.crossed == 1) and (self.index==0 or self.y>(vehicles[self.direction][self.lane][self.index-1].y + vehicles[self.direction][self.lane][self.index-1].currentImage.get_rect().height +  gap2) or vehicles[self.direction][self.lane][self.index-1].turned==1)):
+                    if((self.y>=self.stop or (self.sim.currentGreen==3 and self.sim.currentYellow==0) or self.crossed == 1) and (self.ahead is None or self.y>(self.ahead.y + self.ahead.height +  gap2) or self.ahead.turned==1)):
                         self.y -= self.speed
                 else:   
                     if(self.turned==0):
                         self.rotateAngle += rotationAngle
-                        self.currentImage = pygame.transform.rotate(self.originalImage, -self.rotateAngle)
+                        self._setFrame(self.rotateAngle)
                         self.x += 1
                         self.y -= 1
                         if(self.rotateAngle==90):
                             self.turned = 1
                     else:
-                        if(self.index==0 or self.x<(vehicles[self.direction][self.lane][self.index-1].x - vehicles[self.direction][self.lane][self.index-1].currentImage.get_rect().width - gap2) or self.y>(vehicles[self.direction][self.lane][self.index-1].y + gap2)):
+                        if(self.ahead is None or self.x<(self.ahead.x - self.ahead.width - gap2) or self.y>(self.ahead.y + gap2)):
                             self.x += self.speed
             else: 
-                if((self.y>=self.stop or self.crossed == 1 or (currentGreen==3 and currentYellow==0)) and (self.index==0 or self.y>(vehicles[self.direction][self.lane][self.index-1].y + vehicles[self.direction][self.lane][self.index-1].currentImage.get_rect().height + gap2) or (vehicles[self.direction][self.lane][self.index-1].turned==1))):                
+                if((self.y>=self.stop or self.crossed == 1 or (self.sim.currentGreen==3 and self.sim.currentYellow==0)) and (self.ahead is None or self.y>(self.ahead.y + self.ahead.height + gap2) or (self.ahead.turned==1))):                
                     self.y -= self.speed
 
-# Initialization of signals with default values
-def initialize():
-    ts1 = TrafficSignal(0, defaultYellow, defaultGreen, defaultMinimum, defaultMaximum)
-    signals.append(ts1)
-    ts2 = TrafficSignal(ts1.red+ts1.yellow+ts1.green, defaultYellow, defaultGreen, defaultMinimum, defaultMaximum)
-    signals.append(ts2)
-    ts3 = TrafficSignal(defaultRed, defaultYellow, defaultGreen, defaultMinimum, defaultMaximum)
-    signals.append(ts3)
-    ts4 = TrafficSignal(defaultRed, defaultYellow, defaultGreen, defaultMinimum, defaultMaximum)
-    signals.append(ts4)
-    repeat()
-
-# Set time according to formula
-def setTime():
-    global noOfCars, noOfBikes, noOfBuses, noOfTrucks, noOfRickshaws, noOfLanes
-    global carTime, busTime, truckTime, rickshawTime, bikeTime
-    os.system("say detecting vehicles, "+directionNumbers[(currentGreen+1)%noOfSignals])
-    noOfCars, noOfBuses, noOfTrucks, noOfRickshaws, noOfBikes = 0,0,0,0,0
-    for j in range(len(vehicles[directionNumbers[nextGreen]][0])):
-        vehicle = vehicles[directionNumbers[nextGreen]][0][j]
-        if(vehicle.crossed==0):
-            vclass = vehicle.vehicleClass
-            # print(vclass)
-            noOfBikes += 1
-    for i in range(1,3):
-        for j in range(len(vehicles[directionNumbers[nextGreen]][i])):
-            vehicle = vehicles[directionNumbers[nextGreen]][i][j]
+class TrafficSim:
+    """
+    Deterministic, thread-free version of the simulation. Signal timers,
+    vehicle generation and the elapsed-time counter are events on an
+    EventScheduler; step() advances one tick of simulated time and moves
+    every vehicle once. Nothing sleeps, so headless runs go as fast as the
+    CPU allows and the same seed always reproduces the same run.
+
+    Only vehicles that can move are stepped: one that did not move stays
+    put until the signal changes or the vehicle ahead moves, so it sleeps
+    until then. Lane leaders driving off past the junction are retired,
+    and arrivals beyond the edge of the screen wait in a per-lane backlog,
+    so the work per tick is bounded however long the queues grow.
+    """
+    def __init__(self, seed=None, sim_time=simTime, ticks_per_second=ticksPerSecond, verbose=True):
+        self.rng = random.Random(seed)
+        self.sim_time = sim_time
+        self.ticks_per_second = ticks_per_second
+        self.verbose = verbose
+        self.clock = EventScheduler()
+        self.tick = 0
+
+        self.signals = []
+        self.currentGreen = 0   # Indicates which signal is green
+        self.nextGreen = (self.currentGreen+1)%noOfSignals
+        self.currentYellow = 0   # Indicates whether yellow signal is on or off
+        self.timeElapsed = 0
+        self.finished = False
+
+        self.x = {k: list(v) for k, v in x.items()}
+        self.y = {k: list(v) for k, v in y.items()}
+        self.stops = {k: list(v) for k, v in stops.items()}
+        self.vehicles = {d: {0:[], 1:[], 2:[], 'crossed':0} for d in directionNumbers.values()}
+        self.active = []    # vehicles still being moved, in spawn order
+        self.leaving = []   # retired vehicles, only drawn until off-screen
+        self.backlog = {d: {0:deque(), 1:deque(), 2:deque()} for d in directionNumbers.values()}
+        self.spawned = 0
+        self._awake = []    # heap of (seq, vehicle) to move on the next tick
+
+        # Same start order as the old threads: clock, signals, generator
+        self.clock.every(1, self.simulationTime)
+        self.initialize()
+        self.clock.every(spawnInterval, self.generateVehicle, first_s=0)
+
+    @property
+    def now(self):
+        return self.clock.now
+
+    # Initialization of signals with default values
+    def initialize(self):
+        ts1 = TrafficSignal(0, defaultYellow, defaultGreen, defaultMinimum, defaultMaximum)
+        self.signals.append(ts1)
+        ts2 = TrafficSignal(ts1.red+ts1.yellow+ts1.green, defaultYellow, defaultGreen, defaultMinimum, defaultMaximum)
+        self.signals.append(ts2)
+        ts3 = TrafficSignal(defaultRed, defaultYellow, defaultGreen, defaultMinimum, defaultMaximum)
+        self.signals.append(ts3)
+        ts4 = TrafficSignal(defaultRed, defaultYellow, defaultGreen, defaultMinimum, defaultMaximum)
+        self.signals.append(ts4)
+        self.clock.every(1, self.signalTick, first_s=0)
+
+    # Set time according to formula
+    def setTime(self):
+        if self.verbose:
+            print("Detecting vehicles,", directionNumbers[(self.currentGreen+1)%noOfSignals])
+        noOfCars, noOfBuses, noOfTrucks, noOfRickshaws, noOfBikes = 0,0,0,0,0
+        for vehicle in self.vehicles[directionNumbers[self.nextGreen]][0]:
             if(vehicle.crossed==0):
-                vclass = vehicle.vehicleClass
-                # print(vclass)
-                if(vclass=='car'):
-                    noOfCars += 1
-                elif(vclass=='bus'):
-                    noOfBuses += 1
-                elif(vclass=='truck'):
-                    noOfTrucks += 1
-                elif(vclass=='rickshaw'):
-                    noOfRickshaws += 1
-    # print(noOfCars)
-    greenTime = math.ceil(((noOfCars*carTime) + (noOfRickshaws*rickshawTime) + (noOfBuses*busTime) + (noOfTrucks*truckTime)+ (noOfBikes*bikeTime))/(noOfLanes+1))
-    # greenTime = math.ceil((noOfVehicles)/noOfLanes) 
-    print('Green Time: ',greenTime)
-    if(greenTime<defaultMinimum):
-        greenTime = defaultMinimum
-    elif(greenTime>defaultMaximum):
-        greenTime = defaultMaximum
-    # greenTime = random.randint(15,50)
-    signals[(currentGreen+1)%(noOfSignals)].green = greenTime
-   
-def repeat():
-    global currentGreen, currentYellow, nextGreen
-    while(signals[currentGreen].green>0):   # while the timer of current green signal is not zero
-        printStatus()
-        updateValues()
-        if(signals[(currentGreen+1)%(noOfSignals)].red==detectionTime):    # set time of next green signal 
-            thread = threading.Thread(name="detection",target=setTime, args=())
-            thread.daemon = True
-            thread.start()
-            # setTime()
-        time.sleep(1)
-    currentYellow = 1   # set yellow signal on
-    vehicleCountTexts[currentGreen] = "0"
-    # reset stop coordinates of lanes and vehicles 
-    for i in range(0,3):
-        stops[directionNumbers[currentGreen]][i] = defaultStop[directionNumbers[currentGreen]]
-        for vehicle in vehicles[directionNumbers[currentGreen]][i]:
-            vehicle.stop = defaultStop[directionNumbers[currentGreen]]
-    while(signals[currentGreen].yellow>0):  # while the timer of current yellow signal is not zero
-        printStatus()
-        updateValues()
-        time.sleep(1)
-    currentYellow = 0   # set yellow signal off
-    
-    # reset all signal times of current signal to default times
-    signals[currentGreen].green = defaultGreen
-    signals[currentGreen].yellow = defaultYellow
-    signals[currentGreen].red = defaultRed
-       
-    currentGreen = nextGreen # set next signal as green signal
-    nextGreen = (currentGreen+1)%noOfSignals    # set next green signal
-    signals[nextGreen].red = signals[currentGreen].yellow+signals[currentGreen].green    # set the red time of next to next signal as (yellow time + green time) of next signal
-    repeat()     
-
-# Print the signal timers on cmd
-def printStatus():                                                                                           
-	for i in range(0, noOfSignals):
-		if(i==currentGreen):
-			if(currentYellow==0):
-				print("GREEN TS",i+1,"-> r:",signals[i].red," y:",signals[i].yellow," g:",signals[i].green)
-			else:
-				print("YELLOW TS",i+1,"-> r:",signals[i].red," y:",signals[i].yellow," g:",signals[i].green)
-		else:
-			print("RED TS",i+1,"-> r:",signals[i].red," y:",signals[i].yellow," g:",signals[i].green)
-	print()
-
-# Update values of the signal timers after every second
-def updateValues():
-    for i in range(0, noOfSignals):
-        if(i==currentGreen):
-            if(currentYellow==0):
-                signals[i].green-=1
-                signals[i].totalGreenTime+=1
+                noOfBikes += 1
+        for i in range(1,3):
+            for vehicle in self.vehicles[directionNumbers[self.nextGreen]][i]:
+                if(vehicle.crossed==0):
+                    vclass = vehicle.vehicleClass
+                    if(vclass=='car'):
+                        noOfCars += 1
+                    elif(vclass=='bus'):
+                        noOfBuses += 1
+                    elif(vclass=='truck'):
+                        noOfTrucks += 1
+                    elif(vclass=='rickshaw'):
+                        noOfRickshaws += 1
+        greenTime = math.ceil(((noOfCars*carTime) + (noOfRickshaws*rickshawTime) + (noOfBuses*busTime) + (noOfTrucks*truckTime)+ (noOfBikes*bikeTime))/(noOfLanes+1))
+        if self.verbose:
+            print('Green Time: ',greenTime)
+        if(greenTime<defaultMinimum):
+            greenTime = defaultMinimum
+        elif(greenTime>defaultMaximum):
+            greenTime = defaultMaximum
+        self.signals[(self.currentGreen+1)%(noOfSignals)].green = greenTime
+
+    def signalTick(self):
+        """
+        One second of the signal controller (the body of the old recursive
+        repeat() loop between two sleeps): apply any green->yellow->next
+        transitions whose timers have run out, then count down once.
+        """
+        while True:
+            sig = self.signals[self.currentGreen]
+            if self.currentYellow == 0:
+                if sig.green > 0:   # while the timer of current green signal is not zero
+                    self.printStatus()
+                    self.updateValues()
+                    if(self.signals[(self.currentGreen+1)%(noOfSignals)].red==detectionTime):    # set time of next green signal
+                        self.setTime()
+                    return
+                self.currentYellow = 1   # set yellow signal on
+                # reset stop coordinates of lanes and vehicles
+                for i in range(0,3):
+                    self.stops[directionNumbers[self.currentGreen]][i] = defaultStop[directionNumbers[self.currentGreen]]
+                    for vehicle in self.vehicles[directionNumbers[self.currentGreen]][i]:
+                        vehicle.stop = defaultStop[directionNumbers[self.currentGreen]]
+                self.wakeAll()
+            if sig.yellow > 0:  # while the timer of current yellow signal is not zero
+                self.printStatus()
+                self.updateValues()
+                return
+            self.currentYellow = 0   # set yellow signal off
+
+            # reset all signal times of current signal to default times
+            sig.green = defaultGreen
+            sig.yellow = defaultYellow
+            sig.red = defaultRed
+
+            self.currentGreen = self.nextGreen # set next signal as green signal
+            self.nextGreen = (self.currentGreen+1)%noOfSignals    # set next green signal
+            self.wakeAll()
+            self.signals[self.nextGreen].red = self.signals[self.currentGreen].yellow+self.signals[self.currentGreen].green    # set the red time of next to next signal as (yellow time + green time) of next signal
+
+    # Print the signal timers on cmd
+    def printStatus(self):
+        if not self.verbose:
+            return
+        for i in range(0, noOfSignals):
+            s = self.signals[i]
+            if(i==self.currentGreen):
+                state = "GREEN" if self.currentYellow==0 else "YELLOW"
             else:
-                signals[i].yellow-=1
-        else:
-            signals[i].red-=1
+                state = "RED"
+            print(state, "TS",i+1,"-> r:",s.red," y:",s.yellow," g:",s.green)
+        print()
+
+    # Update values of the signal timers after every second
+    def updateValues(self):
+        for i in range(0, noOfSignals):
+            if(i==self.currentGreen):
+                if(self.currentYellow==0):
+                    self.signals[i].green-=1
+                    self.signals[i].totalGreenTime+=1
+                else:
+                    self.signals[i].yellow-=1
+            else:
+                self.signals[i].red-=1
 
-# Generating vehicles in the simulation
-def generateVehicles():
-    while(True):
-        vehicle_type = random.randint(0,4)
+    # Generating vehicles in the simulation
+    def generateVehicle(self):
+        rng = self.rng
+        vehicle_type = rng.randint(0,4)
         if(vehicle_type==4):
             lane_number = 0
         else:
-            lane_number = random.randint(0,1) + 1
+            lane_number = rng.randint(0,1) + 1
         will_turn = 0
         if(lane_number==2):
-            temp = random.randint(0,4)
+            temp = rng.randint(0,4)
             if(temp<=2):
                 will_turn = 1
             elif(temp>2):
                 will_turn = 0
-        temp = random.randint(0,999)
+        temp = rng.randint(0,999)
         direction_number = 0
         a = [400,800,900,1000]
         if(temp<a[0]):
@@ -397,109 +520,254 @@ def generateVehicles():
             direction_number = 2
         elif(temp<a[3]):
             direction_number = 3
-        Vehicle(lane_number, vehicleTypes[vehicle_type], direction_number, directionNumbers[direction_number], will_turn)
-        time.sleep(0.75)
-
-def simulationTime():
-    global timeElapsed, simTime
-    while(True):
-        timeElapsed += 1
-        time.sleep(1)
-        if(timeElapsed==simTime):
-            totalVehicles = 0
-            print('Lane-wise Vehicle Counts')
-            for i in range(noOfSignals):
-                print('Lane',i+1,':',vehicles[directionNumbers[i]]['crossed'])
-                totalVehicles += vehicles[directionNumbers[i]]['crossed']
-            print('Total vehicles passed: ',totalVehicles)
-            print('Total time passed: ',timeElapsed)
-            print('No. of vehicles passed per unit time: ',(float(totalVehicles)/float(timeElapsed)))
-            os._exit(1)
-    
-
-class Main:
-    thread4 = threading.Thread(name="simulationTime",target=simulationTime, args=()) 
-    thread4.daemon = True
-    thread4.start()
-
-    thread2 = threading.Thread(name="initialization",target=initialize, args=())    # initialization
-    thread2.daemon = True
-    thread2.start()
-
-    # Colours 
+        self.spawn(lane_number, vehicleTypes[vehicle_type], direction_number, will_turn)
+
+    def spawn(self, lane, vehicleClass, direction_number, will_turn):
+        direction = directionNumbers[direction_number]
+        waiting = self.backlog[direction][lane]
+        if waiting or not self.spawnAnchor(direction, lane):
+            waiting.append((vehicleClass, direction_number, will_turn))
+        else:
+            Vehicle(self, lane, vehicleClass, direction_number, direction, will_turn)
+
+    def spawnAnchor(self, direction, lane):
+        """
+        Move the lane's start coordinate right behind its last vehicle that
+        has not crossed, or back to the default start once the tail has
+        cleared it. Returns whether that point is still near the screen.
+        """
+        lane_vehicles = self.vehicles[direction][lane]
+        tail = lane_vehicles[-1] if lane_vehicles else None
+        sx, sy, stop = x[direction][lane], y[direction][lane], defaultStop[direction]
+        if tail is not None and tail.crossed == 0:
+            if direction == 'right':
+                sx, stop = min(sx, tail.x - tail.width - gap), tail.stop - tail.width - gap
+            elif direction == 'left':
+                sx, stop = max(sx, tail.x + tail.width + gap), tail.stop + tail.width + gap
+            elif direction == 'down':
+                sy, stop = min(sy, tail.y - tail.height - gap), tail.stop - tail.height - gap
+            else:
+                sy, stop = max(sy, tail.y + tail.height + gap), tail.stop + tail.height + gap
+        self.x[direction][lane], self.y[direction][lane], self.stops[direction][lane] = sx, sy, stop
+        return (-cullMargin <= sx <= screenWidth + cullMargin) and (-cullMargin <= sy <= screenHeight + cullMargin)
+
+    def releaseBacklog(self):
+        # vehicles waiting off-screen enter, in arrival order, as their lane makes room
+        for direction, lanes in self.backlog.items():
+            for lane, waiting in lanes.items():
+                while waiting and self.spawnAnchor(direction, lane):
+                    vehicleClass, direction_number, will_turn = waiting.popleft()
+                    Vehicle(self, lane, vehicleClass, direction_number, direction, will_turn)
+
+    def simulationTime(self):
+        self.timeElapsed += 1
+        self.cullVehicles()
+        self.releaseBacklog()
+        if(self.timeElapsed>=self.sim_time):
+            self.finished = True
+            return False
+
+    def wake(self, vehicle):
+        if not vehicle.awake:
+            vehicle.awake = True
+            heapq.heappush(self._awake, (vehicle.seq, vehicle))
+
+    def wakeAll(self):
+        for vehicle in self.active:
+            self.wake(vehicle)
+
+    def cullVehicles(self):
+        """
+        Stop simulating vehicles that crossed and left the screen, and lane
+        leaders that crossed, finished turning and are retireGap ahead of
+        their follower: those only drive straight on at constant speed and
+        can no longer hold anyone up. Whoever followed one now drives as the
+        head of its lane.
+        """
+        for v in self.leaving:
+            v.drift(self.tick)
+        self.leaving = [v for v in self.leaving if not v.offscreen()]
+
+        gone = []
+        for v in self.active:
+            if v.crossed and v.offscreen():
+                gone.append(v)
+            elif v.ahead is None and v.cruising() and (v.behind is None or self.followsFreely(v, v.behind)):
+                v.retired = (self.tick, v.x, v.y)
+                self.leaving.append(v)
+                gone.append(v)
+            else:
+                continue
+            if v.behind is not None:
+                v.behind.ahead = None
+                self.wake(v.behind)
+            v.ahead = v.behind = None
+        if not gone:
+            return
+        gone_ids = {id(v) for v in gone}
+        self.active = [v for v in self.active if id(v) not in gone_ids]
+        self._awake = [(seq, v) for seq, v in self._awake if id(v) not in gone_ids]
+        heapq.heapify(self._awake)
+        for lanes in self.vehicles.values():
+            for i in range(3):
+                lanes[i] = [v for v in lanes[i] if id(v) not in gone_ids]
+
+    def followsFreely(self, leader, follower):
+        """
+        Whether a cruising lane leader can no longer hold up its follower:
+        the follower is retireGap behind, or it cruises too and moved on the
+        last tick (then, with equal speeds on the same heading, it moves on
+        every tick, and if it turned off the leader's heading it only has to
+        stay gap2 clear along the leader's).
+        """
+        lead = leader.lead(follower)
+        if lead >= retireGap:
+            return True
+        if not follower.cruising() or follower.lastMove != self.tick - 1:
+            return False
+        return follower.heading() == leader.heading() or lead >= gap2
+
+    def step(self):
+        """
+        Advance one tick: fire the events due now, then move every awake
+        vehicle once, in spawn order. A vehicle that moved wakes the one
+        behind it, which still gets its turn this tick.
+        """
+        self.clock.advance_to(self.tick / self.ticks_per_second)
+        due, self._awake = self._awake, []
+        while due:
+            _, vehicle = heapq.heappop(due)
+            x0, y0 = vehicle.x, vehicle.y
+            vehicle.move()
+            if vehicle.x == x0 and vehicle.y == y0:
+                vehicle.awake = False
+                continue
+            vehicle.lastMove = self.tick
+            self._awake.append((vehicle.seq, vehicle))    # popped in order, so still a heap
+            behind = vehicle.behind
+            if behind is not None and not behind.awake:
+                behind.awake = True
+                heapq.heappush(due, (behind.seq, behind))
+        self.tick += 1
+
+    def run(self):
+        tps = self.ticks_per_second
+        while not self.finished:
+            self.step()
+            if not self._awake:
+                # nothing can move before the next event: jump to its tick
+                t = self.clock.peek()
+                k = max(self.tick, math.ceil(t * tps))
+                while k > self.tick and (k - 1) / tps >= t:
+                    k -= 1
+                while k / tps < t:
+                    k += 1
+                self.tick = k
+
+    def report(self):
+        totalVehicles = 0
+        print('Lane-wise Vehicle Counts')
+        for i in range(noOfSignals):
+            print('Lane',i+1,':',self.vehicles[directionNumbers[i]]['crossed'])
+            totalVehicles += self.vehicles[directionNumbers[i]]['crossed']
+        print('Total vehicles passed: ',totalVehicles)
+        print('Vehicles waiting off-screen: ',sum(len(w) for lanes in self.backlog.values() for w in lanes.values()))
+        print('Total time passed: ',self.timeElapsed)
+        print('No. of vehicles passed per unit time: ',(float(totalVehicles)/float(self.timeElapsed)))
+
+
+def render(screen, sim, background, signalImages, font):
     black = (0, 0, 0)
     white = (255, 255, 255)
-
-    # Screensize 
-    screenWidth = 1400
-    screenHeight = 800
-    screenSize = (screenWidth, screenHeight)
+    redSignal, yellowSignal, greenSignal = signalImages
+
+    screen.blit(background,(0,0))   # display background in simulation
+    signals = sim.signals
+    for i in range(0,noOfSignals):  # display signal and set timer according to current status: green, yello, or red
+        if(i==sim.currentGreen):
+            if(sim.currentYellow==1):
+                if(signals[i].yellow==0):
+                    signals[i].signalText = "STOP"
+                else:
+                    signals[i].signalText = signals[i].yellow
+                screen.blit(yellowSignal, signalCoods[i])
+            else:
+                if(signals[i].green==0):
+                    signals[i].signalText = "SLOW"
+                else:
+                    signals[i].signalText = signals[i].green
+                screen.blit(greenSignal, signalCoods[i])
+        else:
+            if(signals[i].red<=10):
+                if(signals[i].red==0):
+                    signals[i].signalText = "GO"
+                else:
+                    signals[i].signalText = signals[i].red
+            else:
+                signals[i].signalText = "---"
+            screen.blit(redSignal, signalCoods[i])
+
+    # display signal timer and vehicle count
+    for i in range(0,noOfSignals):
+        signalText = font.render(str(signals[i].signalText), True, white, black)
+        screen.blit(signalText,signalTimerCoods[i])
+        displayText = sim.vehicles[directionNumbers[i]]['crossed']
+        countText = font.render(str(displayText), True, black, white)
+        screen.blit(countText,vehicleCountCoods[i])
+
+    timeElapsedText = font.render(("Time Elapsed: "+str(sim.timeElapsed)), True, black, white)
+    screen.blit(timeElapsedText,(1100,50))
+
+    # display the vehicles
+    for vehicle in sim.active:
+        vehicle.render(screen)
+    for vehicle in sim.leaving:
+        vehicle.drift(sim.tick)
+        vehicle.render(screen)
+    pygame.display.update()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="2D traffic signal simulation")
+    ap.add_argument("--headless", action="store_true", help="no window; run as fast as possible")
+    ap.add_argument("--sim-time", type=int, default=simTime, help="simulated seconds")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--quiet", action="store_true", help="don't print signal status every second")
+    args = ap.parse_args(argv)
+
+    pygame.init()
+    sim = TrafficSim(seed=args.seed, sim_time=args.sim_time, verbose=not (args.quiet or args.headless))
+    if args.headless:
+        sim.run()
+        sim.report()
+        return sim
+
+    screen = pygame.display.set_mode((screenWidth, screenHeight))
+    pygame.display.set_caption("SIMULATION")
 
     # Setting background image i.e. image of intersection
     background = pygame.image.load('images/mod_int.png')
 
-    screen = pygame.display.set_mode(screenSize)
-    pygame.display.set_caption("SIMULATION")
-
     # Loading signal images and font
-    redSignal = pygame.image.load('images/signals/red.png')
-    yellowSignal = pygame.image.load('images/signals/yellow.png')
-    greenSignal = pygame.image.load('images/signals/green.png')
+    signalImages = (pygame.image.load('images/signals/red.png'),
+                    pygame.image.load('images/signals/yellow.png'),
+                    pygame.image.load('images/signals/green.png'))
     font = pygame.font.Font(None, 30)
+    fpsClock = pygame.time.Clock()
 
-    thread3 = threading.Thread(name="generateVehicles",target=generateVehicles, args=())    # Generating vehicles
-    thread3.daemon = True
-    thread3.start()
-
-    while True:
+    while not sim.finished:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                sys.exit()
-
-        screen.blit(background,(0,0))   # display background in simulation
-        for i in range(0,noOfSignals):  # display signal and set timer according to current status: green, yello, or red
-            if(i==currentGreen):
-                if(currentYellow==1):
-                    if(signals[i].yellow==0):
-                        signals[i].signalText = "STOP"
-                    else:
-                        signals[i].signalText = signals[i].yellow
-                    screen.blit(yellowSignal, signalCoods[i])
-                else:
-                    if(signals[i].green==0):
-                        signals[i].signalText = "SLOW"
-                    else:
-                        signals[i].signalText = signals[i].green
-                    screen.blit(greenSignal, signalCoods[i])
-            else:
-                if(signals[i].red<=10):
-                    if(signals[i].red==0):
-                        signals[i].signalText = "GO"
-                    else:
-                        signals[i].signalText = signals[i].red
-                else:
-                    signals[i].signalText = "---"
-                screen.blit(redSignal, signalCoods[i])
-        signalTexts = ["","","",""]
-
-        # display signal timer and vehicle count
-        for i in range(0,noOfSignals):  
-            signalTexts[i] = font.render(str(signals[i].signalText), True, white, black)
-            screen.blit(signalTexts[i],signalTimerCoods[i]) 
-            displayText = vehicles[directionNumbers[i]]['crossed']
-            vehicleCountTexts[i] = font.render(str(displayText), True, black, white)
-            screen.blit(vehicleCountTexts[i],vehicleCountCoods[i])
-
-        timeElapsedText = font.render(("Time Elapsed: "+str(timeElapsed)), True, black, white)
-        screen.blit(timeElapsedText,(1100,50))
-
-        # display the vehicles
-        for vehicle in simulation:  
-            screen.blit(vehicle.currentImage, [vehicle.x, vehicle.y])
-            # vehicle.render(screen)
-            vehicle.move()
-        pygame.display.update()
+                pygame.quit()
+                return sim
+        sim.step()
+        render(screen, sim, background, signalImages, font)
+        fpsClock.tick(sim.ticks_per_second)   # real time on screen
+
+    sim.report()
+    pygame.quit()
+    return sim
 
-Main()
 
-  
\ No newline at end of file
+if __name__ == "__main__":
+    main()